@@ -0,0 +1,110 @@
+"""
+Compares the latency of short code lookups through the RediSearch index
+(FT.SEARCH) against direct keyed reads (HGETALL and pipelined HMGET).
+
+Run against a local Redis (the FT.SEARCH path is skipped when the server
+doesn't ship the search module):
+
+    python benchmarks/cache_lookup.py --entries 10000 --lookups 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.timezone import now  # noqa: E402
+from redis.commands.search.query import Query  # noqa: E402
+from redis.exceptions import ResponseError  # noqa: E402
+
+from smllr.cache import RedisConnectionFactory, ShortURLCache  # noqa: E402
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50={p50 * 1000:.3f}ms p99={p99 * 1000:.3f}ms"
+
+
+def measure(fn, codes: list[str]) -> list[float]:
+    samples = []
+    for code in codes:
+        started_at = time.perf_counter()
+        fn(code)
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+
+    connection = RedisConnectionFactory.get()
+    cache = ShortURLCache(connection)
+    codes = [f"bench{i}" for i in range(args.entries)]
+    created_at = now()
+
+    pipeline = connection.pipeline(transaction=False)
+    for code in codes:
+        pipeline.hset(
+            f"shorturl:{code}",
+            mapping={
+                "code": code,
+                "url": f"https://example.com/{code}",
+                "created_at": created_at.timestamp(),
+                "user_id": 1,
+            },
+        )
+    pipeline.execute()
+
+    sample = random.choices(codes, k=args.lookups)
+
+    try:
+        samples = measure(
+            lambda code: connection.ft(cache.index_name).search(Query(f"@code:{code}")),
+            sample,
+        )
+        print(f"FT.SEARCH          {percentiles(samples)}")
+    except ResponseError as err:
+        print(f"FT.SEARCH          skipped ({err})")
+
+    samples = measure(lambda code: connection.hgetall(f"shorturl:{code}"), sample)
+    print(f"HGETALL            {percentiles(samples)}")
+
+    batches = [sample[i : i + args.batch] for i in range(0, len(sample), args.batch)]
+
+    def hmget_pipeline(batch: list[str]):
+        pipeline = connection.pipeline(transaction=False)
+        for code in batch:
+            pipeline.hmget(f"shorturl:{code}", cache.fields)
+        pipeline.execute()
+
+    samples = measure(hmget_pipeline, batches)
+    print(
+        f"HMGET x{args.batch} pipeline {percentiles(samples)} "
+        f"({percentiles([s / args.batch for s in samples])} per code)"
+    )
+
+    pipeline = connection.pipeline(transaction=False)
+    for code in codes:
+        pipeline.delete(f"shorturl:{code}")
+    pipeline.execute()
+
+
+if __name__ == "__main__":
+    main()
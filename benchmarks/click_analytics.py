@@ -0,0 +1,168 @@
+"""
+Times the platform, device and source breakdowns of one link's clicks,
+grouped by the fingerprint columns they used to be read from against
+AnalyticsService counting the category columns set when clicks are saved.
+
+Seeds a few links with interleaved clicks from a mix of user agents and
+referrers, spread over the analytics window, measures the first one and
+removes them afterwards. Needs a migrated database:
+
+    python benchmarks/click_analytics.py --clicks 400000 --links 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+from user_agent_parsing import load_corpus  # noqa: E402
+
+from smllr.fingerprint.models import Fingerprint  # noqa: E402
+from smllr.shorturls.analytics import AnalyticsService  # noqa: E402
+from smllr.shorturls.clicks import (  # noqa: E402
+    click_categories,
+    resolve_fingerprints,
+)
+from smllr.shorturls.models import ShortURL, ShortURLClick  # noqa: E402
+from smllr.users.models import User  # noqa: E402
+
+REFERRERS = [
+    "",
+    "https://www.google.com/",
+    "https://www.facebook.com/",
+    "https://t.co/",
+    "https://news.ycombinator.com/item",
+    "https://www.reddit.com/r/programming/",
+    "https://www.bing.com/search",
+]
+
+FINGERPRINT_FIELDS = [
+    "fingerprint__os",
+    "fingerprint__device_type",
+    "fingerprint__referrer_domain",
+]
+
+
+def seed(shorturls: list[ShortURL], clicks: int, visitors: int, seed: int):
+    user_agents, weights = load_corpus()
+    rng = random.Random(seed)
+    headers = [
+        Fingerprint.normalise(
+            f"198.51.{i // 256 % 256}.{i % 256}",
+            rng.choices(user_agents, weights)[0],
+            rng.choice(REFERRERS),
+        )
+        for i in range(visitors)
+    ]
+    fingerprint_ids = resolve_fingerprints(headers)
+    fingerprint_ids = [
+        fingerprint_ids[Fingerprint.make_hash(*values)] for values in headers
+    ]
+    categories = click_categories(fingerprint_ids)
+
+    started_at = now()
+    for start in range(0, clicks, 10000):
+        batch = []
+        for _ in range(min(10000, clicks - start)):
+            fingerprint_id = rng.choice(fingerprint_ids)
+            batch.append(
+                ShortURLClick(
+                    short_url=rng.choice(shorturls),
+                    fingerprint_id=fingerprint_id,
+                    clicked_at=started_at
+                    - timedelta(seconds=rng.randrange(89 * 86400)),
+                    **categories[fingerprint_id],
+                )
+            )
+        ShortURLClick.objects.bulk_create(batch)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"VACUUM ANALYZE {ShortURLClick._meta.db_table}")
+
+
+def by_fingerprint(clicks):
+    for field in FINGERPRINT_FIELDS:
+        list(clicks.order_by().values(field).annotate(count=Count("id")))
+
+
+def by_category(service: AnalyticsService, clicks):
+    service._get_platform_analytics(clicks)
+    service._get_device_analytics(clicks)
+    service._get_source_analytics(clicks)
+
+
+def best_of(repeat: int, run) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=400_000)
+    parser.add_argument("--links", type=int, default=20)
+    parser.add_argument("--visitors", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    user = User.objects.create(username="bench-analytics", email="bench@analytics.test")
+    shorturls = [
+        ShortURL.objects.create(
+            user=user,
+            destination_url="https://example.com",
+            name="Benchmark",
+            short_code=f"bench-analytics-{i}",
+        )
+        for i in range(args.links)
+    ]
+
+    try:
+        started_at = time.perf_counter()
+        seed(shorturls, args.clicks, args.visitors, args.seed)
+        print(
+            f"seeded {args.clicks:,} clicks on {args.links} links in "
+            f"{time.perf_counter() - started_at:.1f}s"
+        )
+
+        shorturl = shorturls[0]
+        service = AnalyticsService(shorturl)
+        clicks = ShortURLClick.objects.get_analytics_queryset(shorturl.short_code)
+        joined = best_of(args.repeat, lambda: by_fingerprint(clicks))
+        categories = best_of(args.repeat, lambda: by_category(service, clicks))
+        print(f"by fingerprint columns: {joined * 1000:7.1f}ms")
+        print(
+            f"by category columns:   {categories * 1000:7.1f}ms "
+            f"({joined / categories:.1f}x)"
+        )
+    finally:
+        clicks = ShortURLClick.objects.filter(short_url__in=shorturls)
+        fingerprint_ids = list(
+            clicks.values_list("fingerprint_id", flat=True).distinct()
+        )
+        clicks.delete()
+        for shorturl in shorturls:
+            shorturl.delete()
+        Fingerprint.objects.filter(pk__in=fingerprint_ids).delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
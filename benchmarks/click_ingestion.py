@@ -0,0 +1,95 @@
+"""
+Compares how many clicks per second are recorded by resolving the fingerprint
+and running the per-click save_shorturl_click task against buffering the raw
+headers with ClickBuffer and draining the buffer in batches, fingerprints
+included.
+
+The task runs in-process, without a broker, so only its database and Redis
+work is measured. Needs a migrated database and a running Redis:
+
+    python benchmarks/click_ingestion.py --clicks 5000 --batch-size 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from smllr.fingerprint.models import Fingerprint  # noqa: E402
+from smllr.shorturls.clicks import ClickBuffer, resolve_fingerprints  # noqa: E402
+from smllr.shorturls.models import ShortURL  # noqa: E402
+from smllr.shorturls.tasks import save_shorturl_click  # noqa: E402
+from smllr.users.models import User  # noqa: E402
+
+
+HEADERS = (
+    "127.0.0.1",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0",
+    "https://example.com",
+)
+
+
+def per_click(clicks: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(clicks):
+        headers = Fingerprint.normalise(*HEADERS)
+        fingerprint_ids = resolve_fingerprints([headers])
+        save_shorturl_click(
+            "bench-clicks", fingerprint_ids[Fingerprint.make_hash(*headers)]
+        )
+    return clicks / (time.perf_counter() - started_at)
+
+
+def buffered(clicks: int, batch_size: int) -> float:
+    buffer = ClickBuffer.from_settings()
+    buffer.batch_size = batch_size
+
+    started_at = time.perf_counter()
+    for _ in range(clicks):
+        buffer.push("bench-clicks", HEADERS)
+    buffer.drain()
+    return clicks / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clicks", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    user = User.objects.create(username="bench-clicks", email="bench@clicks.test")
+    shorturl = ShortURL.objects.create(
+        user=user,
+        destination_url="https://example.com",
+        name="Benchmark",
+        short_code="bench-clicks",
+    )
+
+    try:
+        print(f"per-click task: {per_click(args.clicks):.0f} clicks/s")
+        print(
+            f"buffered x{args.batch_size}: "
+            f"{buffered(args.clicks, args.batch_size):.0f} clicks/s"
+        )
+    finally:
+        counter = ClickBuffer.from_settings().counter
+        counter.connection.hdel(counter.key, "bench-clicks")
+        fingerprint_ids = list(
+            shorturl.shorturlclick_set.values_list("fingerprint_id", flat=True)
+        )
+        shorturl.delete()
+        Fingerprint.objects.filter(pk__in=fingerprint_ids).delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures worker cold start: the time a fresh interpreter takes to set up Django
+and load the URLconf, which imports every view.
+
+Each run is a new process so nothing is shared between them. Pass a Redis host
+or port nobody listens on to see the cost when Redis is unreachable:
+
+    python benchmarks/cold_start.py --runs 20
+    python benchmarks/cold_start.py --runs 20 --redis-host 10.255.255.1
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP = """
+import time
+
+started_at = time.perf_counter()
+
+import django
+
+django.setup()
+
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+print(time.perf_counter() - started_at)
+"""
+
+
+def run(env: dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--redis-host")
+    parser.add_argument("--redis-port")
+    args = parser.parse_args()
+
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "smllr.settings"}
+    if args.redis_host:
+        env["REDIS_HOST"] = args.redis_host
+    if args.redis_port:
+        env["REDIS_PORT"] = args.redis_port
+
+    # The first run warms the filesystem cache and writes bytecode
+    run(env)
+    timings = sorted(run(env) for _ in range(args.runs))
+
+    print(
+        f"cold start over {args.runs} runs: "
+        f"p50 {statistics.median(timings) * 1000:.1f}ms, "
+        f"max {timings[-1] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Compares the fingerprint table storing user agents, referrers, OS, browser
+and device type as strings, as it used to, against the dimension layout: ids
+of UserAgent and ReferrerDomain rows plus small integer enums. Both are seeded
+with the same fingerprints and clicked on by the same clicks. The script
+reports their sizes, dimension tables included, and the time the analytics
+GROUP BYs take over the clicks.
+
+Everything is written to scratch tables that are dropped at the end:
+
+    python benchmarks/fingerprint_dimensions.py --fingerprints 1000000 --clicks 3000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from user_agent_parsing import load_corpus  # noqa: E402
+
+from smllr.fingerprint.classifier import classify_user_agent  # noqa: E402
+from smllr.fingerprint.models import (  # noqa: E402
+    Browser,
+    DeviceType,
+    OperatingSystem,
+    ReferrerDomain,
+    UserAgent,
+)
+
+PREFIX = "fingerprint_dimensions_bench"
+
+REFERRERS = [
+    "https://www.google.com/",
+    "https://t.co/",
+    "https://news.ycombinator.com/item",
+    "https://www.facebook.com/groups",
+    "https://www.reddit.com/r/programming/comments",
+]
+
+SCHEMA = f"""
+CREATE TABLE {PREFIX}_agents (
+    id int PRIMARY KEY, hash varchar(64), user_agent varchar(512),
+    browser_version varchar(100), device_type varchar(100),
+    browser_name varchar(100), os varchar(100),
+    device_code smallint, browser_code smallint, os_code smallint
+);
+CREATE TABLE {PREFIX}_referrers (
+    id int PRIMARY KEY, referrer varchar(512), domain_id int
+);
+CREATE TABLE {PREFIX}_strings (
+    id bigserial PRIMARY KEY, hash varchar(64) UNIQUE, ip_address varchar(45),
+    user_agent varchar(512), device_type varchar(100), referrer varchar(512),
+    browser_name varchar(100), browser_version varchar(100), os varchar(100),
+    created_at timestamptz, updated_at timestamptz
+);
+CREATE TABLE {PREFIX}_useragent (
+    id bigserial PRIMARY KEY, hash varchar(64) UNIQUE,
+    user_agent varchar(512), browser_version varchar(100)
+);
+CREATE TABLE {PREFIX}_referrerdomain (
+    id bigserial PRIMARY KEY, domain varchar(253) UNIQUE
+);
+CREATE TABLE {PREFIX}_dimensions (
+    id bigserial PRIMARY KEY, hash varchar(64) UNIQUE, ip_address varchar(45),
+    user_agent_id bigint, referrer_domain_id bigint, device_type smallint,
+    browser smallint, os smallint, created_at timestamptz, updated_at timestamptz
+);
+CREATE TABLE {PREFIX}_clicks (id bigserial PRIMARY KEY, fingerprint_id bigint);
+"""
+
+SEED = f"""
+INSERT INTO {PREFIX}_useragent (id, hash, user_agent, browser_version)
+SELECT id, hash, user_agent, browser_version FROM {PREFIX}_agents;
+
+INSERT INTO {PREFIX}_referrerdomain (id, domain)
+SELECT n, domain FROM unnest(%(domains)s::text[]) WITH ORDINALITY AS d (domain, n);
+
+CREATE TEMP TABLE {PREFIX}_seed AS
+SELECT
+    i,
+    host('10.0.0.0'::inet + i) AS ip_address,
+    1 + i %% %(agents)s AS agent_id,
+    -- One in four visitors comes without a referrer
+    CASE WHEN i %% 4 = 0 THEN NULL ELSE 1 + i %% %(referrers)s END AS referrer_id,
+    i %% 1000 AS page
+FROM generate_series(1, %(fingerprints)s) AS i;
+
+INSERT INTO {PREFIX}_strings (
+    id, hash, ip_address, user_agent, device_type, referrer, browser_name,
+    browser_version, os, created_at, updated_at
+)
+SELECT
+    s.i, md5(s.i::text) || md5(s.ip_address), s.ip_address, a.user_agent,
+    a.device_type, r.referrer || '/' || s.page, a.browser_name,
+    a.browser_version, a.os, now(), now()
+FROM {PREFIX}_seed AS s
+JOIN {PREFIX}_agents AS a ON a.id = s.agent_id
+LEFT JOIN {PREFIX}_referrers AS r ON r.id = s.referrer_id;
+
+INSERT INTO {PREFIX}_dimensions (
+    id, hash, ip_address, user_agent_id, referrer_domain_id, device_type,
+    browser, os, created_at, updated_at
+)
+SELECT
+    s.i, md5(s.i::text) || md5(s.ip_address), s.ip_address, a.id, r.domain_id,
+    a.device_code, a.browser_code, a.os_code, now(), now()
+FROM {PREFIX}_seed AS s
+JOIN {PREFIX}_agents AS a ON a.id = s.agent_id
+LEFT JOIN {PREFIX}_referrers AS r ON r.id = s.referrer_id;
+
+INSERT INTO {PREFIX}_clicks (fingerprint_id)
+SELECT 1 + (i::bigint * 7919) %% %(fingerprints)s FROM generate_series(1, %(clicks)s) AS i;
+CREATE INDEX ON {PREFIX}_clicks (fingerprint_id);
+"""
+
+GROUP_BYS = {
+    "os": ("f.os", "f.os"),
+    "browser": ("f.browser_name", "f.browser"),
+    "device type": ("f.device_type", "f.device_type"),
+    "referrer": ("f.referrer", "f.referrer_domain_id"),
+}
+
+
+def seed_rows(user_agents: list[str]) -> tuple[list[tuple], list[tuple], list[str]]:
+    agents = []
+    for i, user_agent in enumerate(user_agents, 1):
+        parsed = classify_user_agent(user_agent)
+        agents.append(
+            (
+                i,
+                UserAgent.make_hash(user_agent),
+                user_agent,
+                parsed.browser_version or "",
+                parsed.device_type,
+                parsed.browser_name,
+                parsed.os,
+                DeviceType.from_name(parsed.device_type),
+                Browser.from_name(parsed.browser_name),
+                OperatingSystem.from_name(parsed.os),
+            )
+        )
+
+    domains = sorted({ReferrerDomain.parse(referrer) for referrer in REFERRERS})
+    referrers = [
+        (i, referrer, domains.index(ReferrerDomain.parse(referrer)) + 1)
+        for i, referrer in enumerate(REFERRERS, 1)
+    ]
+    return agents, referrers, domains
+
+
+def total_size(cursor, *tables: str) -> int:
+    cursor.execute(
+        "SELECT sum(pg_total_relation_size(t)) FROM unnest(%s::text[]) AS t",
+        [[f"{PREFIX}_{table}" for table in tables]],
+    )
+    return cursor.fetchone()[0]
+
+
+def best_of(cursor, query: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        cursor.execute(query)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fingerprints", type=int, default=1_000_000)
+    parser.add_argument("--clicks", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_agents, _ = load_corpus()
+    agents, referrers, domains = seed_rows(user_agents)
+    tables = ["agents", "referrers", "strings", "useragent", "referrerdomain"]
+    tables += ["dimensions", "clicks"]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DROP TABLE IF EXISTS " + ", ".join(f"{PREFIX}_{table}" for table in tables)
+        )
+        try:
+            cursor.execute(SCHEMA)
+            cursor.executemany(
+                f"INSERT INTO {PREFIX}_agents VALUES "
+                "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                agents,
+            )
+            cursor.executemany(
+                f"INSERT INTO {PREFIX}_referrers VALUES (%s, %s, %s)", referrers
+            )
+
+            started_at = time.perf_counter()
+            cursor.execute(
+                SEED,
+                {
+                    "domains": domains,
+                    "agents": len(agents),
+                    "referrers": len(referrers),
+                    "fingerprints": args.fingerprints,
+                    "clicks": args.clicks,
+                },
+            )
+            for table in tables:
+                cursor.execute(f"VACUUM ANALYZE {PREFIX}_{table}")
+            print(
+                f"seeded {args.fingerprints:,} fingerprints and {args.clicks:,} "
+                f"clicks in {time.perf_counter() - started_at:.1f}s"
+            )
+
+            strings = total_size(cursor, "strings")
+            dimensions = total_size(cursor, "dimensions", "useragent", "referrerdomain")
+            print(
+                f"fingerprints: strings {strings / 1024**2:.1f}MB, dimensions "
+                f"{dimensions / 1024**2:.1f}MB ({dimensions / strings - 1:+.1%})"
+            )
+
+            for name, (string_column, id_column) in GROUP_BYS.items():
+                timings = [
+                    best_of(
+                        cursor,
+                        f"SELECT {column}, count(*) FROM {PREFIX}_clicks AS c "
+                        f"JOIN {PREFIX}_{table} AS f ON f.id = c.fingerprint_id "
+                        f"GROUP BY {column}",
+                        args.repeat,
+                    )
+                    for table, column in [
+                        ("strings", string_column),
+                        ("dimensions", id_column),
+                    ]
+                ]
+                print(
+                    f"GROUP BY {name:12} strings {timings[0] * 1000:7.1f}ms, "
+                    f"dimensions {timings[1] * 1000:7.1f}ms "
+                    f"({timings[0] / timings[1]:.1f}x)"
+                )
+        finally:
+            cursor.execute(
+                "DROP TABLE IF EXISTS "
+                + ", ".join(f"{PREFIX}_{table}" for table in tables)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Seeds a copy of the fingerprint table that still has fingerprint_data, the way
+build_fingerprint used to fill it, and reports the table and index sizes
+before the column is dropped, right after, and once the table is rewritten.
+
+Postgres only marks a dropped column as gone, so the space comes back as rows
+are rewritten by updates or at once with VACUUM FULL or pg_repack. The copy is
+a separate table and is dropped at the end:
+
+    python benchmarks/fingerprint_table_size.py --rows 2000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from user_agent_parsing import load_corpus  # noqa: E402
+
+from smllr.fingerprint.classifier import classify_user_agent  # noqa: E402
+
+TABLE = "fingerprint_size_bench"
+
+REFERRERS = [
+    "",
+    "https://www.google.com/",
+    "https://t.co/",
+    "https://news.ycombinator.com/",
+]
+
+# The fingerprint table as it was before its fields moved to dimension tables
+SCHEMA = f"""
+CREATE TABLE {TABLE} (
+    id bigserial PRIMARY KEY, hash varchar(64) UNIQUE, ip_address varchar(45),
+    user_agent varchar(512), device_type varchar(100), referrer varchar(512),
+    browser_name varchar(100), browser_version varchar(100), os varchar(100),
+    created_at timestamptz, updated_at timestamptz, fingerprint_data jsonb NOT NULL
+)
+"""
+
+SEED = f"""
+INSERT INTO {TABLE} (
+    hash, ip_address, user_agent, device_type, referrer, browser_name,
+    browser_version, os, created_at, updated_at, fingerprint_data
+)
+SELECT
+    encode(sha256(convert_to(ip || ua.user_agent || referrer, 'UTF8')), 'hex'),
+    ip, ua.user_agent, ua.device_type, referrer, ua.browser_name,
+    ua.browser_version, ua.os, now(), now(),
+    jsonb_build_object(
+        'ip_address', ip, 'user_agent', ua.user_agent,
+        'device_type', ua.device_type, 'referrer', referrer,
+        'browser_name', ua.browser_name, 'browser_version', ua.browser_version,
+        'os', ua.os
+    )
+FROM generate_series(1, %s) AS i
+CROSS JOIN LATERAL (
+    SELECT
+        host(('10.0.0.0'::inet + i)) AS ip,
+        (%s::text[])[1 + i %% %s] AS referrer
+) AS request
+JOIN {TABLE}_agents AS ua ON ua.id = i %% %s
+"""
+
+
+def sizes(cursor) -> tuple[int, int]:
+    cursor.execute("SELECT pg_table_size(%s), pg_indexes_size(%s)", [TABLE, TABLE])
+    return cursor.fetchone()
+
+
+def report(label: str, table: int, indexes: int, before: tuple[int, int]):
+    def mb(size: int) -> str:
+        return f"{size / 1024**2:8.1f}MB"
+
+    print(
+        f"{label:22} table {mb(table)} ({table / before[0] - 1:+6.1%}), "
+        f"indexes {mb(indexes)} ({indexes / before[1] - 1:+6.1%})"
+    )
+
+
+def parsed_columns(user_agent: str) -> tuple[str, str, str, str]:
+    parsed = classify_user_agent(user_agent)
+    return (
+        parsed.device_type or "",
+        parsed.browser_name or "",
+        parsed.browser_version or "",
+        parsed.os or "",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    user_agents, _ = load_corpus()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}, {TABLE}_agents")
+        cursor.execute(SCHEMA)
+        cursor.execute(
+            f"CREATE TABLE {TABLE}_agents (id int PRIMARY KEY, user_agent text, "
+            "device_type text, browser_name text, browser_version text, os text)"
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE}_agents VALUES (%s, %s, %s, %s, %s, %s)",
+            [
+                (i, user_agent, *parsed_columns(user_agent))
+                for i, user_agent in enumerate(user_agents)
+            ],
+        )
+
+        try:
+            started_at = time.perf_counter()
+            cursor.execute(
+                SEED,
+                [
+                    args.rows,
+                    REFERRERS,
+                    len(REFERRERS),
+                    len(user_agents),
+                ],
+            )
+            # VACUUM FULL rebuilds the indexes too, so start from fresh ones
+            # to tell what the column saves from what the rebuild does
+            cursor.execute(f"REINDEX TABLE {TABLE}")
+            cursor.execute(f"VACUUM ANALYZE {TABLE}")
+            print(
+                f"seeded {args.rows:,} rows in {time.perf_counter() - started_at:.1f}s"
+            )
+
+            before = sizes(cursor)
+            report("with fingerprint_data", *before, before)
+
+            started_at = time.perf_counter()
+            cursor.execute(f"ALTER TABLE {TABLE} DROP COLUMN fingerprint_data")
+            print(
+                f"dropped the column in {(time.perf_counter() - started_at) * 1000:.0f}ms"
+            )
+            report("after DROP COLUMN", *sizes(cursor), before)
+
+            cursor.execute(f"VACUUM FULL {TABLE}")
+            report("after VACUUM FULL", *sizes(cursor), before)
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}, {TABLE}_agents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares what a cache hit costs when the entry is turned into an unsaved
+ShortURL with its User attached, as the cache used to do, against building a
+CachedShortURL record. Both sides read the destination and check expiry, like
+the redirect view does. No Redis or database is needed:
+
+    python benchmarks/redirect_record.py --hits 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.timezone import make_aware  # noqa: E402
+
+from smllr.cache import ShortURLCache  # noqa: E402
+from smllr.shorturls.models import ShortURL  # noqa: E402
+from smllr.users.models import User  # noqa: E402
+
+ENTRY = {
+    b"code": b"bench-record",
+    b"url": b"https://example.com/some/landing/page",
+    b"created_at": str(time.time()).encode(),
+    b"user_id": b"1",
+    b"expires_at": b"",
+    b"is_guest": b"0",
+}
+
+
+def to_model(data: dict[bytes, bytes]) -> ShortURL:
+    data = {key.decode(): value.decode() for key, value in data.items()}
+    return ShortURL(
+        user=User(pk=int(data["user_id"]), is_guest_user=data["is_guest"] == "1"),
+        destination_url=data["url"],
+        short_code=data["code"],
+        created_at=make_aware(datetime.fromtimestamp(float(data["created_at"]))),
+    )
+
+
+def to_record(data: dict[bytes, bytes]):
+    return ShortURLCache._to_record(data[b"code"], data[b"url"], data[b"expires_at"])
+
+
+def cpu_per_hit(build, hits: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(hits):
+        short_url = build(ENTRY)
+        short_url.is_expired()
+        short_url.destination_url  # noqa: B018
+    return (time.perf_counter() - started_at) / hits
+
+
+def bytes_per_hit(build, hits: int) -> float:
+    tracemalloc.start()
+    objects = [build(ENTRY) for _ in range(hits)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hits", type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, build in [("ShortURL model", to_model), ("CachedShortURL", to_record)]:
+        cpu = cpu_per_hit(build, args.hits)
+        memory = bytes_per_hit(build, min(args.hits, 10000))
+        print(f"{name:>15}: {cpu * 1_000_000:.2f}us/hit, {memory:.0f} bytes/entry")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures cached redirects per second through the full middleware stack and
+through the ShortURLFastRedirectMiddleware fast path.
+
+Click recording is patched out so both runs measure routing and the cache
+lookup only. Needs a migrated database and a running Redis:
+
+    python benchmarks/redirect_throughput.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import Client, override_settings  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+
+from smllr.shorturls.models import ShortURL  # noqa: E402
+from smllr.shorturls.views import ShortURLRedirectView  # noqa: E402
+from smllr.users.models import User  # noqa: E402
+
+
+def run(requests: int, fast_redirect: bool) -> float:
+    with override_settings(
+        SHORTURL_FAST_REDIRECT=fast_redirect, ALLOWED_HOSTS=["testserver"]
+    ):
+        client = Client()
+        client.get("/bench-redirect")
+
+        started_at = time.perf_counter()
+        for _ in range(requests):
+            client.get("/bench-redirect")
+        return requests / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    ShortURLRedirectView.cache.set(
+        ShortURL(
+            user=User(pk=1, is_guest_user=False),
+            destination_url="https://example.com",
+            short_code="bench-redirect",
+            created_at=now(),
+        )
+    )
+
+    with patch("smllr.shorturls.views.enqueue_click"):
+        full_stack = run(args.requests, fast_redirect=False)
+        fast_path = run(args.requests, fast_redirect=True)
+
+    ShortURLRedirectView.cache.invalidate("bench-redirect")
+
+    print(f"Full middleware stack {full_stack:>10.0f} req/s")
+    print(
+        f"Fast path             {fast_path:>10.0f} req/s ({fast_path / full_stack:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
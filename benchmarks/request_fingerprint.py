@@ -0,0 +1,87 @@
+"""
+Measures what RequestFingerprintMiddleware costs per request. Building the
+fingerprint up front, as the middleware used to, is compared against the lazy
+fingerprint on a route that never reads it, like static files or the API, and
+on one that does, like the guest user paths. The time it takes to build a
+request without the middleware is subtracted. No Redis or database is needed:
+
+    python benchmarks/request_fingerprint.py --requests 20000 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory  # noqa: E402
+from user_agent_parsing import replay  # noqa: E402
+
+from smllr.fingerprint.middlewares import (  # noqa: E402
+    RequestFingerprintMiddleware,
+    get_request_fingerprint,
+)
+from smllr.fingerprint.parser import parse_user_agent  # noqa: E402
+
+
+class EagerFingerprintMiddleware(RequestFingerprintMiddleware):
+    @staticmethod
+    def set_fingerprint(request):
+        request.fingerprint = get_request_fingerprint(request)
+
+
+def ignore_fingerprint(request):
+    return None
+
+
+def read_fingerprint(request):
+    return request.fingerprint.browser
+
+
+def run(middleware, user_agents: list[str]) -> float:
+    # Each request is built and dropped in the loop, like a server would, so
+    # the cost of collecting it is counted too
+    factory = RequestFactory()
+    parse_user_agent.cache_clear()
+    started_at = time.perf_counter()
+    for user_agent in user_agents:
+        middleware(factory.get("/static/app.css", HTTP_USER_AGENT=user_agent))
+    return (time.perf_counter() - started_at) / len(user_agents)
+
+
+def best_of(repeat: int, middleware, user_agents: list[str]) -> float:
+    return min(run(middleware, user_agents) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--unique", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_agents = replay(args.requests, args.unique, args.seed)
+    baseline = best_of(args.repeat, ignore_fingerprint, user_agents)
+
+    for name, middleware, get_response in [
+        ("eager, not read", EagerFingerprintMiddleware, ignore_fingerprint),
+        ("lazy, not read", RequestFingerprintMiddleware, ignore_fingerprint),
+        ("eager, read", EagerFingerprintMiddleware, read_fingerprint),
+        ("lazy, read", RequestFingerprintMiddleware, read_fingerprint),
+    ]:
+        overhead = best_of(args.repeat, middleware(get_response), user_agents)
+        overhead -= baseline
+        print(f"{name:16} {overhead * 1_000_000:6.2f}µs/request")
+
+
+if __name__ == "__main__":
+    main()
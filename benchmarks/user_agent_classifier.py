@@ -0,0 +1,103 @@
+"""
+Compares classify_user_agent against the httpagentparser based parsing it
+replaced, both without the LRU cache in front of them, over the user agents in
+benchmarks/user_agents.txt. Results are also checked to match:
+
+    python benchmarks/user_agent_classifier.py --rounds 200 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpagentparser  # noqa: E402
+
+from smllr.fingerprint.classifier import UserAgent, classify_user_agent  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "user_agents.txt"
+
+
+def httpagentparser_user_agent(user_agent: str) -> UserAgent:
+    """
+    The parsing done before the classifier, device type checks included.
+    """
+
+    detected = httpagentparser.detect(user_agent)
+    device_type = None
+    if "dist" in detected:
+        dist_name = detected["dist"].get("name", "")
+        if dist_name:
+            dist_name_lower = dist_name.lower()
+            if "iphone" in dist_name_lower:
+                device_type = "Mobile"
+            elif "ipad" in dist_name_lower:
+                device_type = "Tablet"
+            elif "android" in dist_name_lower:
+                device_type = "Mobile"
+            else:
+                device_type = dist_name
+    elif detected.get("platform", {}).get("name", ""):
+        device_type = "Desktop"
+
+    return UserAgent(
+        browser_name=detected.get("browser", {}).get("name"),
+        browser_version=detected.get("browser", {}).get("version"),
+        os=detected.get("os", {}).get("name"),
+        device_type=device_type,
+    )
+
+
+def run(parse, user_agents: list[str], rounds: int, repeat: int) -> float:
+    """
+    Parses per second over the fastest of `repeat` runs, which is the least
+    disturbed by whatever else the machine is doing.
+    """
+
+    timings = timeit.repeat(
+        lambda: [parse(user_agent) for user_agent in user_agents],
+        number=rounds,
+        repeat=repeat,
+    )
+    return rounds * len(user_agents) / min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    user_agents = [
+        line.partition("\t")[2]
+        for line in CORPUS.read_text().splitlines()
+        if not line.startswith("#")
+    ]
+
+    mismatches = [
+        user_agent
+        for user_agent in user_agents
+        if classify_user_agent(user_agent) != httpagentparser_user_agent(user_agent)
+    ]
+    for user_agent in mismatches:
+        print(f"mismatch: {user_agent!r}")
+
+    before = run(httpagentparser_user_agent, user_agents, args.rounds, args.repeat)
+    after = run(classify_user_agent, user_agents, args.rounds, args.repeat)
+
+    print(f"{len(user_agents)} user agents, {len(mismatches)} mismatches")
+    print(f"httpagentparser: {before:,.0f} parses/s")
+    print(f"classifier:      {after:,.0f} parses/s ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Replays a realistic mix of user agents through parse_user_agent, with and
+without its LRU cache, and reports the throughput and cache hit rate.
+
+The mix is sampled from benchmarks/user_agents.txt by weight. A share of the
+requests get a user agent nobody else sends, the way in-app browsers append
+build numbers, so the cache also sees a long tail of misses:
+
+    python benchmarks/user_agent_parsing.py --requests 100000 --unique 0.05
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "smllr.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from smllr.fingerprint.parser import parse_user_agent, user_agent_cache_stats  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "user_agents.txt"
+
+
+def load_corpus() -> tuple[list[str], list[int]]:
+    user_agents, weights = [], []
+    for line in CORPUS.read_text().splitlines():
+        if line.startswith("#"):
+            continue
+        weight, _, user_agent = line.partition("\t")
+        user_agents.append(user_agent)
+        weights.append(int(weight))
+    return user_agents, weights
+
+
+def replay(requests: int, unique: float, seed: int) -> list[str]:
+    user_agents, weights = load_corpus()
+    rng = random.Random(seed)
+    sample = rng.choices(user_agents, weights, k=requests)
+    for i in range(requests):
+        if rng.random() < unique:
+            sample[i] = f"{sample[i]} [FBAN/FBIOS;FBAV/{rng.randrange(10**9)}]"
+    return sample
+
+
+def run(parse, user_agents: list[str]) -> float:
+    started_at = time.perf_counter()
+    for user_agent in user_agents:
+        parse(user_agent)
+    return len(user_agents) / (time.perf_counter() - started_at)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--unique", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    user_agents = replay(args.requests, args.unique, args.seed)
+
+    uncached = run(parse_user_agent.__wrapped__, user_agents)
+    parse_user_agent.cache_clear()
+    cached = run(parse_user_agent, user_agents)
+    stats = user_agent_cache_stats()
+
+    print(f"uncached: {uncached:,.0f} parses/s")
+    print(
+        f"cached:   {cached:,.0f} parses/s ({cached / uncached:.1f}x), "
+        f"hit rate {stats['hit_rate']:.1%}, "
+        f"{stats['entries']}/{stats['max_entries']} entries"
+    )
+
+
+if __name__ == "__main__":
+    main()
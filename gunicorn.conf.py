@@ -0,0 +1,29 @@
+"""
+Gunicorn settings, loaded from the working directory when the server starts.
+"""
+
+
+def post_worker_init(worker):
+    """
+    Subscribes the worker to redirect cache invalidations, so its first request
+    doesn't wait on Redis, then loads the hottest short URLs into its in-process
+    redirect cache when SHORTURL_PRELOAD_ENTRIES is set. They're ranked once by
+    the warm_shorturl_cache command rather than by every worker.
+    """
+
+    from django.conf import settings
+
+    from smllr.shorturls.views import ShortURLRedirectView
+
+    ShortURLRedirectView.cache.start_listener()
+
+    if not settings.SHORTURL_PRELOAD_ENTRIES:
+        return
+
+    try:
+        count = ShortURLRedirectView.cache.preload(settings.SHORTURL_PRELOAD_ENTRIES)
+    except Exception:
+        worker.log.exception("Could not preload the short URL cache")
+        return
+
+    worker.log.info(f"Preloaded {count} short URLs")
@@ -1,6 +1,6 @@
 #!/bin/sh
 
-CONTAINERS_TO_BUILD="webapp webapp-celery"
+CONTAINERS_TO_BUILD="webapp webapp-celery webapp-celery-beat"
 
 git pull
 
@@ -6,5 +6,10 @@ python manage.py collectstatic --noinput
 # Run database migrations
 python manage.py migrate --noinput
 
+# Rank the hottest links once for the gunicorn workers to preload
+if [ "${SHORTURL_PRELOAD_ENTRIES:-0}" != "0" ]; then
+    python manage.py warm_shorturl_cache
+fi
+
 # Start the gunicorn server
 $@ 
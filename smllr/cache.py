@@ -1,65 +1,248 @@
+import asyncio
+import hashlib
 import logging
+import math
+import os
+import threading
+import time
 
-from datetime import datetime
+from asgiref.sync import sync_to_async
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
 from django.conf import settings
-from django.utils.timezone import make_aware
+from django.utils.timezone import now
 from smllr.shorturls.models import ShortURL
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
 from redis.commands.search.field import TextField, NumericField
 from redis.commands.search.query import Query
 from redis.commands.search.index_definition import IndexDefinition
-from redis.exceptions import RedisError
+from redis.exceptions import RedisError, ResponseError
+from redis.retry import Retry
 from typing import TypedDict
-
-from smllr.users.models import User
+from uuid import uuid4
+from weakref import WeakKeyDictionary
 
 
 logger = logging.getLogger(__name__)
 
 
-class RedisConnectionConfiguration(TypedDict):
+class LocalCacheConfiguration(TypedDict):
+    max_entries: int
+    max_bytes: int
+    ttl: int
+
+
+class ShortCodeFilterConfiguration(TypedDict):
+    capacity: int
+    error_rate: float
+    negative_ttl: int
+
+
+class RedisConnectionConfiguration(TypedDict, total=False):
     host: str
     port: int
     username: str | None
     password: str | None
+    max_connections: int
+    socket_connect_timeout: float
+    socket_timeout: float
+    retries: int
+    health_check_interval: int
+
+
+def get_connection_kwargs(config: RedisConnectionConfiguration) -> dict:
+    """
+    Connection pool arguments shared by the sync and async factories. Timeouts
+    keep a stuck socket from stalling a worker; waiting for a free connection
+    in a full pool is bounded by the connect timeout as well.
+    """
+
+    return {
+        "host": config["host"],
+        "port": config["port"],
+        "username": config.get("username"),
+        "password": config.get("password"),
+        "max_connections": config.get("max_connections", 50),
+        "timeout": config.get("socket_connect_timeout", 1.0),
+        "socket_connect_timeout": config.get("socket_connect_timeout", 1.0),
+        "socket_timeout": config.get("socket_timeout", 1.0),
+        "health_check_interval": config.get("health_check_interval", 30),
+    }
 
 
 class RedisConnectionFactory:
+    """
+    Hands out a single Redis client per process, backed by a bounded connection
+    pool. The pool is reset when the process has been forked since it was used,
+    so gunicorn workers never share the parent's sockets.
+    """
+
     current_connection: Redis | None = None
+    pid: int | None = None
+    lock = threading.Lock()
 
     @staticmethod
     def _create_connection(config: RedisConnectionConfiguration) -> Redis:
         try:
-            conn = Redis(
-                host=config["host"],
-                port=config["port"],
-                username=config.get("username"),
-                password=config.get("password"),
+            pool = BlockingConnectionPool(
+                **get_connection_kwargs(config),
+                retry=Retry(
+                    ExponentialBackoff(cap=0.5, base=0.01), config.get("retries", 2)
+                ),
             )
-            return conn
+            return Redis(connection_pool=pool)
         except Exception as err:
             logger.error("Error creating connection with Redis", err, exc_info=True)
             raise Exception(
                 f"Error connecting to Redis at {config['host']}:{config['port']}"
             )
 
+    @staticmethod
+    def create(**overrides) -> Redis:
+        """
+        Creates a client with a pool of its own rather than the shared one, e.g.
+        for blocking commands that wait longer than the shared read timeout.
+        """
+
+        return RedisConnectionFactory._create_connection(
+            {**settings.REDIS, **overrides}
+        )
+
     @staticmethod
     def get() -> Redis:
-        if RedisConnectionFactory.current_connection is None:
-            RedisConnectionFactory.current_connection = (
-                RedisConnectionFactory._create_connection(settings.REDIS)
-            )
+        pid = os.getpid()
+        if RedisConnectionFactory.pid == pid:
+            return RedisConnectionFactory.current_connection
+
+        with RedisConnectionFactory.lock:
+            if RedisConnectionFactory.current_connection is None:
+                RedisConnectionFactory.current_connection = (
+                    RedisConnectionFactory._create_connection(settings.REDIS)
+                )
+            elif RedisConnectionFactory.pid != pid:
+                # Forked: drop the parent's connections without closing them
+                RedisConnectionFactory.current_connection.connection_pool.reset()
+            RedisConnectionFactory.pid = pid
+
         return RedisConnectionFactory.current_connection
 
+    @staticmethod
+    def pool_stats() -> dict[str, int]:
+        """
+        Reports how many connections the pool has opened and how many are
+        currently checked out.
+        """
+
+        connection = RedisConnectionFactory.current_connection
+        if connection is None:
+            return {"max_connections": 0, "created": 0, "in_use": 0, "idle": 0}
+
+        pool = connection.connection_pool
+        idle = len([conn for conn in list(pool.pool.queue) if conn is not None])
+        created = len(pool._connections)
+        return {
+            "max_connections": pool.max_connections,
+            "created": created,
+            "in_use": created - idle,
+            "idle": idle,
+        }
+
+
+class AsyncRedisConnectionFactory:
+    """
+    Hands out one redis.asyncio client per event loop, since its connections
+    can't be shared across loops. Pools are configured like the sync factory.
+    """
+
+    connections: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncRedis] = (
+        WeakKeyDictionary()
+    )
+
+    @staticmethod
+    def get() -> AsyncRedis:
+        loop = asyncio.get_running_loop()
+        connection = AsyncRedisConnectionFactory.connections.get(loop)
+
+        if connection is None:
+            config: RedisConnectionConfiguration = settings.REDIS
+            pool = AsyncBlockingConnectionPool(
+                **get_connection_kwargs(config),
+                retry=AsyncRetry(
+                    ExponentialBackoff(cap=0.5, base=0.01), config.get("retries", 2)
+                ),
+            )
+            connection = AsyncRedis(connection_pool=pool)
+            AsyncRedisConnectionFactory.connections[loop] = connection
+
+        return connection
+
+
+@dataclass(frozen=True, slots=True)
+class CachedShortURL:
+    """
+    What the redirect needs from a short URL: where it goes and when it stops
+    working, as a Unix timestamp (None if it never expires). The cache returns
+    these instead of ShortURL instances to keep model and user instantiation
+    off the hot path.
+    """
+
+    short_code: str
+    destination_url: str
+    expires_at: float | None = None
+
+    @staticmethod
+    def from_shorturl(short_url: ShortURL) -> "CachedShortURL":
+        expires_at = short_url.get_expires_at()
+        return CachedShortURL(
+            short_url.short_code,
+            short_url.destination_url,
+            expires_at.timestamp() if expires_at else None,
+        )
+
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and time.time() > self.expires_at
+
 
 class ShortURLCache:
     index_name = "shorturl"
+    fields = ("code", "url", "expires_at", "is_guest")
+    hottest_key = "shorturl-hottest"
+
+    release_lock_script_source = """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    end
+    return 0
+    """
 
-    def __init__(self, connection: Redis):
+    def __init__(self, connection: Redis, ttl: int | None = None):
         self.connection = connection
-        self.create_index()
+        self.ttl = ttl or settings.SHORTURL_CACHE_TTL
+        self.release_lock_script = connection.register_script(
+            self.release_lock_script_source
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def create_index(self) -> bool:
+        """
+        Creates the search index used by `search`, returning False if it already
+        exists. Nothing on the redirect path needs it, so it's created by the
+        create_shorturl_index command rather than on every startup.
+        """
+
+        index = self.connection.ft(self.index_name)
+        try:
+            index.info()
+            return False
+        except ResponseError:
+            pass
 
-    def create_index(self):
         schema = [
             NumericField("url_id"),
             TextField("code"),
@@ -67,41 +250,819 @@ class ShortURLCache:
             NumericField("created_at"),
             NumericField("user_id"),
         ]
-        try:
-            self.connection.ft(self.index_name).create_index(
-                schema,
-                definition=IndexDefinition(prefix=f"{self.index_name}:"),
+        index.create_index(
+            schema, definition=IndexDefinition(prefix=f"{self.index_name}:")
+        )
+        return True
+
+    def _key(self, code: str) -> str:
+        return f"{self.index_name}:{code}"
+
+    def _lock_key(self, code: str) -> str:
+        return f"{self.index_name}-lock:{code}"
+
+    def set(self, short_url: ShortURL):
+        pipeline = self.connection.pipeline()
+        self._queue_set(pipeline, short_url)
+        pipeline.execute()
+
+    def set_many(self, short_urls: Iterable[ShortURL]) -> int:
+        """
+        Writes several entries in a single round trip. Returns how many were
+        written, leaving out expired links.
+        """
+
+        pipeline = self.connection.pipeline()
+        count = sum(self._queue_set(pipeline, short_url) for short_url in short_urls)
+        pipeline.execute()
+        return count
+
+    def _queue_set(self, pipeline, short_url: ShortURL) -> bool:
+        """
+        Queues the entry together with its expiry, in one MULTI so it's never
+        left without one. Guest links expire in Redis exactly when the link does,
+        which means an entry that's found is never expired. Links that never
+        expire get `ttl` instead so idle entries age out.
+        """
+
+        key = self._key(short_url.short_code)
+        expires_at = short_url.get_expires_at()
+
+        if expires_at is not None and expires_at <= now():
+            pipeline.delete(key)
+            return False
+
+        pipeline.hset(key, mapping=self._to_mapping(short_url))
+        if expires_at is None:
+            pipeline.expire(key, self.ttl)
+        else:
+            pipeline.pexpireat(key, expires_at)
+        return True
+
+    def get(self, code: str) -> CachedShortURL | None:
+        """
+        Reads the cached entry for a single short code with one HGETALL.
+        """
+
+        return self._from_hash(self.connection.hgetall(self._key(code)))
+
+    def get_many(self, codes: list[str]) -> dict[str, CachedShortURL]:
+        """
+        Reads the cached entries for several short codes in a single round trip
+        using a pipeline of HMGET commands. Codes that aren't cached are left out
+        of the result.
+        """
+
+        pipeline = self.connection.pipeline(transaction=False)
+        for code in codes:
+            pipeline.hmget(self._key(code), self.fields)
+
+        short_urls = {}
+        for code, (short_code, url, expires_at, is_guest) in zip(
+            codes, pipeline.execute()
+        ):
+            if is_guest is None:
+                continue
+            short_urls[code] = self._to_record(short_code, url, expires_at)
+
+        return short_urls
+
+    def delete(self, code: str):
+        self.connection.delete(self._key(code))
+
+    def set_hottest(self, codes: list[str]):
+        """
+        Replaces the ranking of the hottest codes, most clicked first, that
+        workers preload their in-process tier from.
+        """
+
+        pipeline = self.connection.pipeline()
+        pipeline.delete(self.hottest_key)
+        if codes:
+            pipeline.rpush(self.hottest_key, *codes)
+        pipeline.execute()
+
+    def hottest(self, limit: int) -> list[str]:
+        codes = self.connection.lrange(self.hottest_key, 0, limit - 1)
+        return [code.decode() for code in codes]
+
+    def acquire_lock(self, code: str, token: str, timeout: float) -> bool:
+        return bool(
+            self.connection.set(
+                self._lock_key(code), token, nx=True, px=int(timeout * 1000)
             )
-        except RedisError:
-            logger.debug("ShortURL index definition already exists")
-
-    def set(self, code: str, url: str, created_at: datetime, user_id: int):
-        self.connection.hset(
-            f"shorturl:{code}",
-            mapping={
-                "code": code,
-                "url": url,
-                "created_at": created_at.timestamp(),
-                "user_id": user_id,
-            },
         )
 
-    def get(self, code: str) -> ShortURL | None:
-        query = Query(f"@code:{code}")
-        res = self.connection.ft(self.index_name).search(query)
-        docs = getattr(res, "docs", [])
+    def release_lock(self, code: str, token: str):
+        # Only the holder may release, in case the lock expired and was taken over
+        self.release_lock_script(keys=[self._lock_key(code)], args=[token])
+
+    def search(self, query: Query):
+        """
+        Runs a secondary query against the search index, e.g. listing the cached
+        entries of a user. Lookups by short code should use `get` instead.
+        Needs the index from `create_index`.
+        """
+
+        return self.connection.ft(self.index_name).search(query)
+
+    def _to_mapping(self, short_url: ShortURL) -> dict[str, str | int | float]:
+        """
+        Serialises everything the redirect needs: the destination, the guest flag
+        and the precomputed expiry (empty for links that never expire).
+        """
+
+        expires_at = short_url.get_expires_at()
 
-        if len(docs) == 0:
+        return {
+            "code": short_url.short_code,
+            "url": short_url.destination_url,
+            "created_at": short_url.created_at.timestamp(),
+            "user_id": short_url.user_id,
+            "expires_at": expires_at.timestamp() if expires_at else "",
+            "is_guest": int(short_url.user.is_guest_user),
+        }
+
+    def _from_hash(self, data: dict[bytes, bytes]) -> CachedShortURL | None:
+        # Entries written before the guest flag was cached are treated as misses
+        # so they get rewritten with every field the redirect needs.
+        if not data or b"is_guest" not in data:
+            self.misses += 1
             return None
 
-        doc = docs[0]
-        created_at = datetime.fromtimestamp(float(doc.created_at))
+        self.hits += 1
+        return self._to_record(data[b"code"], data[b"url"], data[b"expires_at"])
+
+    @staticmethod
+    def _to_record(code: bytes, url: bytes, expires_at: bytes) -> CachedShortURL:
+        return CachedShortURL(
+            code.decode(), url.decode(), float(expires_at) if expires_at else None
+        )
+
+
+class ShortCodeFilter:
+    """
+    Recognises short codes that certainly don't exist, so lookups for them can be
+    answered without touching the database.
+
+    It combines a Bloom filter of every existing code, stored as a plain Redis
+    bitmap, with a short-lived negative cache of codes recently looked up and not
+    found. The filter only takes effect once `rebuild` has populated it.
+    """
+
+    missing_key_prefix = "shorturl-missing"
+
+    # Sets the bits only if the filter was built, so a partial filter never
+    # produces false negatives, and drops any negative entry for the code.
+    add_script = """
+    if redis.call("EXISTS", KEYS[1]) == 1 then
+        for i = 1, #ARGV do
+            redis.call("SETBIT", KEYS[1], ARGV[i], 1)
+        end
+    end
+    redis.call("DEL", KEYS[2])
+    """
+
+    def __init__(
+        self, connection: Redis, capacity: int, error_rate: float, negative_ttl: int
+    ):
+        self.connection = connection
+        self.negative_ttl = negative_ttl
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        # The key is tied to the filter geometry so changing the settings leaves
+        # the filter disabled until it's rebuilt, instead of reading wrong bits.
+        self.key = f"shorturl-filter:{self.size}:{self.hash_count}"
+        self.add_code = connection.register_script(self.add_script)
+
+    @staticmethod
+    def from_settings(
+        connection: Redis | None = None, config_key: str | None = None
+    ) -> "ShortCodeFilter":
+        config = getattr(settings, config_key or "SHORTURL_FILTER")
+        return ShortCodeFilter(connection or RedisConnectionFactory.get(), **config)
+
+    def _missing_key(self, code: str) -> str:
+        return f"{self.missing_key_prefix}:{code}"
+
+    def positions(self, code: str) -> list[int]:
+        digest = hashlib.blake2b(code.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, code: str):
+        self.add_code(
+            keys=[self.key, self._missing_key(code)], args=self.positions(code)
+        )
+
+    def is_missing(self, code: str) -> bool:
+        """
+        Checks the filter and the negative cache in a single round trip.
+        """
+
+        pipeline = self.connection.pipeline(transaction=False)
+        self._queue_is_missing(pipeline, code)
+        return self._parse_is_missing(pipeline.execute())
+
+    def _queue_is_missing(self, pipeline, code: str):
+        pipeline.exists(self.key)
+        for position in self.positions(code):
+            pipeline.getbit(self.key, position)
+        pipeline.exists(self._missing_key(code))
+
+    @staticmethod
+    def _parse_is_missing(results: list[int]) -> bool:
+        filter_exists, *bits, missing = results
+        return bool(missing) or bool(filter_exists and not all(bits))
+
+    def set_missing(self, code: str):
+        self.connection.set(self._missing_key(code), 1, ex=self.negative_ttl)
+
+    def rebuild(self, codes: Iterable[str]) -> int:
+        """
+        Builds the filter in memory and swaps it in atomically. Returns the number
+        of codes added.
+        """
+
+        bits = bytearray((self.size + 7) // 8)
+        count = 0
+        for code in codes:
+            for position in self.positions(code):
+                bits[position >> 3] |= 0x80 >> (position & 7)
+            count += 1
+
+        rebuild_key = f"{self.key}:rebuild"
+        pipeline = self.connection.pipeline()
+        pipeline.set(rebuild_key, bytes(bits))
+        pipeline.rename(rebuild_key, self.key)
+        pipeline.execute()
+
+        return count
+
+
+class LocalShortURLCache:
+    """
+    Bounded in-process LRU of short URLs, kept in front of the Redis cache so the
+    hottest codes are served without a network hop. Entries are evicted when
+    they're older than `ttl` seconds, when the link itself expires, or when the
+    cache goes over `max_entries` or `max_bytes`.
+    """
+
+    # Rough per-entry cost of the record, its strings and the LRU slot
+    entry_overhead = 256
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, int, CachedShortURL]] = (
+            OrderedDict()
+        )
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, code: str) -> CachedShortURL | None:
+        with self.lock:
+            entry = self.entries.get(code)
+
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._pop(code)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(code)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, short_url: CachedShortURL):
+        expires_in = self.ttl
+        if short_url.expires_at is not None:
+            expires_in = min(expires_in, short_url.expires_at - time.time())
+
+        if expires_in <= 0:
+            return
+
+        code = short_url.short_code
+        size = (
+            len(code.encode()) + len(short_url.destination_url.encode())
+        ) + self.entry_overhead
+
+        with self.lock:
+            self._pop(code)
+            self.entries[code] = (time.monotonic() + expires_in, size, short_url)
+            self.size += size
+
+            while self.entries and (
+                len(self.entries) > self.max_entries or self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self.entries)))
 
-        short_url = ShortURL(
-            user=User.objects.only("is_guest_user").filter(pk=doc.user_id).first(),
-            destination_url=doc.url,
-            short_code=doc.code,
-            created_at=make_aware(created_at),
+    def delete(self, code: str):
+        with self.lock:
+            self._pop(code)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, code: str):
+        entry = self.entries.pop(code, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+class CircuitOpenError(RedisError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops sending commands to Redis once it looks unhealthy, so callers can fall
+    back to the database instead of waiting on timeouts.
+
+    The circuit opens after `failure_threshold` consecutive errors or calls that
+    took longer than `latency_budget` seconds. While open, calls fail straight
+    away with CircuitOpenError and a background thread runs `probe` every
+    `recovery_interval` seconds, closing the circuit once it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(
+        self,
+        probe: Callable[[], object],
+        failure_threshold: int,
+        latency_budget: float,
+        recovery_interval: float,
+    ):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.latency_budget = latency_budget
+        self.recovery_interval = recovery_interval
+        self.state = self.CLOSED
+        self.failures = 0
+        self.transitions: dict[str, int] = {}
+        self.prober_pid: int | None = None
+        self.lock = threading.Lock()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        self._check_open()
+
+        started_at = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except RedisError:
+            self._record_failure()
+            raise
+
+        self._record_latency(time.perf_counter() - started_at)
+        return result
+
+    async def acall(self, fn: Callable[..., Awaitable], *args, **kwargs):
+        self._check_open()
+
+        started_at = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except RedisError:
+            self._record_failure()
+            raise
+
+        self._record_latency(time.perf_counter() - started_at)
+        return result
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "transitions": dict(self.transitions),
+        }
+
+    def _check_open(self):
+        if self.state != self.OPEN:
+            return
+
+        # A forked worker inherits the open state but not the probing thread
+        if self.prober_pid != os.getpid():
+            with self.lock:
+                self._start_prober()
+
+        raise CircuitOpenError("Redis circuit breaker is open")
+
+    def _record_latency(self, elapsed: float):
+        if elapsed > self.latency_budget:
+            self._record_failure()
+        elif self.failures:
+            with self.lock:
+                self.failures = 0
+
+    def _record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+                self._start_prober()
+
+    def _transition(self, state: str):
+        name = f"{self.state}_to_{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        logger.warning(f"Redis circuit breaker {self.state} -> {state}")
+        self.state = state
+
+    def _start_prober(self):
+        if self.prober_pid == os.getpid():
+            return
+
+        self.prober_pid = os.getpid()
+        threading.Thread(
+            target=self._probe, name="redis-circuit-probe", daemon=True
+        ).start()
+
+    def _probe(self):
+        while True:
+            time.sleep(self.recovery_interval)
+            try:
+                self.probe()
+            except RedisError:
+                continue
+
+            with self.lock:
+                self.failures = 0
+                self._transition(self.CLOSED)
+                self.prober_pid = None
+            return
+
+
+class TieredShortURLCache:
+    """
+    Reads short URLs from the in-process tier first and falls back to Redis.
+
+    Invalidations are published on a Redis channel; every process listens on it
+    from a background thread and drops the code from its own in-process tier.
+
+    Redis calls go through a circuit breaker. Reads that fail are treated as
+    misses and failed writes are skipped, so redirects keep working from the
+    database while Redis is slow or down.
+    """
+
+    invalidation_channel = "shorturl:invalidate"
+
+    # Single-flight settings for rebuilding missing entries, in seconds
+    lock_timeout = 5
+    lock_wait = 0.5
+    lock_poll_interval = 0.02
+
+    def __init__(
+        self,
+        local: LocalShortURLCache,
+        remote: ShortURLCache,
+        code_filter: ShortCodeFilter,
+        breaker: CircuitBreaker,
+    ):
+        self.local = local
+        self.remote = remote
+        self.code_filter = code_filter
+        self.breaker = breaker
+        self.listener_pid: int | None = None
+        self.listener_lock = threading.Lock()
+
+    @staticmethod
+    def from_settings(
+        local_config_key: str | None = None, breaker_config_key: str | None = None
+    ) -> "TieredShortURLCache":
+        local_config = getattr(settings, local_config_key or "SHORTURL_LOCAL_CACHE")
+        breaker_config = getattr(
+            settings, breaker_config_key or "SHORTURL_CIRCUIT_BREAKER"
+        )
+        connection = RedisConnectionFactory.get()
+        return TieredShortURLCache(
+            LocalShortURLCache(**local_config),
+            ShortURLCache(connection),
+            ShortCodeFilter.from_settings(connection),
+            CircuitBreaker(connection.ping, **breaker_config),
+        )
+
+    def _call(self, fn: Callable, *args, default=None):
+        try:
+            return self.breaker.call(fn, *args)
+        except RedisError as err:
+            logger.debug(f"Redis unavailable, skipping {fn.__name__}: {err}")
+            return default
+
+    def get(self, code: str) -> CachedShortURL | None:
+        self.start_listener()
+
+        short_url = self.local.get(code)
+        if short_url is not None:
+            return short_url
+
+        short_url = self._call(self.remote.get, code)
+        if short_url is not None:
+            self.local.set(short_url)
+
+        return short_url
+
+    def set(self, short_url: ShortURL):
+        self._call(self.remote.set, short_url)
+        self.local.set(CachedShortURL.from_shorturl(short_url))
+
+    def preload(self, limit: int, batch_size: int = 1000) -> int:
+        """
+        Fills the in-process tier with up to `limit` of the hottest links when a
+        worker boots. They're read from the ranking and entries the
+        warm_shorturl_cache command writes to Redis, so booting workers don't
+        query the database. Returns how many entries were loaded.
+        """
+
+        # Starting the listener clears the tier, so it must happen first
+        self.start_listener()
+
+        codes = self.remote.hottest(limit)
+        count = 0
+        for start in range(0, len(codes), batch_size):
+            short_urls = self.remote.get_many(codes[start : start + batch_size])
+            for short_url in short_urls.values():
+                self.local.set(short_url)
+                count += 1
+        return count
+
+    def load(
+        self, code: str, loader: Callable[[str], ShortURL | None]
+    ) -> CachedShortURL | None:
+        """
+        Rebuilds a missing entry with `loader`, typically a database query.
+
+        Only the worker holding the per-code lock runs the loader; concurrent
+        misses wait for it to fill the cache and only run the loader themselves
+        if that takes longer than `lock_wait`, or if Redis is unavailable.
+        """
+
+        token = uuid4().hex
+        acquired = self._call(
+            self.remote.acquire_lock, code, token, self.lock_timeout, default=None
         )
 
+        if acquired is None:
+            short_url = loader(code)
+            return CachedShortURL.from_shorturl(short_url) if short_url else None
+
+        if acquired:
+            try:
+                return self._fill(code, loader)
+            finally:
+                self._call(self.remote.release_lock, code, token)
+
+        deadline = time.monotonic() + self.lock_wait
+        while (
+            time.monotonic() < deadline and self.breaker.state == CircuitBreaker.CLOSED
+        ):
+            time.sleep(self.lock_poll_interval)
+
+            short_url = self.get(code)
+            if short_url is not None:
+                return short_url
+
+            if self.is_missing(code):
+                return None
+
+        logger.warning(f"Timed out waiting for the cache entry of {code}")
+        return self._fill(code, loader)
+
+    def _fill(
+        self, code: str, loader: Callable[[str], ShortURL | None]
+    ) -> CachedShortURL | None:
+        short_url = loader(code)
+
+        if short_url is None or short_url.is_expired():
+            self.set_missing(code)
+        else:
+            self.set(short_url)
+
+        return CachedShortURL.from_shorturl(short_url) if short_url else None
+
+    def is_missing(self, code: str) -> bool:
+        return self._call(self.code_filter.is_missing, code, default=False)
+
+    def set_missing(self, code: str):
+        self._call(self.code_filter.set_missing, code)
+
+    def invalidate(self, code: str):
+        """
+        Removes the code from Redis and from the in-process tier of every worker.
+        Unlike reads, this bypasses the circuit breaker and raises if Redis can't
+        be reached, since the entry would otherwise be left stale.
+        """
+
+        self.local.delete(code)
+        self.remote.delete(code)
+        self.remote.connection.publish(self.invalidation_channel, code)
+
+    def stats(self) -> dict[str, dict[str, object]]:
+        return {
+            "local": {
+                "hits": self.local.hits,
+                "misses": self.local.misses,
+                "entries": len(self.local.entries),
+                "bytes": self.local.size,
+            },
+            "redis": {
+                "hits": self.remote.hits,
+                "misses": self.remote.misses,
+            },
+            "circuit_breaker": self.breaker.stats(),
+        }
+
+    @property
+    def listening(self) -> bool:
+        return self.listener_pid == os.getpid()
+
+    def start_listener(self):
+        """
+        Starts the invalidation listener once per process. The PID is checked so
+        forked workers start their own thread instead of relying on the parent's.
+        """
+
+        if self.listening:
+            return
+
+        with self.listener_lock:
+            if self.listening:
+                return
+
+            self.local.clear()
+            try:
+                pubsub = self._subscribe()
+            except RedisError:
+                logger.warning("Could not subscribe to ShortURL invalidations")
+                pubsub = None
+
+            listener = threading.Thread(
+                target=self._listen,
+                args=(pubsub,),
+                name="shorturl-invalidation",
+                daemon=True,
+            )
+            listener.start()
+            self.listener_pid = os.getpid()
+
+    def _subscribe(self):
+        pubsub = self.remote.connection.pubsub()
+        pubsub.subscribe(self.invalidation_channel)
+        # Wait for the confirmation so invalidations published from now on are seen
+        pubsub.get_message(timeout=1.0)
+        return pubsub
+
+    def _listen(self, pubsub):
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._subscribe()
+                while True:
+                    # Polling with a timeout, rather than blocking on listen(),
+                    # keeps the pool's socket timeout from dropping an idle
+                    # subscription and lets health checks run.
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None and message["type"] == "message":
+                        self.local.delete(message["data"].decode())
+            except RedisError:
+                logger.warning("ShortURL invalidation listener disconnected")
+
+            # Invalidations may have been missed while disconnected
+            pubsub = None
+            self.local.clear()
+            time.sleep(1)
+
+
+class AsyncShortURLCache:
+    """
+    Counterpart of TieredShortURLCache for the async redirect view. It shares the
+    in-process tier, keys, entry format and circuit breaker of the wrapped cache
+    and does its Redis I/O on redis.asyncio.
+    """
+
+    def __init__(self, cache: TieredShortURLCache):
+        self.cache = cache
+
+    @property
+    def connection(self) -> AsyncRedis:
+        return AsyncRedisConnectionFactory.get()
+
+    async def _call(self, fn: Callable[..., Awaitable], *args, default=None, **kwargs):
+        try:
+            return await self.cache.breaker.acall(fn, *args, **kwargs)
+        except RedisError as err:
+            logger.debug(f"Redis unavailable, skipping {fn.__name__}: {err}")
+            return default
+
+    async def get(self, code: str) -> CachedShortURL | None:
+        if not self.cache.listening:
+            # Workers normally subscribe at boot. Subscribing blocks on Redis,
+            # so a process that hasn't yet does it off the event loop.
+            await sync_to_async(self.cache.start_listener, thread_sensitive=False)()
+
+        short_url = self.cache.local.get(code)
+        if short_url is not None:
+            return short_url
+
+        remote = self.cache.remote
+        data = await self._call(self.connection.hgetall, remote._key(code))
+        if data is None:
+            return None
+
+        short_url = remote._from_hash(data)
+        if short_url is not None:
+            self.cache.local.set(short_url)
+
         return short_url
+
+    async def set(self, short_url: ShortURL):
+        pipeline = self.connection.pipeline()
+        self.cache.remote._queue_set(pipeline, short_url)
+        await self._call(pipeline.execute)
+        self.cache.local.set(CachedShortURL.from_shorturl(short_url))
+
+    async def is_missing(self, code: str) -> bool:
+        code_filter = self.cache.code_filter
+        pipeline = self.connection.pipeline(transaction=False)
+        code_filter._queue_is_missing(pipeline, code)
+        results = await self._call(pipeline.execute)
+        return results is not None and code_filter._parse_is_missing(results)
+
+    async def set_missing(self, code: str):
+        code_filter = self.cache.code_filter
+        await self._call(
+            self.connection.set,
+            code_filter._missing_key(code),
+            1,
+            ex=code_filter.negative_ttl,
+        )
+
+    async def load(
+        self, code: str, loader: Callable[[str], Awaitable[ShortURL | None]]
+    ) -> CachedShortURL | None:
+        """
+        Same single-flight rebuild as TieredShortURLCache.load, waiting without
+        blocking the event loop.
+        """
+
+        lock_key = self.cache.remote._lock_key(code)
+        token = uuid4().hex
+        acquired = await self._call(
+            self.connection.set,
+            lock_key,
+            token,
+            nx=True,
+            px=int(self.cache.lock_timeout * 1000),
+            default=False,
+        )
+
+        if acquired is False:
+            short_url = await loader(code)
+            return CachedShortURL.from_shorturl(short_url) if short_url else None
+
+        if acquired:
+            try:
+                return await self._fill(code, loader)
+            finally:
+                await self._call(
+                    self.connection.eval,
+                    ShortURLCache.release_lock_script_source,
+                    1,
+                    lock_key,
+                    token,
+                )
+
+        deadline = time.monotonic() + self.cache.lock_wait
+        while (
+            time.monotonic() < deadline
+            and self.cache.breaker.state == CircuitBreaker.CLOSED
+        ):
+            await asyncio.sleep(self.cache.lock_poll_interval)
+
+            short_url = await self.get(code)
+            if short_url is not None:
+                return short_url
+
+            if await self.is_missing(code):
+                return None
+
+        logger.warning(f"Timed out waiting for the cache entry of {code}")
+        return await self._fill(code, loader)
+
+    async def _fill(
+        self, code: str, loader: Callable[[str], Awaitable[ShortURL | None]]
+    ) -> CachedShortURL | None:
+        short_url = await loader(code)
+
+        if short_url is None or short_url.is_expired():
+            await self.set_missing(code)
+        else:
+            await self.set(short_url)
+
+        return CachedShortURL.from_shorturl(short_url) if short_url else None
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from smllr.fingerprint.models import Fingerprint
+from smllr.fingerprint.models import Fingerprint, ReferrerDomain, UserAgent
 
 
 admin.site.register(Fingerprint)
+admin.site.register(UserAgent)
+admin.site.register(ReferrerDomain)
@@ -0,0 +1,383 @@
+"""
+User agent classification.
+
+Gives the same browser, OS and device type httpagentparser's `detect` did, plus
+the device type checks the parser used to run on its result, without walking
+its detector classes one by one. Every string a rule looks for is compiled into
+one regex, built as a trie so each position of the user agent is checked
+against all of them at once. The rules then only look up the tokens found.
+
+As with httpagentparser, when several rules match the last one wins, so they're
+tried from the end of each table.
+"""
+
+import re
+
+from collections.abc import Callable
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class UserAgent(NamedTuple):
+    browser_name: str | None
+    browser_version: str | None
+    os: str | None
+    device_type: str | None
+
+
+Version = Callable[[str, str], str | None]
+
+
+def _markers(*markers: tuple[str, str]) -> Version:
+    """
+    Version found right after the matched word, between a start and an end
+    marker, e.g. "Firefox/127.0" with ("/", "").
+    """
+
+    def version(user_agent: str, word: str) -> str | None:
+        part = user_agent.split(word, 1)[-1]
+        for start, end in markers:
+            if part.startswith(start) and end in part:
+                found = part[1:]
+                if end:
+                    found = found.split(end)[0]
+                words = found.split()
+                found = words[0] if words else ""
+                return found or None
+        return None
+
+    return version
+
+
+def _no_version(user_agent: str, word: str) -> None:
+    return None
+
+
+def _opera(fallback_split: bool) -> Version:
+    def version(user_agent: str, word: str) -> str | None:
+        if "Version" in user_agent:
+            return user_agent.split("Version")[1][1:].split(" ")[0] or None
+        found = user_agent.split("Opera")[1][1:].split(" ")[0]
+        if fallback_split:
+            found = found.split("(")[0]
+        return found or None
+
+    return version
+
+
+def _trident(user_agent: str, word: str) -> str | None:
+    versions = {"4.0": "8.0", "5.0": "9.0", "6.0": "10.0", "7.0": "11.0"}
+    return versions.get(_markers(("/", ";"))(user_agent, word))
+
+
+def _chromium_edge(user_agent: str, word: str) -> str | None:
+    return user_agent.split("Edg/")[-1].strip() or None
+
+
+def _safari(user_agent: str, word: str) -> str | None:
+    if "Version/" in user_agent:
+        marker = "Version/"
+    elif "Safari/" in user_agent:
+        marker = "Safari/"
+    else:
+        marker = "Safari "
+    return user_agent.split(marker)[-1].split(" ")[0].strip() or None
+
+
+def _yandex_bot(user_agent: str, word: str) -> str | None:
+    found = user_agent[user_agent.index("Yandex") :].split("/")[-1]
+    return found.split(")")[0].strip() or None
+
+
+def _maui(user_agent: str, word: str) -> str | None:
+    return user_agent.split("Release/")[-1][:10] or None
+
+
+def _chrome(user_agent: str, word: str) -> str | None:
+    found = user_agent.split(f"{word}/")[-1].split(" ")[0]
+    return found.split("+")[0].strip() or None
+
+
+_default = _markers(("/", " "))
+
+
+class Rule(NamedTuple):
+    name: str
+    look_for: tuple[str, ...]
+    skip_if_found: tuple[str, ...] = ()
+    version: Version = _no_version
+
+
+OS_RULES = (
+    Rule("Linux", ("Linux",)),
+    Rule("Blackberry", ("BlackBerry",)),
+    Rule("Windows Phone", ("Windows Phone OS", "Windows Phone")),
+    Rule("iOS", ("iPhone", "iPad"), ("like iPhone",)),
+    Rule("Macintosh", ("Macintosh",)),
+    Rule("Windows", ("Windows",), ("Windows Phone",)),
+    Rule("ChromeOS", ("CrOS",)),
+    Rule("NokiaS40", ("Series40",)),
+    Rule("Symbian", ("Symbian", "SymbianOS")),
+    Rule("PlayStation", ("PlayStation", "PLAYSTATION")),
+)
+
+DIST_RULES = (
+    Rule("BlackberryPlaybook", ("PlayBook",)),
+    Rule("iPhone", ("iPhone",), ("like iPhone",)),
+    Rule("IPad", ("iPad;",)),
+    Rule("Ubuntu", ("Ubuntu",)),
+    Rule("Debian", ("Debian",)),
+    Rule("Android", ("Android",), ("Windows Phone",)),
+    Rule("WebOS", ("hpwOS",)),
+)
+
+BROWSER_RULES = (
+    Rule("Konqueror", ("Konqueror",), (), _markers(("/", ";"))),
+    Rule("Opera Mobile", ("Opera Mobi",), (), _opera(fallback_split=False)),
+    Rule("Opera", ("Opera",), ("Opera Mobi",), _opera(fallback_split=True)),
+    Rule("Opera", ("OPR",), ("Build/OPR",), _markers(("/", ""))),
+    Rule("Netscape", ("Netscape",), (), _markers(("/", ""))),
+    Rule("Microsoft Internet Explorer", ("Trident",), ("MSIE", "Opera"), _trident),
+    Rule("Microsoft Internet Explorer", ("MSIE",), ("Opera",), _markers((" ", ";"))),
+    Rule("MSEdge", ("Edge",), ("MSIE",), _markers(("/", ""))),
+    Rule("ChromiumEdge", ("Edg/",), (), _chromium_edge),
+    Rule("Galeon", ("Galeon",), (), _default),
+    Rule("WOSBrowser", ("wOSBrowser",)),
+    Rule(
+        "Safari",
+        ("Safari",),
+        ("Chrome", "OmniWeb", "wOSBrowser", "Android", "CriOS"),
+        _safari,
+    ),
+    Rule(
+        "GoogleBot",
+        (
+            "Googlebot",
+            "Mediapartners-Google",
+            "Mediapartners",
+            "AdsBot-Google",
+            "web/snippet",
+        ),
+        (),
+        _markers(("/", ";"), ("/", " ")),
+    ),
+    Rule("GoogleFeedFetcher", ("Feedfetcher-Google",)),
+    Rule("RunscopeRadar", ("runscope-radar",), (), _default),
+    Rule("GoogleAppEngine", ("AppEngine-Google",)),
+    Rule("GoogleApps", ("GoogleApps script",)),
+    Rule("TwitterBot", ("Twitterbot",), (), _default),
+    Rule("TelegramBot", ("TelegramBot",), (), _default),
+    Rule("MJ12Bot", ("MJ12bot",), (), _default),
+    Rule("YandexBot", ("Yandex",), (), _yandex_bot),
+    Rule("BingBot", ("bingbot",), (), _markers(("/", ";"))),
+    Rule("BaiduBot", ("Baiduspider",), (), _markers(("/", ";"))),
+    Rule("LinkedInBot", ("LinkedInBot",), (), _default),
+    Rule("ArchiveDotOrgBot", ("archive.org_bot",), (), _default),
+    Rule("YoudaoBot", ("YoudaoBot",), (), _default),
+    Rule("YoudaoBotImage", ("YodaoBot-Image",), (), _default),
+    Rule("RogerBot", ("rogerbot",), (), _default),
+    Rule("TweetmemeBot", ("TweetmemeBot",), (), _default),
+    Rule("WebshotBot", ("WebshotBot",), (), _default),
+    Rule("SensikaBot", ("SensikaBot",), (), _default),
+    Rule("YesupBot", ("YesupBot",), (), _default),
+    Rule("DotBot", ("DotBot",), (), _default),
+    Rule("PhantomJS", ("Browser/Phantom",), (), _default),
+    Rule("FacebookExternalHit", ("facebookexternalhit",), (), _default),
+    Rule("NokiaOvi", ("S40OviBrowser",), (), _default),
+    Rule("UCBrowser", ("UCBrowser",), (), _default),
+    Rule("BrowserNG", ("BrowserNG",), (), _default),
+    Rule("Dolfin", ("Dolfin",), (), _default),
+    Rule("NetFront", ("NetFront",), (), _default),
+    Rule("Jasmine", ("Jasmine",), (), _default),
+    Rule("Openwave", ("Openwave",), (), _default),
+    Rule("UPBrowser", ("UP.Browser",), (), _default),
+    Rule("OneBrowser", ("OneBrowser",), (), _default),
+    Rule("ObigoInternetBrowser", ("ObigoInternetBrowser",), (), _default),
+    Rule("TelecaBrowser", ("TelecaBrowser",), (), _default),
+    Rule("MAUI", ("Browser/MAUI",), (), _maui),
+    Rule("NintendoBrowser", ("NintendoBrowser",), (), _default),
+    Rule(
+        "AndroidBrowser", ("Android",), ("Chrome", "Windows Phone", "Opera", "Firefox")
+    ),
+    Rule(
+        "Firefox",
+        ("Firefox", "FxiOS"),
+        ("SeaMonkey", "web/snippet"),
+        _markers(("/", "")),
+    ),
+    Rule("SeaMonkey", ("SeaMonkey",), (), _markers(("/", ""))),
+    Rule("Chrome", ("Chrome",), (" OPR", "Edge", "YaBrowser", "Edg/"), _chrome),
+    Rule("Yandex.Browser", ("YaBrowser",), (), _chrome),
+    Rule("ChromeiOS", ("CriOS",), (), _markers(("/", " "))),
+)
+
+# Operating systems that mark the user agent as a desktop when no mobile
+# distribution matched. Mac OS only counts when it isn't an iPhone or iPad.
+DESKTOP_TOKENS = frozenset(
+    (
+        "Linux",
+        "BlackBerry",
+        "Windows",
+        "Series40",
+        "Symbian",
+        "PlayStation",
+        "PLAYSTATION",
+    )
+)
+
+DEVICE_TYPES = {"iPhone": "Mobile", "IPad": "Tablet", "Android": "Mobile"}
+
+
+def _trie_pattern(words: set[str]) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def pattern(node: dict) -> str:
+        branches = [
+            re.escape(char) + pattern(node[char]) for char in sorted(node) if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        # The longest word wins, the others it contains are added by CONTAINED
+        return f"(?:{'|'.join(branches)}){'?' if '' in node else ''}"
+
+    return pattern(trie)
+
+
+TOKENS = (
+    {
+        word
+        for rules in (OS_RULES, DIST_RULES, BROWSER_RULES)
+        for rule in rules
+        for word in (*rule.look_for, *rule.skip_if_found)
+    }
+    | DESKTOP_TOKENS
+    | {"Mac OS", "CrOS"}
+)
+
+TOKEN_PATTERN = re.compile(_trie_pattern(TOKENS))
+
+# Every token found also means the tokens it contains
+CONTAINED = {
+    token: frozenset(word for word in TOKENS if word in token) for token in TOKENS
+}
+
+# Tokens that can start inside another and run past its end, like "iPhone" in
+# "SafariPhone", with the string the two make together. Matches don't overlap,
+# so these are looked for separately whenever the first token is found.
+OVERLAPS = {
+    token: overlaps
+    for token in TOKENS
+    if (
+        overlaps := tuple(
+            (token[:offset] + word, word)
+            for offset in range(1, len(token))
+            for word in TOKENS
+            if word.startswith(token[offset:]) and word not in token
+        )
+    )
+}
+
+
+def find_tokens(user_agent: str) -> set[str]:
+    tokens = set()
+    for token in TOKEN_PATTERN.findall(user_agent):
+        tokens |= CONTAINED[token]
+        for overlap, word in OVERLAPS.get(token, ()):
+            if overlap in user_agent:
+                tokens |= CONTAINED[word]
+    return tokens
+
+
+class RuleTable:
+    """
+    Rules of one kind, indexed by the tokens they look for so matching only
+    visits the rules a user agent can match.
+    """
+
+    def __init__(self, rules: tuple[Rule, ...]):
+        self.rules = rules
+        self.index: dict[str, list[int]] = {}
+        for position, rule in enumerate(rules):
+            for word in rule.look_for:
+                self.index.setdefault(word, []).append(position)
+        self.words = frozenset(self.index)
+
+    def match(self, tokens: frozenset[str]) -> tuple[Rule, str] | None:
+        """
+        Returns the last matching rule and the word it matched on.
+        """
+
+        words = self.words & tokens
+        if not words:
+            return None
+
+        candidates = [position for word in words for position in self.index[word]]
+        if len(candidates) > 1:
+            candidates.sort(reverse=True)
+        for position in candidates:
+            rule = self.rules[position]
+            if tokens.isdisjoint(rule.skip_if_found):
+                for word in rule.look_for:
+                    if word in tokens:
+                        return rule, word
+        return None
+
+
+OS_TABLE = RuleTable(OS_RULES)
+DIST_TABLE = RuleTable(DIST_RULES)
+BROWSER_TABLE = RuleTable(BROWSER_RULES)
+
+
+def _is_desktop(user_agent: str, tokens: frozenset[str]) -> bool:
+    if not tokens.isdisjoint(DESKTOP_TOKENS):
+        return True
+    if "Mac OS" in tokens and "iPhone" not in tokens and "iPad" not in tokens:
+        return True
+    if "CrOS" in tokens:
+        # httpagentparser only records the platform when it can find a version
+        marker = "+" if "CrOS+" in user_agent else " "
+        return len(user_agent.split(f"CrOS{marker}")[-1].split(marker)) > 1
+    return False
+
+
+@lru_cache(maxsize=1024)
+def match_rules(
+    tokens: frozenset[str],
+) -> tuple[Rule | None, Rule | None, tuple[Rule, str] | None]:
+    """
+    Returns the OS, distribution and browser rules, plus the word the browser
+    rule matched on. They only depend on the tokens found, and far fewer token
+    combinations than user agents turn up, so results are cached.
+    """
+
+    os = OS_TABLE.match(tokens)
+    dist = DIST_TABLE.match(tokens)
+    return os and os[0], dist and dist[0], BROWSER_TABLE.match(tokens)
+
+
+def classify_user_agent(user_agent: str) -> UserAgent:
+    tokens = frozenset(find_tokens(user_agent))
+    os, dist, browser = match_rules(tokens)
+
+    if dist:
+        device_type = DEVICE_TYPES.get(dist.name, dist.name)
+    elif _is_desktop(user_agent, tokens):
+        device_type = "Desktop"
+    else:
+        device_type = None
+
+    browser_name = browser_version = None
+    if browser:
+        rule, word = browser
+        browser_name = rule.name
+        browser_version = rule.version(user_agent, word)
+
+    # Positional, building named tuples from keywords is markedly slower
+    return UserAgent(browser_name, browser_version, os and os.name, device_type)
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+from django.conf import settings
+from django.db import models, transaction
+
+from smllr.fingerprint.models import ReferrerDomain, UserAgent
+
+
+class DimensionCache:
+    """
+    Ids of dimension rows, like user agents and referrer domains, by the unique
+    field they're looked up with. Ingestion sees the same handful of values
+    over and over, so it only queries for the ones this process hasn't seen.
+
+    Dimension rows are never updated or deleted, so cached ids don't go stale.
+    Ids are only cached once the transaction that read or inserted them
+    commits, so a rollback can't leave ids of rows that don't exist behind.
+    The least recently used ids are evicted past `max_entries`.
+    """
+
+    def __init__(self, model: type[models.Model], key: str, max_entries: int):
+        self.model = model
+        self.key = key
+        self.max_entries = max_entries
+        self.ids: OrderedDict[str, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, rows: Iterable[models.Model]):
+        """
+        Sets the primary key of unsaved rows to that of the row with the same
+        key, inserting the ones that don't exist yet.
+        """
+
+        rows_by_key: dict[str, list[models.Model]] = {}
+        for row in rows:
+            rows_by_key.setdefault(getattr(row, self.key), []).append(row)
+
+        ids = {}
+        for key in rows_by_key:
+            if (pk := self.ids.get(key)) is not None:
+                self.ids.move_to_end(key)
+                ids[key] = pk
+
+        missing = rows_by_key.keys() - ids.keys()
+        self.hits += len(ids)
+        self.misses += len(missing)
+
+        if missing:
+            found = self._fetch(missing)
+            new = missing - found.keys()
+            if new:
+                self.model.objects.bulk_create(
+                    [rows_by_key[key][0] for key in new], ignore_conflicts=True
+                )
+                found.update(self._fetch(new))
+            ids.update(found)
+            transaction.on_commit(lambda: self._store(found))
+
+        for key, key_rows in rows_by_key.items():
+            for row in key_rows:
+                row.pk = ids[key]
+
+    def _fetch(self, keys: set[str]) -> dict[str, int]:
+        return dict(
+            self.model.objects.filter(**{f"{self.key}__in": keys}).values_list(
+                self.key, "pk"
+            )
+        )
+
+    def _store(self, ids: dict[str, int]):
+        self.ids.update(ids)
+        while len(self.ids) > self.max_entries:
+            self.ids.popitem(last=False)
+
+    def clear(self):
+        self.ids.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.ids),
+            "max_entries": self.max_entries,
+        }
+
+
+user_agent_ids = DimensionCache(
+    UserAgent, "hash", settings.FINGERPRINT_DIMENSION_CACHE_SIZE
+)
+referrer_domain_ids = DimensionCache(
+    ReferrerDomain, "domain", settings.FINGERPRINT_DIMENSION_CACHE_SIZE
+)
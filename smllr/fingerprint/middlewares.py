@@ -1,29 +1,86 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
 
-from smllr.fingerprint.models import Fingerprint
-from smllr.fingerprint.parser import HttpRequestFingerprintParser
+from smllr.fingerprint.models import (
+    Browser,
+    DeviceType,
+    Fingerprint,
+    OperatingSystem,
+    ReferrerDomain,
+    UserAgent,
+)
+from smllr.fingerprint.parser import HttpRequestFingerprintParser, parse_user_agent
+
+
+def get_request_fingerprint(request: HttpRequest) -> Fingerprint:
+    """
+    Builds an unsaved fingerprint from the request headers.
+    """
+
+    return build_fingerprint(*HttpRequestFingerprintParser(request).get_headers())
+
+
+def build_fingerprint(ip_address: str, user_agent: str, referrer: str) -> Fingerprint:
+    """
+    Builds an unsaved fingerprint from raw header values, e.g. ones recorded
+    with a click and parsed later by the worker saving it. Its user agent and
+    referrer domain are unsaved too, until their ids are resolved. Every value
+    is cut to fit its column, however long the header it came from.
+    """
+
+    ip_address, user_agent, referrer = headers = Fingerprint.normalise(
+        ip_address, user_agent, referrer
+    )
+    parsed = parse_user_agent(user_agent)
+    domain = ReferrerDomain.parse(referrer) if referrer else None
+    return Fingerprint(
+        hash=Fingerprint.make_hash(*headers),
+        ip_address=ip_address,
+        user_agent=UserAgent(
+            hash=UserAgent.make_hash(user_agent),
+            user_agent=user_agent,
+            browser_version=(parsed.browser_version or "")[:100],
+        ),
+        referrer_domain=ReferrerDomain(domain=domain) if domain else None,
+        device_type=DeviceType.from_name(parsed.device_type),
+        browser=Browser.from_name(parsed.browser_name),
+        os=OperatingSystem.from_name(parsed.os),
+    )
 
 
 class RequestFingerprintMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request: HttpRequest):
         """
-        Middleware to get request fingerprint and attach it to the request object.
+        Middleware to attach the request fingerprint to the request object.
+
+        The fingerprint is lazy: the user agent is only parsed when a view
+        reads it, so static files, the admin and the API don't pay for it.
         """
 
-        parser = HttpRequestFingerprintParser(request)
-        fingerprint = parser.parse()
-        request.fingerprint = Fingerprint(
-            ip_address=fingerprint.get("ip_address", ""),
-            user_agent=fingerprint.get("user_agent", ""),
-            device_type=fingerprint.get("device_type", ""),
-            referrer=fingerprint.get("referrer", ""),
-            browser_name=fingerprint.get("browser_name", ""),
-            browser_version=fingerprint.get("browser_version", ""),
-            os=fingerprint.get("os", ""),
-            fingerprint_data=fingerprint,
-        )
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        self.set_fingerprint(request)
 
         return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest):
+        self.set_fingerprint(request)
+
+        return await self.get_response(request)
+
+    @staticmethod
+    def set_fingerprint(request: HttpRequest):
+        # Only the headers are kept, so the request isn't part of a reference
+        # cycle and is freed as soon as the response is sent
+        headers = HttpRequestFingerprintParser(request).get_headers()
+        request.fingerprint = SimpleLazyObject(lambda: build_fingerprint(*headers))
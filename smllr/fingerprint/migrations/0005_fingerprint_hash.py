@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0004_alter_fingerprint_user_agent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fingerprint",
+            name="hash",
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
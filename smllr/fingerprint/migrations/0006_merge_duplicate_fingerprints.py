@@ -0,0 +1,135 @@
+import hashlib
+
+from django.db import migrations, models, transaction
+from django.db.models import Case, Min, Value, When
+
+
+BATCH_SIZE = 1000
+
+
+# Copies of Fingerprint.normalise and Fingerprint.make_hash as they were when
+# this migration was written, so later changes to them don't change its result
+def normalise(ip_address, user_agent, referrer):
+    return (
+        (ip_address or "").strip().lower()[:45],
+        " ".join((user_agent or "").split())[:512],
+        (referrer or "").strip()[:512],
+    )
+
+
+def make_hash(ip_address, user_agent, referrer):
+    return hashlib.sha256(
+        "\x1f".join((ip_address, user_agent, referrer)).encode()
+    ).hexdigest()
+
+
+def get_header(fingerprint, field):
+    """
+    Fingerprints saved before their columns existed only have the value in
+    fingerprint_data, like the backfill in 0008 reads it.
+    """
+
+    value = getattr(fingerprint, field)
+    if value is None and isinstance(fingerprint.fingerprint_data, dict):
+        value = fingerprint.fingerprint_data.get(field)
+    return None if value is None else str(value)
+
+
+def pk_ranges(Fingerprint):
+    last_pk = Fingerprint.objects.order_by("-pk").values_list("pk", flat=True).first()
+    for start in range(0, (last_pk or 0) + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def hash_fingerprints(Fingerprint):
+    for start, end in pk_ranges(Fingerprint):
+        batch = list(
+            Fingerprint.objects.filter(
+                hash__isnull=True, pk__gte=start, pk__lt=end
+            ).only("pk", "ip_address", "user_agent", "referrer", "fingerprint_data")
+        )
+        for fingerprint in batch:
+            fingerprint.hash = make_hash(
+                *normalise(
+                    get_header(fingerprint, "ip_address"),
+                    get_header(fingerprint, "user_agent"),
+                    get_header(fingerprint, "referrer"),
+                )
+            )
+        Fingerprint.objects.bulk_update(batch, ["hash"])
+
+
+def merge_duplicates(Fingerprint, ShortURLClick):
+    """
+    Points the clicks of every duplicate at the oldest fingerprint with the
+    same hash and deletes the duplicates, a primary key range at a time.
+    """
+
+    for start, end in pk_ranges(Fingerprint):
+        hashes = dict(
+            Fingerprint.objects.filter(pk__gte=start, pk__lt=end).values_list(
+                "pk", "hash"
+            )
+        )
+        kept = dict(
+            Fingerprint.objects.filter(hash__in=set(hashes.values()))
+            .values("hash")
+            .annotate(keep=Min("pk"))
+            .values_list("hash", "keep")
+        )
+        merged = {
+            pk: kept[fingerprint_hash]
+            for pk, fingerprint_hash in hashes.items()
+            if pk != kept[fingerprint_hash]
+        }
+        if not merged:
+            continue
+
+        with transaction.atomic():
+            ShortURLClick.objects.filter(fingerprint_id__in=merged).update(
+                fingerprint_id=Case(
+                    *[
+                        When(fingerprint_id=pk, then=Value(keep))
+                        for pk, keep in merged.items()
+                    ]
+                )
+            )
+            Fingerprint.objects.filter(pk__in=merged).delete()
+
+
+def migrate(apps, schema_editor):
+    """
+    Hashes and merges fingerprints by primary key range, one short transaction
+    per batch, so the table is never locked for long. Both steps skip the work
+    already done, so a migration that stopped half way can be run again.
+    """
+
+    Fingerprint = apps.get_model("fingerprint", "Fingerprint")
+    ShortURLClick = apps.get_model("shorturls", "ShortURLClick")
+
+    hash_fingerprints(Fingerprint)
+    merge_duplicates(Fingerprint, ShortURLClick)
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own instead of in one migration-wide transaction
+    atomic = False
+
+    dependencies = [
+        ("fingerprint", "0005_fingerprint_hash"),
+        ("shorturls", "0008_alter_shorturlclick_clicked_at"),
+    ]
+
+    operations = [
+        # Lets each batch find the oldest fingerprint with its hashes without
+        # scanning the table. 0007 replaces it with the unique index.
+        migrations.AddIndex(
+            model_name="fingerprint",
+            index=models.Index(fields=["hash"], name="fingerprint_merge_hash_idx"),
+        ),
+        # Merged fingerprints can't be split again, so there's nothing to undo
+        migrations.RunPython(migrate, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="fingerprint", name="fingerprint_merge_hash_idx"
+        ),
+    ]
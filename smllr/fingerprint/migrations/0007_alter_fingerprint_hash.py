@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0006_merge_duplicate_fingerprints"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="fingerprint",
+            name="hash",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
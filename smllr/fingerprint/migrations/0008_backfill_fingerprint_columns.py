@@ -0,0 +1,59 @@
+from django.db import migrations
+from django.db.models import Q
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Coalesce, Left
+
+
+BATCH_SIZE = 10000
+
+COLUMNS = {
+    "ip_address": 45,
+    "user_agent": 512,
+    "device_type": 100,
+    "referrer": 512,
+    "browser_name": 100,
+    "browser_version": 100,
+    "os": 100,
+}
+
+
+def backfill(apps, schema_editor):
+    """
+    Copies values only fingerprint_data has into their columns, for rows saved
+    before the columns existed. Rows are updated by primary key range, one
+    short transaction per batch, so the table is never locked for long.
+    """
+
+    Fingerprint = apps.get_model("fingerprint", "Fingerprint")
+
+    missing = Q()
+    for column in COLUMNS:
+        missing |= Q(**{f"{column}__isnull": True})
+
+    last_pk = Fingerprint.objects.order_by("-pk").values_list("pk", flat=True).first()
+    for start in range(0, (last_pk or 0) + 1, BATCH_SIZE):
+        Fingerprint.objects.filter(
+            missing, pk__gte=start, pk__lt=start + BATCH_SIZE
+        ).update(
+            **{
+                column: Coalesce(
+                    column,
+                    Left(KeyTextTransform(column, "fingerprint_data"), max_length),
+                )
+                for column, max_length in COLUMNS.items()
+            }
+        )
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own instead of in one migration-wide transaction
+    atomic = False
+
+    dependencies = [
+        ("fingerprint", "0007_alter_fingerprint_hash"),
+    ]
+
+    operations = [
+        # The JSON is still there to read until the next migration drops it
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0008_backfill_fingerprint_columns"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="fingerprint",
+            name="fingerprint_data",
+        ),
+    ]
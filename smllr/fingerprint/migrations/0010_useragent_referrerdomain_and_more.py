@@ -0,0 +1,82 @@
+import django.db.models.deletion
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0009_remove_fingerprint_fingerprint_data"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferrerDomain",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("domain", models.CharField(max_length=253, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserAgent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hash", models.CharField(max_length=64, unique=True)),
+                ("user_agent", models.CharField(max_length=512)),
+                ("browser_version", models.CharField(blank=True, max_length=100)),
+            ],
+        ),
+        # Added next to the columns they replace, which are backfilled from
+        # and then dropped by the next two migrations
+        migrations.AddField(
+            model_name="fingerprint",
+            name="user_agent_ref",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="fingerprints",
+                to="fingerprint.useragent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fingerprint",
+            name="referrer_domain",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="fingerprints",
+                to="fingerprint.referrerdomain",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fingerprint",
+            name="device_type_code",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="fingerprint",
+            name="browser",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="fingerprint",
+            name="os_code",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,121 @@
+import hashlib
+
+from django.db import migrations
+from urllib.parse import urlsplit
+
+# The enums only ever gain members, so their values are safe to use here
+from smllr.fingerprint.models import Browser, DeviceType, OperatingSystem
+
+
+BATCH_SIZE = 1000
+
+
+# Copies of the normalisation, UserAgent.make_hash and ReferrerDomain.parse as
+# they were when this migration was written
+def normalise(user_agent, referrer):
+    return " ".join((user_agent or "").split())[:512], (referrer or "").strip()[:512]
+
+
+def make_hash(user_agent):
+    return hashlib.sha256(user_agent.encode()).hexdigest()
+
+
+def parse_domain(referrer):
+    try:
+        domain = urlsplit(referrer).hostname
+    except ValueError:
+        domain = None
+    domain = domain or referrer.lower()
+    return domain.removeprefix("www.")[:253]
+
+
+def resolve(Model, key, rows):
+    """
+    Returns the ids of dimension rows by key, inserting the missing ones.
+    """
+
+    Model.objects.bulk_create(
+        [Model(**{key: value, **fields}) for value, fields in rows.items()],
+        ignore_conflicts=True,
+    )
+    return dict(Model.objects.filter(**{f"{key}__in": rows}).values_list(key, "pk"))
+
+
+def backfill(apps, schema_editor):
+    """
+    Points every fingerprint at its user agent and referrer domain rows and
+    stores its OS, browser and device type as enums. Fingerprints are updated
+    by primary key range, one short transaction per batch.
+    """
+
+    Fingerprint = apps.get_model("fingerprint", "Fingerprint")
+    UserAgent = apps.get_model("fingerprint", "UserAgent")
+    ReferrerDomain = apps.get_model("fingerprint", "ReferrerDomain")
+
+    pending = Fingerprint.objects.filter(user_agent_ref__isnull=True).only(
+        "pk",
+        "user_agent",
+        "referrer",
+        "os",
+        "browser_name",
+        "browser_version",
+        "device_type",
+    )
+
+    last_pk = 0
+    while batch := list(pending.filter(pk__gt=last_pk).order_by("pk")[:BATCH_SIZE]):
+        last_pk = batch[-1].pk
+
+        user_agents, domains, keys = {}, {}, {}
+        for fingerprint in batch:
+            user_agent, referrer = normalise(
+                fingerprint.user_agent, fingerprint.referrer
+            )
+            user_agent_hash = make_hash(user_agent)
+            domain = parse_domain(referrer) if referrer else None
+            keys[fingerprint.pk] = user_agent_hash, domain
+
+            user_agents.setdefault(
+                user_agent_hash,
+                {
+                    "user_agent": user_agent,
+                    "browser_version": (fingerprint.browser_version or "")[:100],
+                },
+            )
+            if domain:
+                domains[domain] = {}
+
+        user_agent_ids = resolve(UserAgent, "hash", user_agents)
+        domain_ids = resolve(ReferrerDomain, "domain", domains)
+
+        for fingerprint in batch:
+            user_agent_hash, domain = keys[fingerprint.pk]
+            fingerprint.user_agent_ref_id = user_agent_ids[user_agent_hash]
+            fingerprint.referrer_domain_id = domain_ids.get(domain)
+            fingerprint.os_code = OperatingSystem.from_name(fingerprint.os)
+            fingerprint.browser = Browser.from_name(fingerprint.browser_name)
+            fingerprint.device_type_code = DeviceType.from_name(fingerprint.device_type)
+
+        Fingerprint.objects.bulk_update(
+            batch,
+            [
+                "user_agent_ref",
+                "referrer_domain",
+                "os_code",
+                "browser",
+                "device_type_code",
+            ],
+        )
+
+
+class Migration(migrations.Migration):
+    # Each batch commits on its own instead of in one migration-wide transaction
+    atomic = False
+
+    dependencies = [
+        ("fingerprint", "0010_useragent_referrerdomain_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,140 @@
+import django.db.models.deletion
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0011_backfill_fingerprint_dimensions"),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name="fingerprint", name="user_agent"),
+        migrations.RemoveField(model_name="fingerprint", name="referrer"),
+        migrations.RemoveField(model_name="fingerprint", name="os"),
+        migrations.RemoveField(model_name="fingerprint", name="browser_name"),
+        migrations.RemoveField(model_name="fingerprint", name="browser_version"),
+        migrations.RemoveField(model_name="fingerprint", name="device_type"),
+        migrations.RenameField(
+            model_name="fingerprint", old_name="user_agent_ref", new_name="user_agent"
+        ),
+        migrations.RenameField(
+            model_name="fingerprint", old_name="os_code", new_name="os"
+        ),
+        migrations.RenameField(
+            model_name="fingerprint",
+            old_name="device_type_code",
+            new_name="device_type",
+        ),
+        migrations.AlterField(
+            model_name="fingerprint",
+            name="user_agent",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="fingerprints",
+                to="fingerprint.useragent",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="fingerprint",
+            name="browser",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Unknown"),
+                    (1, "Other"),
+                    (2, "Konqueror"),
+                    (3, "Opera Mobile"),
+                    (4, "Opera"),
+                    (5, "Netscape"),
+                    (6, "Microsoft Internet Explorer"),
+                    (7, "MSEdge"),
+                    (8, "ChromiumEdge"),
+                    (9, "Galeon"),
+                    (10, "WOSBrowser"),
+                    (11, "Safari"),
+                    (12, "GoogleBot"),
+                    (13, "GoogleFeedFetcher"),
+                    (14, "RunscopeRadar"),
+                    (15, "GoogleAppEngine"),
+                    (16, "GoogleApps"),
+                    (17, "TwitterBot"),
+                    (18, "TelegramBot"),
+                    (19, "MJ12Bot"),
+                    (20, "YandexBot"),
+                    (21, "BingBot"),
+                    (22, "BaiduBot"),
+                    (23, "LinkedInBot"),
+                    (24, "ArchiveDotOrgBot"),
+                    (25, "YoudaoBot"),
+                    (26, "YoudaoBotImage"),
+                    (27, "RogerBot"),
+                    (28, "TweetmemeBot"),
+                    (29, "WebshotBot"),
+                    (30, "SensikaBot"),
+                    (31, "YesupBot"),
+                    (32, "DotBot"),
+                    (33, "PhantomJS"),
+                    (34, "FacebookExternalHit"),
+                    (35, "NokiaOvi"),
+                    (36, "UCBrowser"),
+                    (37, "BrowserNG"),
+                    (38, "Dolfin"),
+                    (39, "NetFront"),
+                    (40, "Jasmine"),
+                    (41, "Openwave"),
+                    (42, "UPBrowser"),
+                    (43, "OneBrowser"),
+                    (44, "ObigoInternetBrowser"),
+                    (45, "TelecaBrowser"),
+                    (46, "MAUI"),
+                    (47, "NintendoBrowser"),
+                    (48, "AndroidBrowser"),
+                    (49, "Firefox"),
+                    (50, "SeaMonkey"),
+                    (51, "Chrome"),
+                    (52, "Yandex.Browser"),
+                    (53, "ChromeiOS"),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="fingerprint",
+            name="device_type",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Unknown"),
+                    (1, "Other"),
+                    (2, "Desktop"),
+                    (3, "Mobile"),
+                    (4, "Tablet"),
+                    (5, "BlackberryPlaybook"),
+                    (6, "Ubuntu"),
+                    (7, "Debian"),
+                    (8, "WebOS"),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="fingerprint",
+            name="os",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Unknown"),
+                    (1, "Other"),
+                    (2, "Linux"),
+                    (3, "Blackberry"),
+                    (4, "Windows Phone"),
+                    (5, "iOS"),
+                    (6, "Macintosh"),
+                    (7, "Windows"),
+                    (8, "ChromeOS"),
+                    (9, "NokiaS40"),
+                    (10, "Symbian"),
+                    (11, "PlayStation"),
+                ],
+                default=0,
+            ),
+        ),
+    ]
@@ -1,18 +1,201 @@
+import hashlib
+
 from django.db import models
+from urllib.parse import urlsplit
+
+
+class ClassifierChoices(models.IntegerChoices):
+    """
+    Names the user agent classifier reports, stored as small integers. Labels
+    are the names themselves. The values are stored, so members are only ever
+    added, and a name without a member is stored as OTHER.
+    """
+
+    @classmethod
+    def from_name(cls, name: str | None) -> "ClassifierChoices":
+        if not name:
+            return cls.UNKNOWN
+        return next((member for member in cls if member.label == name), cls.OTHER)
+
+    @classmethod
+    def containing(cls, text: str) -> list["ClassifierChoices"]:
+        """
+        Returns the members whose name contains `text`, ignoring case.
+        """
+
+        return [member for member in cls if text.lower() in member.label.lower()]
+
+
+class OperatingSystem(ClassifierChoices):
+    UNKNOWN = 0, "Unknown"
+    OTHER = 1, "Other"
+    LINUX = 2, "Linux"
+    BLACKBERRY = 3, "Blackberry"
+    WINDOWS_PHONE = 4, "Windows Phone"
+    IOS = 5, "iOS"
+    MACINTOSH = 6, "Macintosh"
+    WINDOWS = 7, "Windows"
+    CHROME_OS = 8, "ChromeOS"
+    NOKIA_S40 = 9, "NokiaS40"
+    SYMBIAN = 10, "Symbian"
+    PLAYSTATION = 11, "PlayStation"
+
+
+class Browser(ClassifierChoices):
+    UNKNOWN = 0, "Unknown"
+    OTHER = 1, "Other"
+    KONQUEROR = 2, "Konqueror"
+    OPERA_MOBILE = 3, "Opera Mobile"
+    OPERA = 4, "Opera"
+    NETSCAPE = 5, "Netscape"
+    INTERNET_EXPLORER = 6, "Microsoft Internet Explorer"
+    MS_EDGE = 7, "MSEdge"
+    CHROMIUM_EDGE = 8, "ChromiumEdge"
+    GALEON = 9, "Galeon"
+    WOS_BROWSER = 10, "WOSBrowser"
+    SAFARI = 11, "Safari"
+    GOOGLE_BOT = 12, "GoogleBot"
+    GOOGLE_FEED_FETCHER = 13, "GoogleFeedFetcher"
+    RUNSCOPE_RADAR = 14, "RunscopeRadar"
+    GOOGLE_APP_ENGINE = 15, "GoogleAppEngine"
+    GOOGLE_APPS = 16, "GoogleApps"
+    TWITTER_BOT = 17, "TwitterBot"
+    TELEGRAM_BOT = 18, "TelegramBot"
+    MJ12_BOT = 19, "MJ12Bot"
+    YANDEX_BOT = 20, "YandexBot"
+    BING_BOT = 21, "BingBot"
+    BAIDU_BOT = 22, "BaiduBot"
+    LINKEDIN_BOT = 23, "LinkedInBot"
+    ARCHIVE_DOT_ORG_BOT = 24, "ArchiveDotOrgBot"
+    YOUDAO_BOT = 25, "YoudaoBot"
+    YOUDAO_BOT_IMAGE = 26, "YoudaoBotImage"
+    ROGER_BOT = 27, "RogerBot"
+    TWEETMEME_BOT = 28, "TweetmemeBot"
+    WEBSHOT_BOT = 29, "WebshotBot"
+    SENSIKA_BOT = 30, "SensikaBot"
+    YESUP_BOT = 31, "YesupBot"
+    DOT_BOT = 32, "DotBot"
+    PHANTOMJS = 33, "PhantomJS"
+    FACEBOOK_EXTERNAL_HIT = 34, "FacebookExternalHit"
+    NOKIA_OVI = 35, "NokiaOvi"
+    UC_BROWSER = 36, "UCBrowser"
+    BROWSER_NG = 37, "BrowserNG"
+    DOLFIN = 38, "Dolfin"
+    NETFRONT = 39, "NetFront"
+    JASMINE = 40, "Jasmine"
+    OPENWAVE = 41, "Openwave"
+    UP_BROWSER = 42, "UPBrowser"
+    ONE_BROWSER = 43, "OneBrowser"
+    OBIGO = 44, "ObigoInternetBrowser"
+    TELECA = 45, "TelecaBrowser"
+    MAUI = 46, "MAUI"
+    NINTENDO = 47, "NintendoBrowser"
+    ANDROID_BROWSER = 48, "AndroidBrowser"
+    FIREFOX = 49, "Firefox"
+    SEAMONKEY = 50, "SeaMonkey"
+    CHROME = 51, "Chrome"
+    YANDEX = 52, "Yandex.Browser"
+    CHROME_IOS = 53, "ChromeiOS"
+
+
+class DeviceType(ClassifierChoices):
+    UNKNOWN = 0, "Unknown"
+    OTHER = 1, "Other"
+    DESKTOP = 2, "Desktop"
+    MOBILE = 3, "Mobile"
+    TABLET = 4, "Tablet"
+    # Distributions without a device type of their own are reported by name
+    BLACKBERRY_PLAYBOOK = 5, "BlackberryPlaybook"
+    UBUNTU = 6, "Ubuntu"
+    DEBIAN = 7, "Debian"
+    WEBOS = 8, "WebOS"
+
+
+class UserAgent(models.Model):
+    # User agents are too long to index cheaply, so they're keyed by a hash
+    hash = models.CharField(max_length=64, unique=True)
+    user_agent = models.CharField(max_length=512)
+    browser_version = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return self.user_agent
+
+    @staticmethod
+    def make_hash(user_agent: str) -> str:
+        return hashlib.sha256(user_agent.encode()).hexdigest()
+
+
+class ReferrerDomain(models.Model):
+    domain = models.CharField(max_length=253, unique=True)
+
+    def __str__(self):
+        return self.domain
+
+    @staticmethod
+    def parse(referrer: str) -> str:
+        """
+        Returns the domain clicks from a normalised referrer are counted under,
+        or the referrer itself when it isn't a URL.
+        """
+
+        try:
+            domain = urlsplit(referrer).hostname
+        except ValueError:
+            domain = None
+        domain = domain or referrer.lower()
+        return domain.removeprefix("www.")[:253]
 
 
 class Fingerprint(models.Model):
-    # TODO: remove fingerprint_data
-    fingerprint_data = models.JSONField()
+    # Every other field is derived from these three, so visitors with the same
+    # IP address, user agent and referrer share one fingerprint
+    hash = models.CharField(max_length=64, unique=True)
     ip_address = models.CharField(max_length=45, blank=True, null=True)
-    user_agent = models.CharField(max_length=512, blank=True, null=True)
-    device_type = models.CharField(max_length=100, blank=True, null=True)
-    referrer = models.CharField(max_length=512, null=True, blank=True)
-    browser_name = models.CharField(max_length=100, null=True, blank=True)
-    browser_version = models.CharField(max_length=100, null=True, blank=True)
-    os = models.CharField(max_length=100, null=True, blank=True)
+    user_agent = models.ForeignKey(
+        UserAgent, on_delete=models.PROTECT, related_name="fingerprints"
+    )
+    referrer_domain = models.ForeignKey(
+        ReferrerDomain,
+        on_delete=models.PROTECT,
+        related_name="fingerprints",
+        null=True,
+        blank=True,
+    )
+    device_type = models.PositiveSmallIntegerField(
+        choices=DeviceType.choices, default=DeviceType.UNKNOWN
+    )
+    browser = models.PositiveSmallIntegerField(
+        choices=Browser.choices, default=Browser.UNKNOWN
+    )
+    os = models.PositiveSmallIntegerField(
+        choices=OperatingSystem.choices, default=OperatingSystem.UNKNOWN
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Fingerprint at {self.created_at}"
+
+    @staticmethod
+    def normalise(
+        ip_address: str | None, user_agent: str | None, referrer: str | None
+    ) -> tuple[str, str, str]:
+        """
+        Trims the raw header values and cuts them to fit their columns.
+        """
+
+        return (
+            (ip_address or "").strip().lower()[:45],
+            " ".join((user_agent or "").split())[:512],
+            (referrer or "").strip()[:512],
+        )
+
+    @staticmethod
+    def make_hash(ip_address: str, user_agent: str, referrer: str) -> str:
+        """
+        Returns the hash fingerprints are keyed by, from normalised values.
+        """
+
+        return hashlib.sha256(
+            "\x1f".join((ip_address, user_agent, referrer)).encode()
+        ).hexdigest()
@@ -1,7 +1,10 @@
+from functools import lru_cache
 from typing import Any
 
+from django.conf import settings
 from django.http import HttpRequest
-import httpagentparser
+
+from smllr.fingerprint.classifier import UserAgent, classify_user_agent
 
 
 class HttpRequestFingerprintParser:
@@ -25,44 +28,58 @@ class HttpRequestFingerprintParser:
             return x_forwarded_for.split(",")[0]
         return self.request.META.get("REMOTE_ADDR", "")
 
+    def get_headers(self) -> tuple[str, str, str]:
+        """
+        Returns the raw values a fingerprint is built from: the IP address, the
+        user agent and the referrer. They're cheap to read, so the parsing can
+        be left to whoever persists the fingerprint.
+        """
+        return (
+            self.get_ip_address(),
+            self.request.META.get("HTTP_USER_AGENT", ""),
+            self.request.META.get("HTTP_REFERER", ""),
+        )
+
     def parse(self) -> dict[str, Any]:
         """
         Creates a fingerprint based on the request data.
         This method should be implemented to extract relevant data from the request.
         """
+        return parse_fingerprint(*self.get_headers())
 
-        user_agent = httpagentparser.detect(
-            self.request.META.get("HTTP_USER_AGENT", "")
-        )
 
-        # Determine device type
-        # Mobile devices have 'dist' key (iPhone, Android, iPad)
-        # Desktop devices don't have 'dist', use platform info instead
-        device_type = None
-        if "dist" in user_agent:
-            dist_name = user_agent["dist"].get("name", "")
-            if dist_name:
-                dist_name_lower = dist_name.lower()
-                if "iphone" in dist_name_lower:
-                    device_type = "Mobile"
-                elif "ipad" in dist_name_lower:
-                    device_type = "Tablet"
-                elif "android" in dist_name_lower:
-                    device_type = "Mobile"
-                else:
-                    device_type = dist_name
-        else:
-            # Desktop devices - check platform
-            platform = user_agent.get("platform", {}).get("name", "")
-            if platform:
-                device_type = "Desktop"
-
-        return {
-            "ip_address": self.get_ip_address(),
-            "user_agent": self.request.META.get("HTTP_USER_AGENT", ""),
-            "browser_name": user_agent.get("browser", {}).get("name"),
-            "browser_version": user_agent.get("browser", {}).get("version"),
-            "os": user_agent.get("os", {}).get("name"),
-            "device_type": device_type,
-            "referrer": self.request.META.get("HTTP_REFERER", ""),
-        }
+@lru_cache(maxsize=settings.FINGERPRINT_USER_AGENT_CACHE_SIZE)
+def parse_user_agent(user_agent: str) -> UserAgent:
+    """
+    Parses a user agent string. Most traffic comes from a small set of user
+    agents, so results are kept in a bounded LRU cache.
+    """
+
+    return classify_user_agent(user_agent)
+
+
+def user_agent_cache_stats() -> dict[str, object]:
+    info = parse_user_agent.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+    }
+
+
+def parse_fingerprint(
+    ip_address: str, user_agent: str, referrer: str
+) -> dict[str, Any]:
+    """
+    Creates a fingerprint from the raw request headers.
+    """
+
+    return {
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        **parse_user_agent(user_agent)._asdict(),
+        "referrer": referrer,
+    }
@@ -1,6 +1,24 @@
-from django.http import HttpRequest
+import httpagentparser
+
+from unittest import mock
+
+from django.http import HttpRequest, HttpResponse
 from django.test import TestCase
 
+from smllr.fingerprint.classifier import (
+    BROWSER_RULES,
+    DEVICE_TYPES,
+    DIST_RULES,
+    OS_RULES,
+    UserAgent,
+    classify_user_agent,
+    find_tokens,
+)
+from smllr.fingerprint.middlewares import (
+    RequestFingerprintMiddleware,
+    build_fingerprint,
+)
+from smllr.fingerprint.models import Browser, DeviceType, OperatingSystem
 from smllr.fingerprint.parser import HttpRequestFingerprintParser
 
 
@@ -43,3 +61,114 @@ class FingerprintTestCase(TestCase):
         assert fingerprint.get("os") == expects_os_name, (
             f"OS name should be '{expects_os_name}'"
         )
+
+    def test_middleware_fingerprint_is_lazy(self):
+        """
+        The middleware only parses the request when the fingerprint is read.
+        """
+
+        request = HttpRequest()
+        request.META["HTTP_USER_AGENT"] = (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0"
+        )
+        request.META["REMOTE_ADDR"] = "192.168.1.86"
+        middleware = RequestFingerprintMiddleware(lambda request: HttpResponse())
+
+        with mock.patch(
+            "smllr.fingerprint.middlewares.build_fingerprint",
+            wraps=build_fingerprint,
+        ) as parse:
+            middleware(request)
+            parse.assert_not_called()
+
+            assert request.fingerprint.browser == Browser.FIREFOX
+            assert request.fingerprint.ip_address == "192.168.1.86"
+            parse.assert_called_once()
+
+
+class UserAgentClassifierTestCase(TestCase):
+    """
+    The classifier replaced httpagentparser, so it must keep giving the same
+    results, quirks included.
+    """
+
+    user_agents = [
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Mobile/15E148 Safari/604.1",
+        "Mozilla/5.0 (iPad; CPU OS 12_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/76.0.3809.123 Mobile/15E148 Safari/605.1",
+        "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/25.0 Chrome/121.0.0.0 Mobile Safari/537.36",
+        "Mozilla/5.0 (Linux; U; Android 2.3.6; en-us; Nexus S Build/GRK39F) AppleWebKit/533.1 (KHTML, like Gecko) Version/4.0 Mobile Safari/533.1",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36 Edg/126.0.0.0",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36 OPR/111.0.0.0",
+        "Mozilla/5.0 (Windows Phone 10.0; Android 6.0.1; Microsoft; Lumia 950) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/52.0.2743.116 Mobile Safari/537.36 Edge/15.15063",
+        "Mozilla/5.0 (Windows NT 6.3; Trident/7.0; Touch; rv:11.0) like Gecko",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.5; rv:127.0) Gecko/20100101 Firefox/127.0",
+        "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0",
+        "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+        "Opera/9.80 (Android; Opera Mini/7.5.33361/31.1448; U; en) Presto/2.8.119 Version/11.1010",
+        "Mozilla/5.0 (PlayStation 4 5.55) AppleWebKit/601.2 (KHTML, like Gecko)",
+        "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+        "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+        "Twitterbot/1.0",
+        "curl/8.6.0",
+        "CrOS",
+        "",
+    ]
+
+    def expected(self, user_agent):
+        """
+        What the parser derived from httpagentparser before the classifier.
+        """
+
+        detected = httpagentparser.detect(user_agent)
+        device_type = None
+        if "dist" in detected:
+            dist_name = detected["dist"]["name"]
+            device_type = {"iPhone": "Mobile", "IPad": "Tablet", "Android": "Mobile"}
+            device_type = device_type.get(dist_name, dist_name)
+        elif detected["platform"]["name"]:
+            device_type = "Desktop"
+
+        return UserAgent(
+            browser_name=detected.get("browser", {}).get("name"),
+            browser_version=detected.get("browser", {}).get("version"),
+            os=detected.get("os", {}).get("name"),
+            device_type=device_type,
+        )
+
+    def test_classifier_matches_httpagentparser(self):
+        for user_agent in self.user_agents:
+            with self.subTest(user_agent=user_agent):
+                self.assertEqual(
+                    classify_user_agent(user_agent), self.expected(user_agent)
+                )
+
+    def test_overlapping_tokens_are_found(self):
+        """
+        A token starting inside another one is still found.
+        """
+
+        self.assertEqual(
+            find_tokens("Mozilla/5.0 (X11; CrOSafari)"),
+            {"CrOS", "Safari"},
+        )
+
+    def test_every_classifier_name_has_an_enum_member(self):
+        """
+        Every OS, browser and device type the classifier reports is stored as
+        its own member rather than OTHER.
+        """
+
+        names = [
+            (OperatingSystem, [rule.name for rule in OS_RULES]),
+            (Browser, [rule.name for rule in BROWSER_RULES]),
+            (
+                DeviceType,
+                [
+                    "Desktop",
+                    *(DEVICE_TYPES.get(rule.name, rule.name) for rule in DIST_RULES),
+                ],
+            ),
+        ]
+        for choices, reported in names:
+            for name in reported:
+                self.assertEqual(choices.from_name(name).label, name)
@@ -3,10 +3,20 @@ import logging
 from datetime import timedelta
 from typing import Any
 
-from django.db.models import Count, Q
+from django.db.models import Count
+from django.db.models.functions import ExtractHour
 from django.utils.timezone import now
 
-from smllr.shorturls.models import ShortURL, ShortURLClick
+from smllr.fingerprint.models import Browser, ReferrerDomain
+from smllr.shorturls.models import (
+    SEARCH_ENGINES,
+    SOCIAL_MEDIA,
+    Device,
+    Platform,
+    ShortURL,
+    ShortURLClick,
+    Source,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -116,7 +126,7 @@ class AnalyticsService:
     def _get_peak_hour(self, clicks_qs) -> int | None:
         """Get the hour with most clicks (0-23)."""
         hourly_clicks = (
-            clicks_qs.extra(select={"hour": "EXTRACT(hour FROM clicked_at)"})
+            clicks_qs.annotate(hour=ExtractHour("clicked_at"))
             .values("hour")
             .annotate(count=Count("id"))
             .order_by("-count")
@@ -129,182 +139,94 @@ class AnalyticsService:
         total = clicks_qs.count()
         return round(total / 90, 2) if total > 0 else 0.0
 
+    def _count_by(self, clicks_qs, field: str) -> dict[int, int]:
+        """Count clicks by the value of one of their category fields."""
+        # COUNT(*) rather than of ids, so the covering index answers it alone
+        return dict(clicks_qs.order_by().values_list(field).annotate(count=Count("*")))
+
     def _get_platform_analytics(self, clicks_qs) -> dict[str, dict[str, int]]:
         """Get OS/platform distribution."""
-        platform_data = (
-            clicks_qs.filter(fingerprint__os__isnull=False)
-            .values("fingerprint__os")
-            .annotate(count=Count("id"))
-            .order_by("-count")
-        )
-
-        # Categorize platforms
-        windows_clicks = 0
-        macos_clicks = 0
-        linux_clicks = 0
-        android_clicks = 0
-        ios_clicks = 0
-        other_clicks = 0
-
-        for item in platform_data:
-            os_name = item["fingerprint__os"].lower() if item["fingerprint__os"] else ""
-            count = item["count"]
-
-            if "windows" in os_name:
-                windows_clicks += count
-            elif "mac" in os_name or "darwin" in os_name:
-                macos_clicks += count
-            elif "linux" in os_name:
-                linux_clicks += count
-            elif "android" in os_name:
-                android_clicks += count
-            elif "ios" in os_name or "iphone" in os_name or "ipad" in os_name:
-                ios_clicks += count
-            else:
-                other_clicks += count
-
+        counts = self._count_by(clicks_qs, "platform")
         return {
             "clicks_by_platform": {
-                "windows": windows_clicks,
-                "macos": macos_clicks,
-                "linux": linux_clicks,
-                "android": android_clicks,
-                "ios": ios_clicks,
-                "other": other_clicks,
+                platform.name.lower(): counts.get(platform, 0)
+                for platform in Platform
+                if platform != Platform.UNKNOWN
             }
         }
 
     def _get_device_analytics(self, clicks_qs) -> dict[str, dict[str, int]]:
         """Get device type distribution (mobile vs desktop)."""
-        device_data = (
-            clicks_qs.filter(fingerprint__device_type__isnull=False)
-            .values("fingerprint__device_type")
-            .annotate(count=Count("id"))
-            .order_by("-count")
-        )
-
-        mobile_clicks = 0
-        desktop_clicks = 0
-        tablet_clicks = 0
-        other_clicks = 0
-
-        for item in device_data:
-            device_type = (
-                item["fingerprint__device_type"].lower()
-                if item["fingerprint__device_type"]
-                else ""
-            )
-            count = item["count"]
-
-            if "mobile" in device_type or "phone" in device_type:
-                mobile_clicks += count
-            elif "tablet" in device_type or "ipad" in device_type:
-                tablet_clicks += count
-            elif "desktop" in device_type or "pc" in device_type:
-                desktop_clicks += count
-            else:
-                other_clicks += count
-
+        counts = self._count_by(clicks_qs, "device")
         return {
             "clicks_by_device": {
-                "mobile": mobile_clicks,
-                "desktop": desktop_clicks,
-                "tablet": tablet_clicks,
-                "other": other_clicks,
+                device.name.lower(): counts.get(device, 0)
+                for device in Device
+                if device != Device.UNKNOWN
             }
         }
 
     def _get_browser_analytics(self, clicks_qs) -> dict[str, dict[str, int]]:
         """Get browser distribution."""
         browser_data = (
-            clicks_qs.filter(fingerprint__browser_name__isnull=False)
-            .values("fingerprint__browser_name")
+            clicks_qs.filter(fingerprint__isnull=False)
+            .exclude(fingerprint__browser=Browser.UNKNOWN)
+            .values("fingerprint__browser")
             .annotate(count=Count("id"))
             .order_by("-count")[:10]  # Top 10 browsers
         )
 
         browsers = {}
         for item in browser_data:
-            browser_name = item["fingerprint__browser_name"] or "Unknown"
-            browsers[browser_name] = item["count"]
+            browsers[Browser(item["fingerprint__browser"]).label] = item["count"]
 
         return {"clicks_by_browser": browsers}
 
     def _get_source_analytics(self, clicks_qs) -> dict[str, Any]:
         """Get referrer/source distribution."""
-        referrer_data = (
-            clicks_qs.filter(fingerprint__referrer__isnull=False)
-            .exclude(fingerprint__referrer="")
-            .values("fingerprint__referrer")
-            .annotate(count=Count("id"))
-            .order_by("-count")
-        )
-
-        # Categorize referrers
-        direct_clicks = clicks_qs.filter(
-            Q(fingerprint__referrer__isnull=True) | Q(fingerprint__referrer="")
-        ).count()
-
-        social_media = {
-            "facebook": 0,
-            "instagram": 0,
-            "twitter": 0,
-            "linkedin": 0,
-            "reddit": 0,
-            "tiktok": 0,
-        }
-
-        search_engines = {
-            "google": 0,
-            "bing": 0,
-            "yahoo": 0,
-        }
+        counts = self._count_by(clicks_qs, "source")
 
-        other_referrers = []
-
-        for item in referrer_data:
-            referrer = (
-                item["fingerprint__referrer"].lower()
-                if item["fingerprint__referrer"]
-                else ""
+        # Only the referrers that aren't a known source are listed by domain
+        referrer_data = list(
+            clicks_qs.filter(
+                source=Source.OTHER, fingerprint__referrer_domain__isnull=False
             )
-            count = item["count"]
-
-            # Check social media
-            matched = False
-            for social in social_media:
-                if social in referrer:
-                    social_media[social] += count
-                    matched = True
-                    break
-
-            if matched:
-                continue
-
-            # Check search engines
-            for engine in search_engines:
-                if engine in referrer:
-                    search_engines[engine] += count
-                    matched = True
-                    break
-
-            if not matched:
-                other_referrers.append(
-                    {"referrer": item["fingerprint__referrer"], "clicks": count}
-                )
+            .values("fingerprint__referrer_domain")
+            .annotate(count=Count("id"))
+            .order_by("-count")[:10]  # Top 10 other referrers
+        )
+        domains = ReferrerDomain.objects.in_bulk(
+            [item["fingerprint__referrer_domain"] for item in referrer_data]
+        )
 
         return {
             "clicks_by_source": {
-                "direct": direct_clicks,
-                "social_media": social_media,
-                "search_engines": search_engines,
-                "other_referrers": other_referrers[:10],  # Top 10 other referrers
+                "direct": counts.get(Source.DIRECT, 0),
+                "social_media": {
+                    source.name.lower(): counts.get(source, 0)
+                    for source in SOCIAL_MEDIA
+                },
+                "search_engines": {
+                    source.name.lower(): counts.get(source, 0)
+                    for source in SEARCH_ENGINES
+                },
+                "other_referrers": [
+                    {
+                        "referrer": domains[
+                            item["fingerprint__referrer_domain"]
+                        ].domain,
+                        "clicks": item["count"],
+                    }
+                    for item in referrer_data
+                ],
             }
         }
 
     def _get_latest_clicks(self, clicks_qs) -> dict[str, list[dict[str, str]]]:
         """Get recent click details (last 50)."""
-        latest_clicks = clicks_qs.select_related("fingerprint")[:50]
+        latest_clicks = clicks_qs.select_related(
+            "fingerprint__user_agent", "fingerprint__referrer_domain"
+        )[:50]
 
         clicks_list = []
         for click in latest_clicks:
@@ -313,10 +235,12 @@ class AnalyticsService:
                     {
                         "clicked_at": click.clicked_at.strftime("%Y-%m-%d %H:%M:%S"),
                         "ip_address": click.fingerprint.ip_address or "Unknown",
-                        "device_type": click.fingerprint.device_type or "Unknown",
-                        "os": click.fingerprint.os or "Unknown",
-                        "browser": f"{click.fingerprint.browser_name or 'Unknown'} {click.fingerprint.browser_version or ''}".strip(),
-                        "referrer": click.fingerprint.referrer or "Direct",
+                        "device_type": click.fingerprint.get_device_type_display(),
+                        "os": click.fingerprint.get_os_display(),
+                        "browser": f"{click.fingerprint.get_browser_display()} {click.fingerprint.user_agent.browser_version}".strip(),
+                        "referrer": getattr(
+                            click.fingerprint.referrer_domain, "domain", "Direct"
+                        ),
                     }
                 )
 
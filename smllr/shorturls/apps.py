@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShorturlsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "smllr.shorturls"
+
+    def ready(self):
+        from smllr.shorturls import signals  # noqa: F401
@@ -0,0 +1,577 @@
+import json
+import logging
+import time
+
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from datetime import UTC, datetime
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from redis import Redis
+from redis.exceptions import LockError, RedisError, ResponseError
+from typing import TypedDict
+
+from smllr.cache import AsyncRedisConnectionFactory, RedisConnectionFactory
+from smllr.fingerprint.dimensions import referrer_domain_ids, user_agent_ids
+from smllr.fingerprint.middlewares import build_fingerprint
+from smllr.fingerprint.models import Fingerprint
+from smllr.shorturls.models import ShortURL, ShortURLClick
+
+
+logger = logging.getLogger(__name__)
+
+# Errors from the database or Redis being unreachable, as opposed to clicks the
+# database won't take; saving the same clicks again later can succeed.
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, RedisError)
+
+
+class ClickCounter:
+    """
+    Counts clicks per short code with HINCRBY and periodically applies them to
+    ShortURL.clicks, so clicks on the same link don't contend for its row lock.
+
+    Flushing renames the counters to a separate key first, so clicks counted
+    while a flush runs go to a fresh hash and none are lost. The renamed counts
+    are then taken off in batches, each in one atomic step before its UPDATE
+    runs, so no count is applied twice, even by flushes that overlap because
+    one outlived its lock. A batch whose UPDATE fails is put back.
+    """
+
+    key = "shorturl-clicks"
+    flushing_key = "shorturl-clicks-flushing"
+    lock_key = "shorturl-clicks-lock"
+    lock_timeout = 300
+
+    take_script = """
+    local codes = redis.call("HRANDFIELD", KEYS[1], ARGV[1])
+    if #codes == 0 then
+        return {}
+    end
+    local amounts = redis.call("HMGET", KEYS[1], unpack(codes))
+    redis.call("HDEL", KEYS[1], unpack(codes))
+    return {codes, amounts}
+    """
+
+    def __init__(self, connection: Redis, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.take_counts = connection.register_script(self.take_script)
+
+    @staticmethod
+    def from_settings(connection: Redis | None = None) -> "ClickCounter":
+        return ClickCounter(
+            connection or RedisConnectionFactory.get(),
+            settings.SHORTURL_CLICK_FLUSH_BATCH_SIZE,
+        )
+
+    def incr(self, code: str, amount: int = 1):
+        self.connection.hincrby(self.key, code, amount)
+
+    def incr_many(self, counts: Mapping[str, int]):
+        pipeline = self.connection.pipeline(transaction=False)
+        for code, amount in counts.items():
+            pipeline.hincrby(self.key, code, amount)
+        pipeline.execute()
+
+    def flush(self) -> int:
+        """
+        Applies the pending counts to the database and returns how many clicks
+        were applied. Only one flush runs at a time.
+        """
+
+        # The lock holds a token of its own, so a flush that outlives it can't
+        # release the lock of the next one
+        lock = self.connection.lock(self.lock_key, timeout=self.lock_timeout)
+        if not lock.acquire(blocking=False):
+            logger.info("Another click counter flush is running")
+            return 0
+
+        try:
+            # A flush that stopped half way leaves its counts behind, and they
+            # must be applied before newer ones can be renamed over them.
+            if not self.connection.exists(self.flushing_key):
+                try:
+                    self.connection.renamenx(self.key, self.flushing_key)
+                except ResponseError:
+                    # No clicks since the last flush
+                    return 0
+
+            flushed = 0
+            while batch := self._take():
+                try:
+                    self._apply(batch)
+                except Exception:
+                    self._put_back(batch)
+                    raise
+                flushed += sum(amount for _, amount in batch)
+
+            return flushed
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning("Click counter flush outlived its lock")
+
+    def _take(self) -> list[tuple[str, int]]:
+        taken = self.take_counts(keys=[self.flushing_key], args=[self.batch_size])
+        if not taken:
+            return []
+
+        codes, amounts = taken
+        return [(code.decode(), int(amount)) for code, amount in zip(codes, amounts)]
+
+    def _put_back(self, batch: list[tuple[str, int]]):
+        pipeline = self.connection.pipeline(transaction=False)
+        for code, amount in batch:
+            pipeline.hincrby(self.flushing_key, code, amount)
+        pipeline.execute()
+
+    @staticmethod
+    def _apply(batch: list[tuple[str, int]]):
+        ShortURL.objects.filter(short_code__in=[code for code, _ in batch]).update(
+            clicks=F("clicks")
+            + Case(
+                *[When(short_code=code, then=Value(amount)) for code, amount in batch],
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            )
+        )
+
+
+def resolve_fingerprints(headers: Iterable[tuple[str, str, str]]) -> dict[str, int]:
+    """
+    Returns the fingerprint ids for a batch of normalised IP address, user agent
+    and referrer values, keyed by fingerprint hash. Fingerprints seen before are
+    looked up; only new ones are parsed and inserted, and an insert racing
+    another worker's is ignored and looked up afterwards. The user agents and
+    referrer domains of new ones are resolved through in-process caches.
+    """
+
+    headers = {Fingerprint.make_hash(*values): values for values in headers}
+    fingerprint_ids = dict(
+        Fingerprint.objects.filter(hash__in=headers).values_list("hash", "pk")
+    )
+
+    missing = headers.keys() - fingerprint_ids.keys()
+    if missing:
+        fingerprints = [
+            build_fingerprint(*headers[fingerprint_hash])
+            for fingerprint_hash in missing
+        ]
+        user_agent_ids.resolve(fingerprint.user_agent for fingerprint in fingerprints)
+        referrer_domain_ids.resolve(
+            fingerprint.referrer_domain
+            for fingerprint in fingerprints
+            if fingerprint.referrer_domain
+        )
+        Fingerprint.objects.bulk_create(fingerprints, ignore_conflicts=True)
+        fingerprint_ids.update(
+            Fingerprint.objects.filter(hash__in=missing).values_list("hash", "pk")
+        )
+
+    return fingerprint_ids
+
+
+def click_categories(fingerprint_ids: Iterable[int]) -> dict[int, dict[str, int]]:
+    """
+    Returns the category fields of clicks by the id of their fingerprint.
+    """
+
+    return {
+        pk: ShortURLClick.categorise(os, device_type, referrer_domain)
+        for pk, os, device_type, referrer_domain in Fingerprint.objects.filter(
+            pk__in=set(fingerprint_ids)
+        ).values_list("pk", "os", "device_type", "referrer_domain__domain")
+    }
+
+
+def save_clicks(clicks: list[dict], counter: ClickCounter) -> int:
+    """
+    Saves a batch of clicks, each with the short code, the raw IP address, user
+    agent and referrer, and the Unix time of the click, and returns how many
+    were saved. The fingerprints are resolved and the clicks categorised here
+    rather than by the redirect. Clicks on links deleted since are skipped.
+    """
+
+    short_url_ids = dict(
+        ShortURL.objects.filter(
+            short_code__in={click["code"] for click in clicks}
+        ).values_list("short_code", "pk")
+    )
+
+    clicks = [click for click in clicks if click["code"] in short_url_ids]
+
+    # Clicks queued before the redirect stopped saving fingerprints carry the
+    # id of one that already exists.
+    headers = [
+        None
+        if "fingerprint_id" in click
+        else Fingerprint.normalise(click["ip"], click["ua"], click["referrer"])
+        for click in clicks
+    ]
+    fingerprint_ids = resolve_fingerprints(filter(None, headers))
+    fingerprint_ids = [
+        click["fingerprint_id"]
+        if values is None
+        else fingerprint_ids[Fingerprint.make_hash(*values)]
+        for click, values in zip(clicks, headers)
+    ]
+    categories = click_categories(fingerprint_ids)
+
+    ShortURLClick.objects.bulk_create(
+        [
+            ShortURLClick(
+                short_url_id=short_url_ids[click["code"]],
+                fingerprint_id=fingerprint_id,
+                clicked_at=datetime.fromtimestamp(click["at"], UTC),
+                **categories.get(fingerprint_id, {}),
+            )
+            for click, fingerprint_id in zip(clicks, fingerprint_ids)
+        ]
+    )
+    counter.incr_many(Counter(click["code"] for click in clicks))
+
+    return len(clicks)
+
+
+def save_batch(entries: list, save: Callable[[list], int], reject: Callable) -> int:
+    """
+    Saves a batch of queued entries with `save` and returns how many clicks
+    were saved. When the batch fails, its entries are saved one by one and the
+    ones that still fail are passed to `reject`, so a click the database won't
+    take doesn't hold up the others.
+
+    Entries are removed from `entries` as they're dealt with, so when the
+    database or Redis is unavailable the error is raised with `entries` holding
+    the ones left to save.
+    """
+
+    try:
+        with transaction.atomic():
+            saved = save(entries)
+    except UNAVAILABLE_ERRORS:
+        raise
+    except Exception:
+        logger.exception(f"Saving {len(entries)} clicks failed, saving them one by one")
+    else:
+        entries.clear()
+        return saved
+
+    saved = 0
+    while entries:
+        try:
+            with transaction.atomic():
+                saved += save(entries[:1])
+        except UNAVAILABLE_ERRORS:
+            raise
+        except Exception:
+            logger.exception(f"Rejected click {entries[0]!r}")
+            reject(entries[0])
+        entries.pop(0)
+
+    return saved
+
+
+class ClickBufferConfiguration(TypedDict):
+    batch_size: int
+    max_latency: float
+
+
+class ClickBuffer:
+    """
+    Redis list the redirect appends clicks to, drained in batches that are
+    written with a single bulk_create instead of one task and INSERT per click.
+
+    A drain is queued whenever the buffer reaches `batch_size` clicks and also
+    runs every `max_latency` seconds, so quiet periods don't hold clicks back.
+
+    Batches are moved to a processing list in one transaction and only removed
+    from it once they're saved, so clicks aren't lost when the database or
+    Redis is unavailable, or the drain dies half way; the next drain saves them
+    first. Only one drain runs at a time, since it owns the processing list.
+
+    Clicks that can't be saved are moved to a dead letter list, capped at
+    `dead_letter_max_length` entries, to be looked into.
+    """
+
+    key = "shorturl-click-buffer"
+    processing_key = "shorturl-click-buffer-processing"
+    dead_letter_key = "shorturl-click-buffer-dead"
+    dead_letter_max_length = 10000
+    lock_key = "shorturl-click-buffer-lock"
+    lock_timeout = 300
+
+    def __init__(
+        self,
+        connection: Redis,
+        counter: ClickCounter,
+        batch_size: int,
+        max_latency: float,
+    ):
+        self.connection = connection
+        self.counter = counter
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+
+    @staticmethod
+    def from_settings(config_key: str | None = None) -> "ClickBuffer":
+        config: ClickBufferConfiguration = getattr(
+            settings, config_key or "SHORTURL_CLICK_BUFFER"
+        )
+        connection = RedisConnectionFactory.get()
+        return ClickBuffer(connection, ClickCounter.from_settings(connection), **config)
+
+    def _encode(self, short_code: str, headers: tuple[str, str, str]) -> str:
+        ip_address, user_agent, referrer = headers
+        return json.dumps(
+            {
+                "code": short_code,
+                "ip": ip_address,
+                "ua": user_agent,
+                "referrer": referrer,
+                "at": time.time(),
+            }
+        )
+
+    def push(self, short_code: str, headers: tuple[str, str, str]) -> int:
+        """
+        Appends a click with the IP address, user agent and referrer it came
+        with, and returns how many clicks are waiting.
+        """
+
+        return self.connection.rpush(self.key, self._encode(short_code, headers))
+
+    async def apush(self, short_code: str, headers: tuple[str, str, str]) -> int:
+        return await AsyncRedisConnectionFactory.get().rpush(
+            self.key, self._encode(short_code, headers)
+        )
+
+    def drain(self) -> int:
+        """
+        Saves buffered clicks batch by batch until the buffer is empty and
+        returns how many were saved. When the database or Redis is unavailable
+        the clicks left to save stay in the processing list.
+        """
+
+        lock = self.connection.lock(self.lock_key, timeout=self.lock_timeout)
+        if not lock.acquire(blocking=False):
+            # The running drain carries on until the buffer is empty
+            logger.info("Another click buffer drain is running")
+            return 0
+
+        saved = 0
+        try:
+            while batch := self._take():
+                pending = list(batch)
+                try:
+                    saved += save_batch(pending, self.save, self._reject)
+                finally:
+                    self.connection.ltrim(
+                        self.processing_key, len(batch) - len(pending), -1
+                    )
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning("Click buffer drain outlived its lock")
+
+        return saved
+
+    def _take(self) -> list[bytes]:
+        # Clicks a drain left unsaved are taken again before any newer ones
+        if batch := self.connection.lrange(self.processing_key, 0, -1):
+            return batch
+
+        pipeline = self.connection.pipeline()
+        for _ in range(self.batch_size):
+            pipeline.lmove(self.key, self.processing_key)
+        return [entry for entry in pipeline.execute() if entry is not None]
+
+    def save(self, batch: list[bytes]) -> int:
+        return save_clicks([json.loads(entry) for entry in batch], self.counter)
+
+    def _reject(self, entry: bytes):
+        pipeline = self.connection.pipeline()
+        pipeline.rpush(self.dead_letter_key, entry)
+        pipeline.ltrim(self.dead_letter_key, -self.dead_letter_max_length, -1)
+        pipeline.execute()
+
+
+class ClickStreamConfiguration(TypedDict):
+    max_length: int
+    batch_size: int
+    block: float
+    claim_idle: float
+
+
+class ClickStream:
+    """
+    Redis stream of clicks read by `ingest_clicks` workers through a consumer
+    group, as an alternative to the buffer drained by Celery.
+
+    Entries are acknowledged once their batch is saved, so a worker that dies
+    mid-batch leaves them pending; other workers take them over with XAUTOCLAIM
+    after `claim_idle` seconds. Delivery is at least once. Entries that can't be
+    saved are moved to a dead letter stream and acknowledged.
+
+    The streams are capped at roughly `max_length` entries, so a backlog longer
+    than that drops its oldest clicks.
+
+    Reads wait up to `block` seconds for new clicks, longer than the read
+    timeout of the shared connection pool, so they go through `reader`.
+    """
+
+    key = "shorturl-click-stream"
+    dead_letter_key = "shorturl-click-stream-dead"
+    group = "click-ingestors"
+
+    def __init__(
+        self,
+        connection: Redis,
+        counter: ClickCounter,
+        max_length: int,
+        batch_size: int,
+        block: float,
+        claim_idle: float,
+        reader: Redis | None = None,
+    ):
+        self.connection = connection
+        self.counter = counter
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.block = block
+        self.claim_idle = claim_idle
+        self.reader = reader or connection
+
+    @staticmethod
+    def from_settings(config_key: str | None = None) -> "ClickStream":
+        config: ClickStreamConfiguration = getattr(
+            settings, config_key or "SHORTURL_CLICK_STREAM"
+        )
+        connection = RedisConnectionFactory.get()
+        reader = RedisConnectionFactory.create(
+            max_connections=1,
+            socket_timeout=settings.REDIS.get("socket_timeout", 1.0) + config["block"],
+        )
+        return ClickStream(
+            connection,
+            ClickCounter.from_settings(connection),
+            reader=reader,
+            **config,
+        )
+
+    def _fields(
+        self, short_code: str, headers: tuple[str, str, str]
+    ) -> dict[str, str | float]:
+        ip_address, user_agent, referrer = headers
+        return {
+            "code": short_code,
+            "ip": ip_address,
+            "ua": user_agent,
+            "referrer": referrer,
+            "at": time.time(),
+        }
+
+    def push(self, short_code: str, headers: tuple[str, str, str]):
+        self.connection.xadd(
+            self.key,
+            self._fields(short_code, headers),
+            maxlen=self.max_length,
+            approximate=True,
+        )
+
+    async def apush(self, short_code: str, headers: tuple[str, str, str]):
+        await AsyncRedisConnectionFactory.get().xadd(
+            self.key,
+            self._fields(short_code, headers),
+            maxlen=self.max_length,
+            approximate=True,
+        )
+
+    def create_group(self):
+        try:
+            self.connection.xgroup_create(self.key, self.group, id="0", mkstream=True)
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    def read(self, consumer: str) -> int:
+        """
+        Waits up to `block` seconds for new clicks, saves one batch and returns
+        how many clicks were saved.
+        """
+
+        response = self.reader.xreadgroup(
+            self.group,
+            consumer,
+            {self.key: ">"},
+            count=self.batch_size,
+            block=int(self.block * 1000),
+        )
+        if not response:
+            return 0
+
+        return self._save(response[0][1])
+
+    def reclaim(self, consumer: str) -> int:
+        """
+        Takes over clicks left pending by other consumers for longer than
+        `claim_idle` seconds, saves them and returns how many were saved.
+        """
+
+        saved = 0
+        start_id = "0-0"
+        while True:
+            start_id, entries, *_ = self.connection.xautoclaim(
+                self.key,
+                self.group,
+                consumer,
+                min_idle_time=int(self.claim_idle * 1000),
+                start_id=start_id,
+                count=self.batch_size,
+            )
+            if entries:
+                saved += self._save(entries)
+            if start_id in (b"0-0", "0-0"):
+                return saved
+
+    def _save(self, entries: list[tuple[bytes, dict[bytes, bytes] | None]]) -> int:
+        pending = list(entries)
+        try:
+            saved = save_batch(pending, self._save_entries, self._reject)
+        finally:
+            # Entries dealt with before the database or Redis became
+            # unavailable are acknowledged; the rest stay pending
+            if done := entries[: len(entries) - len(pending)]:
+                self.connection.xack(
+                    self.key, self.group, *[entry_id for entry_id, _ in done]
+                )
+
+        return saved
+
+    def _save_entries(
+        self, entries: list[tuple[bytes, dict[bytes, bytes] | None]]
+    ) -> int:
+        clicks = [
+            self._decode(fields)
+            # Entries trimmed from the stream while pending come back empty
+            for _, fields in entries
+            if fields
+        ]
+
+        return save_clicks(clicks, self.counter) if clicks else 0
+
+    def _reject(self, entry: tuple[bytes, dict[bytes, bytes]]):
+        _, fields = entry
+        self.connection.xadd(
+            self.dead_letter_key, fields, maxlen=self.max_length, approximate=True
+        )
+
+    @staticmethod
+    def _decode(fields: dict[bytes, bytes]) -> dict[str, str | int | float]:
+        click = {key.decode(): value.decode() for key, value in fields.items()}
+        click["at"] = float(click["at"])
+        if "fingerprint_id" in click:
+            click["fingerprint_id"] = int(click["fingerprint_id"])
+        return click
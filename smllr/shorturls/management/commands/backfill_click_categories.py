@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from smllr.shorturls.models import ShortURLClick
+
+
+class Command(BaseCommand):
+    help = (
+        "Classifies the platform, device and source of clicks saved before they "
+        "were classified at ingestion. Clicks are updated in primary key order, "
+        "one short transaction per batch, and can be resumed with --after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Clicks per UPDATE"
+        )
+        parser.add_argument(
+            "--after", type=int, default=0, help="Only clicks with a greater id"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        clicks = (
+            ShortURLClick.objects.filter(fingerprint__isnull=False)
+            .order_by("pk")
+            .values_list(
+                "pk",
+                "fingerprint__os",
+                "fingerprint__device_type",
+                "fingerprint__referrer_domain__domain",
+                "platform",
+                "device",
+                "source",
+            )
+        )
+
+        last_pk = options["after"]
+        scanned = updated = 0
+        started_at = time.perf_counter()
+        while batch := list(clicks.filter(pk__gt=last_pk)[:batch_size]):
+            last_pk = batch[-1][0]
+            scanned += len(batch)
+
+            changed = []
+            for pk, os, device_type, domain, *current in batch:
+                categories = ShortURLClick.categorise(os, device_type, domain)
+                if list(categories.values()) != current:
+                    changed.append(ShortURLClick(pk=pk, **categories))
+            updated += ShortURLClick.objects.bulk_update(
+                changed, ["platform", "device", "source"]
+            )
+
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(
+                f"Scanned {scanned} clicks up to id {last_pk}, updated {updated} "
+                f"({scanned / elapsed:.0f} clicks/s)"
+            )
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} of {scanned} clicks in {elapsed:.2f}s"
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from smllr.cache import RedisConnectionFactory, ShortURLCache
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the RediSearch index over cached short URLs used for secondary "
+        "queries. Safe to run on every deploy; an existing index is left as is."
+    )
+
+    def handle(self, *args, **options):
+        cache = ShortURLCache(RedisConnectionFactory.get())
+
+        try:
+            created = cache.create_index()
+        except RedisError as err:
+            raise CommandError(f"Could not create the ShortURL index: {err}")
+
+        if created:
+            self.stdout.write(self.style.SUCCESS("Created the ShortURL index"))
+        else:
+            self.stdout.write("The ShortURL index already exists")
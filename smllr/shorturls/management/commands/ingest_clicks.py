@@ -0,0 +1,76 @@
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from redis.exceptions import RedisError
+
+from smllr.shorturls.clicks import ClickStream
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Saves clicks from the Redis click stream, used when "
+        "SHORTURL_CLICK_INGESTION is 'stream'. Run as many workers as needed, "
+        "each with its own consumer name; clicks left pending by a worker that "
+        "died are taken over by the others."
+    )
+
+    # Seconds to wait after a failure, doubling up to the cap while Redis or
+    # the database stays unavailable
+    backoff = 0.5
+    max_backoff = 30.0
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumer",
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Consumer name, unique per worker",
+        )
+
+    def handle(self, *args, **options):
+        stream = ClickStream.from_settings()
+        stream.create_group()
+        consumer = options["consumer"]
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f"Ingesting clicks as {consumer}")
+        reclaimed_at = 0.0
+        failures = 0
+        while self.running:
+            saved = 0
+            try:
+                if time.monotonic() - reclaimed_at >= stream.claim_idle:
+                    saved += stream.reclaim(consumer)
+                    reclaimed_at = time.monotonic()
+
+                saved += stream.read(consumer)
+            except (RedisError, DatabaseError):
+                logger.exception(f"Ingesting clicks as {consumer} failed")
+                self.sleep(min(self.backoff * 2**failures, self.max_backoff))
+                failures += 1
+                continue
+
+            failures = 0
+            if saved and options["verbosity"] > 1:
+                self.stdout.write(f"Saved {saved} clicks")
+
+        self.stdout.write(self.style.SUCCESS(f"Stopped {consumer}"))
+
+    def sleep(self, seconds: float):
+        # In short steps, so stopping doesn't wait for the whole back off
+        deadline = time.monotonic() + seconds
+        while self.running and time.monotonic() < deadline:
+            time.sleep(min(0.1, seconds))
+
+    def stop(self, *args):
+        self.running = False
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from smllr.cache import ShortCodeFilter
+from smllr.shorturls.models import ShortURL
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the Bloom filter of existing short codes used to reject unknown "
+        "codes without querying the database. Run it after deploying and whenever "
+        "SHORTURL_FILTER changes."
+    )
+
+    def handle(self, *args, **options):
+        code_filter = ShortCodeFilter.from_settings()
+        started_at = now()
+
+        count = code_filter.rebuild(
+            ShortURL.objects.values_list("short_code", flat=True).iterator(
+                chunk_size=10000
+            )
+        )
+
+        # Codes created while the filter was being built were added to the old
+        # filter, which the rebuilt one has just replaced.
+        for short_code in ShortURL.objects.filter(
+            created_at__gte=started_at
+        ).values_list("short_code", flat=True):
+            code_filter.add(short_code)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt short code filter with {count} codes "
+                f"({code_filter.size} bits, {code_filter.hash_count} hashes)"
+            )
+        )
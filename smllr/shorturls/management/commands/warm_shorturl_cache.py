@@ -0,0 +1,63 @@
+import time
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from smllr.cache import RedisConnectionFactory, ShortURLCache
+from smllr.shorturls.models import ShortURL
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the most clicked short URLs to the Redis redirect cache so a deploy "
+        "or a Redis flush doesn't send every redirect to the database at once, "
+        "and ranks them for gunicorn workers to preload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=10000, help="Number of links to warm"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Links per Redis pipeline"
+        )
+        parser.add_argument(
+            "--per-user", type=int, help="Maximum number of links warmed per user"
+        )
+        parser.add_argument(
+            "--recent-days",
+            type=int,
+            default=7,
+            help="Window of recent clicks the links are ranked by",
+        )
+
+    def handle(self, *args, **options):
+        cache = ShortURLCache(RedisConnectionFactory.get())
+        batch_size = options["batch_size"]
+        short_urls = (
+            ShortURL.objects.hottest(options["recent_days"], options["per_user"])
+            .select_related("user")[: options["limit"]]
+            .iterator(chunk_size=batch_size)
+        )
+
+        count = 0
+        codes = []
+        started_at = time.perf_counter()
+        while batch := list(islice(short_urls, batch_size)):
+            count += cache.set_many(batch)
+            codes.extend(short_url.short_code for short_url in batch)
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(
+                f"Warmed {count} entries ({count / elapsed:.0f} entries/s)"
+            )
+
+        cache.set_hottest(codes)
+
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {count} entries in {elapsed:.2f}s "
+                f"({count / elapsed if elapsed else 0:.0f} entries/s)"
+            )
+        )
@@ -0,0 +1,41 @@
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponseRedirect
+
+from smllr.shorturls.views import ShortURLRedirectView, enqueue_click
+
+
+class ShortURLFastRedirectMiddleware:
+    """
+    Serves cached `/<short_code>` redirects before the rest of the middleware
+    stack and URL resolution run. Cache misses and every other request fall
+    through unchanged, so lookups that need the database still go through
+    ShortURLRedirectView.
+
+    It must be the first middleware to be useful, and is only enabled when
+    SHORTURL_FAST_REDIRECT is set.
+    """
+
+    path_pattern = re.compile(r"^/([^/]+)$")
+
+    def __init__(self, get_response):
+        if not settings.SHORTURL_FAST_REDIRECT:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        if request.method == "GET":
+            match = self.path_pattern.match(request.path_info)
+
+            if match is not None:
+                short_code = match.group(1)
+                short_url = ShortURLRedirectView.cache.get(short_code)
+
+                if short_url is not None:
+                    enqueue_click(request, short_code)
+                    return HttpResponseRedirect(short_url.destination_url)
+
+        return self.get_response(request)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("shorturls", "0007_shorturl_shorturl_user_created_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="shorturlclick",
+            name="clicked_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("fingerprint", "0012_swap_fingerprint_dimensions"),
+        ("shorturls", "0008_alter_shorturlclick_clicked_at"),
+    ]
+
+    # Existing clicks are left unknown and direct until the
+    # backfill_click_categories command classifies them
+    operations = [
+        migrations.AddField(
+            model_name="shorturlclick",
+            name="device",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Unknown"),
+                    (1, "Mobile"),
+                    (2, "Desktop"),
+                    (3, "Tablet"),
+                    (4, "Other"),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shorturlclick",
+            name="platform",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Unknown"),
+                    (1, "Windows"),
+                    (2, "macOS"),
+                    (3, "Linux"),
+                    (4, "Android"),
+                    (5, "iOS"),
+                    (6, "Other"),
+                ],
+                default=0,
+            ),
+        ),
+        migrations.AddField(
+            model_name="shorturlclick",
+            name="source",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (0, "Direct"),
+                    (1, "Other"),
+                    (2, "Facebook"),
+                    (3, "Instagram"),
+                    (4, "Twitter"),
+                    (5, "LinkedIn"),
+                    (6, "Reddit"),
+                    (7, "TikTok"),
+                    (8, "Google"),
+                    (9, "Bing"),
+                    (10, "Yahoo"),
+                ],
+                default=0,
+            ),
+        ),
+    ]
@@ -1,18 +1,75 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
 from django.db.models.manager import Manager
 from django.conf import settings
 from django.utils.timezone import now
 from django.utils.translation import gettext as _
 
-from smllr.fingerprint.models import Fingerprint
+from smllr.fingerprint.models import DeviceType, Fingerprint, OperatingSystem
 from smllr.shorturls.helpers import generate_short_code
 from smllr.users.models import User
 
 
-class ShortURLManager(Manager):
+class ShortURLQuerySet(models.QuerySet):
+    def update(self, **kwargs) -> int:
+        """
+        Bulk updates skip the model signals, so the cached entries of the
+        affected codes are invalidated here instead.
+        """
+
+        # Imported here because these modules depend on the models
+        from smllr.shorturls.signals import (
+            CACHED_FIELDS,
+            add_short_code,
+            invalidate_shorturl_cache,
+        )
+
+        if CACHED_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+
+        short_codes = list(self.values_list("short_code", flat=True))
+        if "short_code" in kwargs:
+            add_short_code(kwargs["short_code"])
+
+        rows = super().update(**kwargs)
+        invalidate_shorturl_cache(*short_codes)
+        return rows
+
+    def hottest(
+        self, recent_days: int = 7, per_user: int | None = None
+    ) -> models.QuerySet["ShortURL"]:
+        """
+        Orders live short URLs by clicks in the last `recent_days`, then by total
+        clicks, optionally keeping only the top `per_user` links of each user.
+        """
+
+        since = now() - timedelta(days=recent_days)
+        guest_cutoff = now() - timedelta(days=settings.SHORTURL_EXPIRATION_TIME_DAYS)
+        ordering = [F("recent_clicks").desc(), F("clicks").desc(), F("pk").asc()]
+
+        queryset = (
+            self.filter(Q(user__is_guest_user=False) | Q(created_at__gt=guest_cutoff))
+            .annotate(
+                recent_clicks=Count(
+                    "shorturlclick", filter=Q(shorturlclick__clicked_at__gte=since)
+                )
+            )
+            .order_by(*ordering)
+        )
+
+        if per_user is not None:
+            queryset = queryset.annotate(
+                user_rank=Window(RowNumber(), partition_by=F("user"), order_by=ordering)
+            ).filter(user_rank__lte=per_user)
+
+        return queryset
+
+
+class ShortURLManager(Manager.from_queryset(ShortURLQuerySet)):
     def create(
         self, user: User, destination_url: str, name: str, short_code: str | None = None
     ) -> "ShortURL":
@@ -54,18 +111,25 @@ class ShortURL(models.Model):
         return f"{self.name} - {self.short_code}"
 
     def increment_clicks(self):
+        ShortURL.objects.filter(pk=self.pk).update(clicks=F("clicks") + 1)
         self.clicks += 1
-        self.save(update_fields=["clicks"])
 
-    def is_expired(self) -> bool:
+    def get_expires_at(self) -> datetime | None:
+        """
+        Returns when the short URL expires, or None if it never does.
+        """
         expiration = timedelta(days=settings.SHORTURL_EXPIRATION_TIME_DAYS)
         try:
             if self.user.is_guest_user:
-                return now() - self.created_at > expiration
+                return self.created_at + expiration
         except ObjectDoesNotExist:
             # If user doesn't exist, treat as guest and check expiration
-            return now() - self.created_at > expiration
-        return False
+            return self.created_at + expiration
+        return None
+
+    def is_expired(self) -> bool:
+        expires_at = self.get_expires_at()
+        return expires_at is not None and now() > expires_at
 
 
 class ShortURLClickManager(Manager):
@@ -87,22 +151,25 @@ class ShortURLClickManager(Manager):
         DEPRECATED: Use AnalyticsService for comprehensive analytics.
         Kept for backward compatibility.
         """
-        clicks = self.get_analytics_queryset(short_code).select_related("fingerprint")[
-            :limit
-        ]
+        clicks = self.get_analytics_queryset(short_code).select_related(
+            "fingerprint__user_agent", "fingerprint__referrer_domain"
+        )[:limit]
         latest_clicks = []
         for click in clicks:
             if click.fingerprint:
                 latest_clicks.append(
                     {
                         "clicked_at": click.clicked_at.strftime("%Y/%m/%d"),
-                        "user_agent": click.fingerprint.user_agent or "Unknown",
+                        "user_agent": click.fingerprint.user_agent.user_agent
+                        or "Unknown",
                         "ip_address": click.fingerprint.ip_address or "Unknown",
-                        "device_type": click.fingerprint.device_type or "Unknown",
-                        "referrer": click.fingerprint.referrer or "Direct",
-                        "os": click.fingerprint.os or "Unknown",
-                        "browser_name": click.fingerprint.browser_name or "Unknown",
-                        "browser_version": click.fingerprint.browser_version or "",
+                        "device_type": click.fingerprint.get_device_type_display(),
+                        "referrer": getattr(
+                            click.fingerprint.referrer_domain, "domain", "Direct"
+                        ),
+                        "os": click.fingerprint.get_os_display(),
+                        "browser_name": click.fingerprint.get_browser_display(),
+                        "browser_version": click.fingerprint.user_agent.browser_version,
                     }
                 )
 
@@ -120,11 +187,13 @@ class ShortURLClickManager(Manager):
         clicks = self.get_analytics_queryset(short_code)
         return {
             "windows_clicks": clicks.filter(
-                fingerprint__os__icontains="Windows"
+                fingerprint__os__in=OperatingSystem.containing("Windows")
+            ).count(),
+            "linux_clicks": clicks.filter(
+                fingerprint__os__in=OperatingSystem.containing("Linux")
             ).count(),
-            "linux_clicks": clicks.filter(fingerprint__os__icontains="Linux").count(),
             "android_clicks": clicks.filter(
-                fingerprint__os__icontains="Android"
+                fingerprint__os__in=OperatingSystem.containing("Android")
             ).count(),
         }
 
@@ -138,27 +207,155 @@ class ShortURLClickManager(Manager):
         clicks = self.get_analytics_queryset(short_code)
         return {
             "instagram_clicks": clicks.filter(
-                fingerprint__referrer__icontains="instagram"
+                fingerprint__referrer_domain__domain__icontains="instagram"
             ).count(),
             "facebook_clicks": clicks.filter(
-                fingerprint__referrer__icontains="facebook"
+                fingerprint__referrer_domain__domain__icontains="facebook"
             ).count(),
         }
 
 
+class Platform(models.IntegerChoices):
+    """
+    Platforms the analytics count clicks under, classified from the
+    fingerprint's OS and device type when a click is saved.
+    """
+
+    UNKNOWN = 0, "Unknown"
+    WINDOWS = 1, "Windows"
+    MACOS = 2, "macOS"
+    LINUX = 3, "Linux"
+    ANDROID = 4, "Android"
+    IOS = 5, "iOS"
+    OTHER = 6, "Other"
+
+    @classmethod
+    def classify(cls, os: int, device_type: int) -> "Platform":
+        # Android reports itself as Linux, only its device type tells them apart
+        if os == OperatingSystem.LINUX and device_type in (
+            DeviceType.MOBILE,
+            DeviceType.TABLET,
+        ):
+            return cls.ANDROID
+
+        return {
+            OperatingSystem.UNKNOWN: cls.UNKNOWN,
+            OperatingSystem.WINDOWS: cls.WINDOWS,
+            OperatingSystem.WINDOWS_PHONE: cls.WINDOWS,
+            OperatingSystem.MACINTOSH: cls.MACOS,
+            OperatingSystem.LINUX: cls.LINUX,
+            OperatingSystem.IOS: cls.IOS,
+        }.get(os, cls.OTHER)
+
+
+class Device(models.IntegerChoices):
+    UNKNOWN = 0, "Unknown"
+    MOBILE = 1, "Mobile"
+    DESKTOP = 2, "Desktop"
+    TABLET = 3, "Tablet"
+    OTHER = 4, "Other"
+
+    @classmethod
+    def classify(cls, device_type: int) -> "Device":
+        return {
+            DeviceType.UNKNOWN: cls.UNKNOWN,
+            DeviceType.MOBILE: cls.MOBILE,
+            DeviceType.DESKTOP: cls.DESKTOP,
+            DeviceType.TABLET: cls.TABLET,
+        }.get(device_type, cls.OTHER)
+
+
+class Source(models.IntegerChoices):
+    """
+    Where clicks come from, classified from the referrer domain. Sources are
+    matched in order, by their name appearing in the domain.
+    """
+
+    DIRECT = 0, "Direct"
+    OTHER = 1, "Other"
+    FACEBOOK = 2, "Facebook"
+    INSTAGRAM = 3, "Instagram"
+    TWITTER = 4, "Twitter"
+    LINKEDIN = 5, "LinkedIn"
+    REDDIT = 6, "Reddit"
+    TIKTOK = 7, "TikTok"
+    GOOGLE = 8, "Google"
+    BING = 9, "Bing"
+    YAHOO = 10, "Yahoo"
+
+    @classmethod
+    def classify(cls, referrer_domain: str | None) -> "Source":
+        if not referrer_domain:
+            return cls.DIRECT
+
+        domain = referrer_domain.lower()
+        return next(
+            (
+                source
+                for source in cls
+                if source > cls.OTHER and source.name.lower() in domain
+            ),
+            cls.OTHER,
+        )
+
+
+SOCIAL_MEDIA = (
+    Source.FACEBOOK,
+    Source.INSTAGRAM,
+    Source.TWITTER,
+    Source.LINKEDIN,
+    Source.REDDIT,
+    Source.TIKTOK,
+)
+
+SEARCH_ENGINES = (Source.GOOGLE, Source.BING, Source.YAHOO)
+
+
 class ShortURLClick(models.Model):
     short_url = models.ForeignKey(ShortURL, on_delete=models.CASCADE)
-    clicked_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, which would stamp buffered clicks with the time they're
+    # saved rather than when they happened
+    clicked_at = models.DateTimeField(default=now)
     fingerprint = models.ForeignKey(
         Fingerprint, on_delete=models.DO_NOTHING, blank=True, null=True
     )
+    # Classified from the fingerprint when the click is saved, so the analytics
+    # only have to count them
+    platform = models.PositiveSmallIntegerField(
+        choices=Platform.choices, default=Platform.UNKNOWN
+    )
+    device = models.PositiveSmallIntegerField(
+        choices=Device.choices, default=Device.UNKNOWN
+    )
+    source = models.PositiveSmallIntegerField(
+        choices=Source.choices, default=Source.DIRECT
+    )
 
     objects = ShortURLClickManager()
 
     class Meta:
         indexes = [
+            # Covers the categories too, so the analytics of a link are counted
+            # from the index alone
             models.Index(
-                fields=["short_url", "-clicked_at"], name="click_url_time_idx"
+                fields=["short_url", "-clicked_at"],
+                include=["platform", "device", "source"],
+                name="click_url_time_category_idx",
             ),
             models.Index(fields=["fingerprint"], name="click_fingerprint_idx"),
         ]
+
+    @staticmethod
+    def categorise(
+        os: int, device_type: int, referrer_domain: str | None
+    ) -> dict[str, int]:
+        """
+        Returns the category fields of a click from its fingerprint's OS,
+        device type and referrer domain.
+        """
+
+        return {
+            "platform": Platform.classify(os, device_type),
+            "device": Device.classify(device_type),
+            "source": Source.classify(referrer_domain),
+        }
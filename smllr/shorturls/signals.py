@@ -0,0 +1,116 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from redis.exceptions import RedisError
+
+from smllr.cache import ShortCodeFilter
+from smllr.shorturls.models import ShortURL
+from smllr.shorturls.tasks import (
+    add_short_codes_to_filter,
+    invalidate_shorturl_cache_entries,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Fields the redirect cache stores or derives the expiry from
+CACHED_FIELDS = frozenset(
+    ["short_code", "destination_url", "user", "user_id", "created_at"]
+)
+
+
+def queue(task, short_codes: list[str], countdown: float = 0):
+    try:
+        task.apply_async((short_codes,), countdown=countdown)
+    except Exception:
+        logger.error(f"Could not queue {task.name} for {short_codes}", exc_info=True)
+
+
+def invalidate_shorturl_cache(*short_codes: str):
+    """
+    Drops the codes from the redirect cache of every worker once the current
+    transaction commits, and again SHORTURL_CACHE_INVALIDATION_DELAY seconds
+    later from a task. A concurrent miss that read the old row before the
+    commit may have cached it in between; the task also retries until Redis
+    can be reached, so an outage doesn't leave the entry stale.
+    """
+
+    def invalidate():
+        # Imported here because the views import the models this module needs
+        from smllr.shorturls.views import ShortURLRedirectView
+
+        for short_code in short_codes:
+            try:
+                ShortURLRedirectView.cache.invalidate(short_code)
+            except RedisError:
+                logger.warning(
+                    f"Could not invalidate the cache entry of {short_code} yet",
+                    exc_info=True,
+                )
+
+        queue(
+            invalidate_shorturl_cache_entries,
+            list(short_codes),
+            countdown=settings.SHORTURL_CACHE_INVALIDATION_DELAY,
+        )
+
+    transaction.on_commit(invalidate)
+
+
+def add_short_code(short_code: str):
+    """
+    Adds a new code to the short code filter. Until it's added the filter may
+    report the code as missing, so when Redis can't be reached the add is
+    retried from a task rather than failing the save.
+    """
+
+    try:
+        ShortCodeFilter.from_settings().add(short_code)
+    except RedisError:
+        logger.warning(f"Could not add {short_code} to the filter yet", exc_info=True)
+        queue(add_short_codes_to_filter, [short_code])
+
+
+def affects_cache(update_fields: frozenset[str] | None) -> bool:
+    return update_fields is None or not CACHED_FIELDS.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=ShortURL)
+def track_short_code(sender, instance: ShortURL, update_fields=None, **kwargs):
+    if not affects_cache(update_fields):
+        return
+
+    instance._previous_short_code = None
+    if not instance._state.adding:
+        instance._previous_short_code = (
+            ShortURL.objects.filter(pk=instance.pk)
+            .values_list("short_code", flat=True)
+            .first()
+        )
+
+    if instance._previous_short_code != instance.short_code:
+        # Added before the row exists so the filter never reports it as missing
+        add_short_code(instance.short_code)
+
+
+@receiver(post_save, sender=ShortURL)
+def invalidate_saved_shorturl(
+    sender, instance: ShortURL, created: bool, update_fields=None, **kwargs
+):
+    if created or not affects_cache(update_fields):
+        return
+
+    short_codes = [instance.short_code]
+    previous_short_code = getattr(instance, "_previous_short_code", None)
+    if previous_short_code and previous_short_code != instance.short_code:
+        short_codes.append(previous_short_code)
+
+    invalidate_shorturl_cache(*short_codes)
+
+
+@receiver(post_delete, sender=ShortURL)
+def invalidate_deleted_shorturl(sender, instance: ShortURL, **kwargs):
+    invalidate_shorturl_cache(instance.short_code)
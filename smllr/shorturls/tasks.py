@@ -1,13 +1,27 @@
 import logging
 
 from celery import shared_task
+from redis.exceptions import RedisError
+
+from smllr.cache import ShortCodeFilter
+from smllr.shorturls.clicks import ClickBuffer, ClickCounter
 from smllr.shorturls.models import ShortURL, ShortURLClick
 from smllr.fingerprint.models import Fingerprint
 
 
 logger = logging.getLogger(__name__)
 
+# Redis writes that must not be lost are retried with backoff, for a few hours
+# at most, until Redis is reachable again
+REDIS_RETRY = {
+    "autoretry_for": (RedisError,),
+    "retry_backoff": True,
+    "retry_backoff_max": 600,
+    "max_retries": 25,
+}
+
 
+# Clicks are buffered by ClickBuffer now; kept for tasks queued before the switch
 @shared_task
 def save_shorturl_click(shortcode: str, fingerprint_id: int):
     shorturl = ShortURL.objects.filter(short_code=shortcode).first()
@@ -16,7 +30,11 @@ def save_shorturl_click(shortcode: str, fingerprint_id: int):
         logger.error(f"ShortURL with code {shortcode} was not found")
         return
 
-    fingerprint = Fingerprint.objects.filter(pk=fingerprint_id).first()
+    fingerprint = (
+        Fingerprint.objects.filter(pk=fingerprint_id)
+        .select_related("referrer_domain")
+        .first()
+    )
 
     if not fingerprint:
         logger.error(
@@ -24,9 +42,41 @@ def save_shorturl_click(shortcode: str, fingerprint_id: int):
         )
         return
 
-    shorturl.increment_clicks()
-    shorturl_click = ShortURLClick.objects.create(
+    ClickCounter.from_settings().incr(shortcode)
+    ShortURLClick.objects.create(
         short_url=shorturl,
         fingerprint=fingerprint,
+        **ShortURLClick.categorise(
+            fingerprint.os,
+            fingerprint.device_type,
+            getattr(fingerprint.referrer_domain, "domain", None),
+        ),
     )
-    shorturl_click.save()
+
+
+@shared_task
+def flush_shorturl_clicks():
+    clicks = ClickCounter.from_settings().flush()
+    logger.info(f"Flushed {clicks} short URL clicks")
+
+
+@shared_task
+def drain_shorturl_clicks():
+    clicks = ClickBuffer.from_settings().drain()
+    logger.info(f"Saved {clicks} buffered short URL clicks")
+
+
+@shared_task(**REDIS_RETRY)
+def invalidate_shorturl_cache_entries(short_codes: list[str]):
+    # Imported here because the views import this module
+    from smllr.shorturls.views import ShortURLRedirectView
+
+    for short_code in short_codes:
+        ShortURLRedirectView.cache.invalidate(short_code)
+
+
+@shared_task(**REDIS_RETRY)
+def add_short_codes_to_filter(short_codes: list[str]):
+    code_filter = ShortCodeFilter.from_settings()
+    for short_code in short_codes:
+        code_filter.add(short_code)
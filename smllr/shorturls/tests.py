@@ -1,17 +1,72 @@
+import json
+import os
+import signal
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-from unittest.mock import Mock, patch, MagicMock
+from io import StringIO
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.test import TestCase, Client
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError, connection
+from django.test import AsyncRequestFactory, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import now
 
-from smllr.fingerprint.models import Fingerprint
-from smllr.fingerprint.parser import HttpRequestFingerprintParser
+from redis import Redis, RedisError
+
+from smllr.cache import (
+    CachedShortURL,
+    CircuitBreaker,
+    CircuitOpenError,
+    LocalShortURLCache,
+    RedisConnectionFactory,
+    ShortCodeFilter,
+    ShortURLCache,
+    TieredShortURLCache,
+)
+from smllr.fingerprint.classifier import classify_user_agent
+from smllr.fingerprint.middlewares import get_request_fingerprint
+from smllr.fingerprint.dimensions import referrer_domain_ids, user_agent_ids
+from smllr.fingerprint.models import (
+    Browser,
+    DeviceType,
+    Fingerprint,
+    OperatingSystem,
+    ReferrerDomain,
+    UserAgent,
+)
+from smllr.fingerprint.parser import (
+    HttpRequestFingerprintParser,
+    parse_user_agent,
+    user_agent_cache_stats,
+)
 from smllr.shorturls.analytics import AnalyticsService
+from smllr.shorturls.clicks import ClickBuffer, ClickCounter, ClickStream
 from smllr.shorturls.forms import ShortURLForm
 from smllr.shorturls.helpers import generate_short_code
-from smllr.shorturls.models import ShortURL, ShortURLClick
+from smllr.shorturls.management.commands.ingest_clicks import (
+    Command as IngestClicksCommand,
+)
+from smllr.shorturls.models import (
+    Device,
+    Platform,
+    ShortURL,
+    ShortURLClick,
+    Source,
+)
+from smllr.shorturls.tasks import (
+    add_short_codes_to_filter,
+    invalidate_shorturl_cache_entries,
+    save_shorturl_click,
+)
+from smllr.shorturls.views import AsyncShortURLRedirectView, ShortURLRedirectView
 from smllr.users.models import User
 
 
@@ -53,22 +108,30 @@ class TestDataMixin:
         browser_name="Chrome",
         referrer="",
     ):
-        """Create a test Fingerprint."""
-        return Fingerprint.objects.create(
-            ip_address=ip_address,
-            device_type=device_type,
-            os=os,
-            browser_name=browser_name,
-            browser_version="91.0",
-            referrer=referrer,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            fingerprint_data={
+        """Create a test Fingerprint, or get the one with the same headers."""
+        # Stands in for a user agent the other fields would be parsed from
+        user_agent = f"Mozilla/5.0 ({os}; {device_type}) {browser_name}/91.0"
+        fingerprint, _ = Fingerprint.objects.get_or_create(
+            hash=Fingerprint.make_hash(
+                *Fingerprint.normalise(ip_address, user_agent, referrer)
+            ),
+            defaults={
                 "ip_address": ip_address,
-                "device_type": device_type,
-                "os": os,
-                "browser_name": browser_name,
+                "user_agent": UserAgent.objects.get_or_create(
+                    hash=UserAgent.make_hash(user_agent),
+                    defaults={"user_agent": user_agent, "browser_version": "91.0"},
+                )[0],
+                "referrer_domain": ReferrerDomain.objects.get_or_create(
+                    domain=ReferrerDomain.parse(referrer)
+                )[0]
+                if referrer
+                else None,
+                "device_type": DeviceType.from_name(device_type),
+                "os": OperatingSystem.from_name(os),
+                "browser": Browser.from_name(browser_name),
             },
         )
+        return fingerprint
 
     def create_click(self, short_url, fingerprint=None, clicked_at=None):
         """Create a test ShortURLClick."""
@@ -77,6 +140,11 @@ class TestDataMixin:
         click = ShortURLClick.objects.create(
             short_url=short_url,
             fingerprint=fingerprint,
+            **ShortURLClick.categorise(
+                fingerprint.os,
+                fingerprint.device_type,
+                getattr(fingerprint.referrer_domain, "domain", None),
+            ),
         )
         if clicked_at:
             click.clicked_at = clicked_at
@@ -204,6 +272,23 @@ class HttpRequestFingerprintParserTestCase(TestCase):
 
         self.assertEqual(result["ip_address"], "192.168.1.1")
 
+    def test_parser_caches_parsed_user_agents(self):
+        """Test each distinct user agent is parsed once."""
+        parse_user_agent.cache_clear()
+        ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+        with patch(
+            "smllr.fingerprint.parser.classify_user_agent",
+            wraps=classify_user_agent,
+        ) as classify:
+            for _ in range(3):
+                HttpRequestFingerprintParser(self.create_mock_request(ua)).parse()
+
+        classify.assert_called_once_with(ua)
+        stats = user_agent_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
 
 # =============================================================================
 # P0 CRITICAL: ShortURL Model Tests
@@ -350,6 +435,623 @@ class ShortURLModelTestCase(TestDataMixin, TestCase):
         self.assertEqual(str(shorturl), "My Test - abc123")
 
 
+# =============================================================================
+# P0 CRITICAL: ShortURL Cache Tests
+# =============================================================================
+
+
+class RedisConnectionFactoryTestCase(TestCase):
+    """Test the pooled Redis connection factory."""
+
+    def test_get_reuses_client(self):
+        """Test one client is shared within a process."""
+        self.assertIs(RedisConnectionFactory.get(), RedisConnectionFactory.get())
+
+    def test_pool_configured_from_settings(self):
+        """Test pool size and socket timeouts come from settings."""
+        pool = RedisConnectionFactory.get().connection_pool
+
+        self.assertEqual(pool.max_connections, settings.REDIS["max_connections"])
+        self.assertEqual(
+            pool.connection_kwargs["socket_timeout"], settings.REDIS["socket_timeout"]
+        )
+        self.assertEqual(
+            pool.connection_kwargs["socket_connect_timeout"],
+            settings.REDIS["socket_connect_timeout"],
+        )
+
+    def test_pool_reset_after_fork(self):
+        """Test a forked process doesn't reuse the parent's connections."""
+        connection = RedisConnectionFactory.get()
+        connection.ping()
+        self.assertGreater(RedisConnectionFactory.pool_stats()["created"], 0)
+
+        with patch("smllr.cache.os.getpid", return_value=os.getpid() + 1):
+            self.assertIs(RedisConnectionFactory.get(), connection)
+            self.assertEqual(RedisConnectionFactory.pool_stats()["created"], 0)
+
+        self.assertTrue(RedisConnectionFactory.get().ping())
+
+    def test_pool_stats_reports_connections_in_use(self):
+        """Test checked out connections are reported as in use."""
+        pool = RedisConnectionFactory.get().connection_pool
+        in_use = RedisConnectionFactory.pool_stats()["in_use"]
+
+        conn = pool.get_connection()
+        try:
+            self.assertEqual(RedisConnectionFactory.pool_stats()["in_use"], in_use + 1)
+        finally:
+            pool.release(conn)
+
+        self.assertEqual(RedisConnectionFactory.pool_stats()["in_use"], in_use)
+
+
+class ShortURLCacheTestCase(TestDataMixin, TestCase):
+    """Test keyed reads from the Redis short URL cache."""
+
+    def setUp(self):
+        self.cache = ShortURLCache(RedisConnectionFactory.get())
+        self.codes = ["cached1", "cached2", "my-code.v2"]
+
+    def tearDown(self):
+        for code in self.codes:
+            self.cache.connection.delete(f"shorturl:{code}")
+
+    def test_get_returns_cached_shorturl(self):
+        """Test a cached entry is read back by its short code."""
+        shorturl = self.create_shorturl(short_code="cached1")
+        self.cache.set(shorturl)
+
+        cached = self.cache.get("cached1")
+
+        self.assertIsInstance(cached, CachedShortURL)
+        self.assertEqual(cached.short_code, "cached1")
+        self.assertEqual(cached.destination_url, shorturl.destination_url)
+        self.assertIsNone(cached.expires_at)
+
+    def test_guest_entry_expires_with_link(self):
+        """Test cached guest links expire in Redis when the link expires."""
+        user = self.create_user(anonymous=True)
+        shorturl = self.create_shorturl(user=user, short_code="cached1")
+        self.cache.set(shorturl)
+
+        with self.assertNumQueries(0):
+            cached = self.cache.get("cached1")
+
+        self.assertEqual(cached.expires_at, shorturl.get_expires_at().timestamp())
+        self.assertAlmostEqual(
+            self.cache.connection.pttl("shorturl:cached1") / 1000,
+            shorturl.get_expires_at().timestamp() - time.time(),
+            delta=5,
+        )
+
+    def test_expired_guest_link_not_cached(self):
+        """Test expired guest links are never written to Redis."""
+        user = self.create_user(anonymous=True)
+        shorturl = self.create_shorturl(user=user, short_code="cached1")
+        shorturl.created_at = now() - timedelta(
+            days=settings.SHORTURL_EXPIRATION_TIME_DAYS + 1
+        )
+
+        self.cache.set(shorturl)
+
+        self.assertIsNone(self.cache.get("cached1"))
+
+    def test_permanent_entry_uses_cache_ttl(self):
+        """Test links that never expire are cached for SHORTURL_CACHE_TTL."""
+        shorturl = self.create_shorturl(short_code="cached1")
+
+        self.cache.set(shorturl)
+
+        ttl = self.cache.connection.ttl("shorturl:cached1")
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, settings.SHORTURL_CACHE_TTL)
+
+    def test_get_missing_code_returns_none(self):
+        """Test codes that aren't cached return None."""
+        self.assertIsNone(self.cache.get("cached2"))
+
+    def test_get_code_with_special_characters(self):
+        """Test codes with search tokenizer characters are looked up exactly."""
+        shorturl = self.create_shorturl(short_code="my-code.v2")
+        self.cache.set(shorturl)
+
+        cached = self.cache.get("my-code.v2")
+
+        self.assertEqual(cached.short_code, "my-code.v2")
+
+    def test_get_many_skips_missing_codes(self):
+        """Test pipelined reads return only the cached codes."""
+        shorturl = self.create_shorturl(short_code="cached1")
+        self.cache.set(shorturl)
+
+        cached = self.cache.get_many(["cached1", "cached2"])
+
+        self.assertEqual(list(cached.keys()), ["cached1"])
+        self.assertEqual(cached["cached1"].destination_url, shorturl.destination_url)
+
+    def test_init_sends_no_commands(self):
+        """Test building the cache doesn't talk to Redis."""
+        connection = Mock()
+
+        ShortURLCache(connection)
+
+        connection.ft.assert_not_called()
+        connection.execute_command.assert_not_called()
+
+    def test_create_index_keeps_existing_index(self):
+        """Test creating the index is a no-op once it exists."""
+        connection = MagicMock()
+
+        created = ShortURLCache(connection).create_index()
+
+        self.assertFalse(created)
+        connection.ft.return_value.create_index.assert_not_called()
+
+    @patch.object(ShortURLCache, "create_index", return_value=True)
+    def test_create_shorturl_index_command(self, mock_create_index):
+        """Test the management command creates the index."""
+        stdout = StringIO()
+
+        call_command("create_shorturl_index", stdout=stdout)
+
+        mock_create_index.assert_called_once()
+        self.assertIn("Created the ShortURL index", stdout.getvalue())
+
+
+class ShortCodeFilterTestCase(TestDataMixin, TestCase):
+    """Test rejecting unknown short codes without the database."""
+
+    def setUp(self):
+        self.code_filter = ShortCodeFilter.from_settings()
+
+    def tearDown(self):
+        self.code_filter.connection.delete(
+            self.code_filter.key,
+            self.code_filter._missing_key("unknown"),
+            self.code_filter._missing_key("filtered1"),
+        )
+
+    def test_unbuilt_filter_never_reports_missing(self):
+        """Test codes fall through to the database until the filter is built."""
+        self.assertFalse(self.code_filter.is_missing("unknown"))
+
+    def test_rebuilt_filter_rejects_unknown_codes(self):
+        """Test the rebuilt filter knows existing codes and rejects others."""
+        self.create_shorturl(short_code="filtered1")
+
+        call_command("rebuild_shorturl_filter", stdout=StringIO())
+
+        self.assertFalse(self.code_filter.is_missing("filtered1"))
+        self.assertTrue(self.code_filter.is_missing("unknown"))
+
+    def test_created_codes_are_added_to_filter(self):
+        """Test codes created after a rebuild are known to the filter."""
+        self.code_filter.rebuild([])
+
+        self.create_shorturl(short_code="filtered1")
+
+        self.assertFalse(self.code_filter.is_missing("filtered1"))
+
+    def test_negative_cache_cleared_on_create(self):
+        """Test creating a code drops its negative cache entry."""
+        self.code_filter.set_missing("filtered1")
+        self.assertTrue(self.code_filter.is_missing("filtered1"))
+
+        self.create_shorturl(short_code="filtered1")
+
+        self.assertFalse(self.code_filter.is_missing("filtered1"))
+
+    @patch.object(add_short_codes_to_filter, "apply_async")
+    def test_failed_add_is_retried_from_task(self, mock_apply_async):
+        """Test creating a code while Redis is down succeeds and adds it later."""
+        self.code_filter.rebuild([])
+
+        with (
+            patch.object(ShortCodeFilter, "add", side_effect=RedisError("down")),
+            self.assertLogs("smllr.shorturls.signals", "WARNING"),
+        ):
+            self.create_shorturl(short_code="filtered1")
+
+        mock_apply_async.assert_called_once_with((["filtered1"],), countdown=0)
+        self.assertTrue(self.code_filter.is_missing("filtered1"))
+
+        add_short_codes_to_filter(["filtered1"])
+
+        self.assertFalse(self.code_filter.is_missing("filtered1"))
+
+
+class LocalShortURLCacheTestCase(TestCase):
+    """Test the bounded in-process short URL cache."""
+
+    def record(self, short_code, expires_at=None):
+        return CachedShortURL(short_code, "https://example.com", expires_at)
+
+    def test_evicts_least_recently_used_over_max_entries(self):
+        """Test the least recently read entry is evicted first."""
+        cache = LocalShortURLCache(max_entries=2, max_bytes=1024 * 1024, ttl=60)
+        for code in ["first", "second"]:
+            cache.set(self.record(code))
+
+        cache.get("first")
+        cache.set(self.record("third"))
+
+        self.assertIsNone(cache.get("second"))
+        self.assertIsNotNone(cache.get("first"))
+        self.assertIsNotNone(cache.get("third"))
+
+    def test_evicts_over_max_bytes(self):
+        """Test entries are evicted once the memory limit is reached."""
+        cache = LocalShortURLCache(
+            max_entries=100,
+            max_bytes=LocalShortURLCache.entry_overhead * 2 + 100,
+            ttl=60,
+        )
+        for code in ["first", "second", "third"]:
+            cache.set(self.record(code))
+
+        self.assertEqual(list(cache.entries.keys()), ["second", "third"])
+        self.assertLessEqual(cache.size, cache.max_bytes)
+
+    def test_evicts_expired_entries(self):
+        """Test entries older than the TTL are dropped on read."""
+        cache = LocalShortURLCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+        cache.set(self.record("first"))
+
+        with patch("smllr.cache.time.monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get("first"))
+
+        self.assertEqual(cache.size, 0)
+
+    def test_skips_expired_guest_links(self):
+        """Test links past their expiry are never cached in-process."""
+        cache = LocalShortURLCache(max_entries=10, max_bytes=1024 * 1024, ttl=60)
+
+        cache.set(self.record("expired", expires_at=time.time() - 1))
+
+        self.assertIsNone(cache.get("expired"))
+
+
+class TieredShortURLCacheTestCase(TestDataMixin, TestCase):
+    """Test the in-process tier in front of Redis."""
+
+    def setUp(self):
+        self.cache = TieredShortURLCache.from_settings()
+
+    def tearDown(self):
+        self.cache.invalidate("tiered1")
+
+    def test_redis_hit_populates_local_tier(self):
+        """Test Redis hits are kept in-process and counted per tier."""
+        shorturl = self.create_shorturl(short_code="tiered1")
+        self.cache.remote.set(shorturl)
+
+        self.cache.get("tiered1")
+        self.cache.get("tiered1")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["local"]["hits"], 1)
+        self.assertEqual(stats["local"]["misses"], 1)
+        self.assertEqual(stats["redis"]["hits"], 1)
+        self.assertEqual(stats["local"]["entries"], 1)
+
+    def test_invalidate_propagates_to_other_workers(self):
+        """Test invalidations reach the in-process tier of other caches."""
+        other_worker = TieredShortURLCache.from_settings()
+        shorturl = self.create_shorturl(short_code="tiered1")
+        self.cache.set(shorturl)
+        other_worker.get("tiered1")
+
+        self.cache.invalidate("tiered1")
+
+        for _ in range(100):
+            if other_worker.local.get("tiered1") is None:
+                break
+            time.sleep(0.01)
+
+        self.assertIsNone(other_worker.local.get("tiered1"))
+        self.assertIsNone(other_worker.get("tiered1"))
+
+    def test_concurrent_misses_load_once(self):
+        """Test parallel misses for the same code run a single DB load."""
+        shorturl = ShortURL(
+            user=User(pk=1, is_guest_user=False),
+            destination_url="https://example.com",
+            short_code="tiered1",
+            created_at=now(),
+        )
+        loads = []
+        workers = 20
+        barrier = threading.Barrier(workers)
+
+        def loader(short_code):
+            loads.append(short_code)
+            time.sleep(0.1)
+            return shorturl
+
+        def miss():
+            barrier.wait()
+            return self.cache.load("tiered1", loader)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda _: miss(), range(workers)))
+
+        self.assertEqual(len(loads), 1)
+        self.assertTrue(
+            all(r.destination_url == shorturl.destination_url for r in results)
+        )
+
+
+class ShortURLCacheInvalidationTestCase(TestDataMixin, TestCase):
+    """Test model changes invalidate the redirect cache."""
+
+    def setUp(self):
+        self.cache = ShortURLRedirectView.cache
+        self.shorturl = self.create_shorturl(short_code="inval1")
+        self.cache.set(self.shorturl)
+        patcher = patch.object(invalidate_shorturl_cache_entries, "apply_async")
+        self.delayed_invalidation = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for short_code in ["inval1", "inval2"]:
+            self.cache.invalidate(short_code)
+
+    def assertNotCached(self, short_code):
+        self.assertIsNone(self.cache.local.get(short_code))
+        self.assertIsNone(self.cache.remote.get(short_code))
+
+    def test_save_invalidates_entry(self):
+        """Test editing the destination drops the cached entry."""
+        self.shorturl.destination_url = "https://example.org"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shorturl.save()
+
+        self.assertNotCached("inval1")
+
+    def test_short_code_change_invalidates_old_code(self):
+        """Test renaming a code drops the old entry and makes the new one known."""
+        code_filter = self.cache.code_filter
+        code_filter.rebuild(["inval1"])
+        self.addCleanup(code_filter.connection.delete, code_filter.key)
+        self.shorturl.short_code = "inval2"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shorturl.save()
+
+        self.assertNotCached("inval1")
+        self.assertFalse(code_filter.is_missing("inval2"))
+
+    def test_delete_invalidates_entry(self):
+        """Test deleting a short URL drops the cached entry."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shorturl.delete()
+
+        self.assertNotCached("inval1")
+
+    def test_user_delete_invalidates_entries(self):
+        """Test short URLs removed by a cascading user delete are dropped."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shorturl.user.delete()
+
+        self.assertNotCached("inval1")
+
+    def test_bulk_update_invalidates_entries(self):
+        """Test queryset updates drop the entries of the updated rows."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ShortURL.objects.filter(short_code="inval1").update(
+                destination_url="https://example.org"
+            )
+
+        self.assertNotCached("inval1")
+
+    def test_invalidation_ignores_open_circuit(self):
+        """Test entries are dropped even while the circuit breaker is open."""
+        self.shorturl.destination_url = "https://example.org"
+
+        with (
+            patch.object(CircuitBreaker, "_check_open", side_effect=CircuitOpenError),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.shorturl.save()
+
+        self.assertNotCached("inval1")
+
+    def test_entry_dropped_again_after_delay(self):
+        """Test an entry cached from the old row after the commit is dropped."""
+        stale = ShortURL.objects.get(pk=self.shorturl.pk)
+        self.shorturl.destination_url = "https://example.org"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shorturl.save()
+        # A miss that read the row before the commit fills the cache after it
+        self.cache.set(stale)
+
+        self.delayed_invalidation.assert_called_once_with(
+            (["inval1"],), countdown=settings.SHORTURL_CACHE_INVALIDATION_DELAY
+        )
+        invalidate_shorturl_cache_entries(["inval1"])
+
+        self.assertNotCached("inval1")
+
+    def test_failed_invalidation_is_retried_from_task(self):
+        """Test a delete that fails leaves the save alone and is retried."""
+        self.shorturl.destination_url = "https://example.org"
+
+        with (
+            patch.object(self.cache.remote, "delete", side_effect=RedisError("down")),
+            self.assertLogs("smllr.shorturls.signals", "WARNING"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            self.shorturl.save()
+
+        self.assertIsNotNone(self.cache.remote.get("inval1"))
+        self.delayed_invalidation.assert_called_once()
+        invalidate_shorturl_cache_entries(["inval1"])
+
+        self.assertNotCached("inval1")
+
+    def test_click_count_update_keeps_entry(self):
+        """Test saving only the click count doesn't touch the cache."""
+        with (
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+            self.assertNumQueries(1),
+        ):
+            self.shorturl.increment_clicks()
+
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(self.cache.remote.get("inval1"))
+
+
+class ShortURLCacheWarmupTestCase(TestDataMixin, TestCase):
+    """Test warming the redirect cache with the hottest links."""
+
+    def setUp(self):
+        self.user = self.create_user()
+        self.other_user = self.create_user(username="other", email="other@test.com")
+        self.popular = self.create_shorturl(user=self.user, short_code="warm1")
+        self.trending = self.create_shorturl(user=self.user, short_code="warm2")
+        self.other = self.create_shorturl(user=self.other_user, short_code="warm3")
+        ShortURL.objects.filter(pk=self.popular.pk).update(clicks=100)
+        for _ in range(2):
+            self.create_click(self.trending)
+
+    def tearDown(self):
+        for short_code in ["warm1", "warm2", "warm3", "warm4"]:
+            ShortURLRedirectView.cache.invalidate(short_code)
+        remote = ShortURLRedirectView.cache.remote
+        remote.connection.delete(remote.hottest_key)
+
+    def test_hottest_ranks_recent_clicks_first(self):
+        """Test links are ranked by recent clicks, then by total clicks."""
+        codes = list(ShortURL.objects.hottest().values_list("short_code", flat=True))
+
+        self.assertEqual(codes, ["warm2", "warm1", "warm3"])
+
+    def test_hottest_skips_expired_guest_links(self):
+        """Test expired guest links are not warmed."""
+        guest = self.create_user(anonymous=True)
+        expired = self.create_shorturl(user=guest, short_code="warm4")
+        ShortURL.objects.filter(pk=expired.pk).update(
+            created_at=now()
+            - timedelta(days=settings.SHORTURL_EXPIRATION_TIME_DAYS + 1)
+        )
+
+        self.assertNotIn(
+            "warm4", ShortURL.objects.hottest().values_list("short_code", flat=True)
+        )
+
+    def test_hottest_caps_links_per_user(self):
+        """Test only the top links of each user are kept."""
+        codes = list(
+            ShortURL.objects.hottest(per_user=1).values_list("short_code", flat=True)
+        )
+
+        self.assertEqual(codes, ["warm2", "warm3"])
+
+    def test_command_writes_entries_to_redis(self):
+        """Test the command caches the top links in Redis."""
+        stdout = StringIO()
+
+        call_command("warm_shorturl_cache", "--limit", "2", stdout=stdout)
+
+        remote = ShortURLRedirectView.cache.remote
+        self.assertEqual(
+            list(remote.get_many(["warm1", "warm2", "warm3"])), ["warm1", "warm2"]
+        )
+        self.assertEqual(remote.hottest(10), ["warm2", "warm1"])
+        self.assertIn("Warmed 2 entries", stdout.getvalue())
+        self.assertIn("entries/s", stdout.getvalue())
+
+    def test_preload_fills_local_tier(self):
+        """Test workers preload the ranked links from Redis, not the database."""
+        call_command("warm_shorturl_cache", stdout=StringIO())
+        cache = TieredShortURLCache.from_settings()
+
+        with self.assertNumQueries(0):
+            count = cache.preload(2, batch_size=1)
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            cache.local.get("warm1").destination_url, self.popular.destination_url
+        )
+        self.assertIsNone(cache.local.get("warm3"))
+
+    def test_preload_without_ranking_loads_nothing(self):
+        """Test workers boot with an empty tier before the command has run."""
+        cache = TieredShortURLCache.from_settings()
+
+        self.assertEqual(cache.preload(10), 0)
+
+
+class CircuitBreakerTestCase(TestCase):
+    """Test the circuit breaker around Redis calls."""
+
+    def setUp(self):
+        self.probe = Mock()
+        self.breaker = CircuitBreaker(
+            self.probe, failure_threshold=3, latency_budget=0.05, recovery_interval=0.01
+        )
+
+    def fail(self):
+        raise RedisError("down")
+
+    def trip(self):
+        self.probe.side_effect = RedisError("still down")
+        for _ in range(3):
+            with self.assertRaises(RedisError):
+                self.breaker.call(self.fail)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens once the failure threshold is reached."""
+        self.trip()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.stats()["transitions"], {"closed_to_open": 1})
+
+    def test_open_circuit_fails_fast(self):
+        """Test calls are not attempted while the circuit is open."""
+        self.trip()
+        fn = Mock()
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(fn)
+
+        fn.assert_not_called()
+
+    def test_slow_calls_count_as_failures(self):
+        """Test calls over the latency budget trip the circuit."""
+        self.probe.side_effect = RedisError("still down")
+        for _ in range(3):
+            self.breaker.call(time.sleep, 0.06)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_success_resets_failures(self):
+        """Test only consecutive failures trip the circuit."""
+        for _ in range(2):
+            with self.assertRaises(RedisError):
+                self.breaker.call(self.fail)
+        self.breaker.call(Mock())
+
+        self.assertEqual(self.breaker.stats()["failures"], 0)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_probe_closes_circuit(self):
+        """Test the circuit closes once the background probe succeeds."""
+        self.trip()
+        self.probe.side_effect = None
+
+        for _ in range(100):
+            if self.breaker.state == CircuitBreaker.CLOSED:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.stats()["transitions"]["open_to_closed"], 1)
+
+
 # =============================================================================
 # P0 CRITICAL: ShortURL Views Tests
 # =============================================================================
@@ -361,8 +1063,14 @@ class ShortURLRedirectViewTestCase(TestDataMixin, TestCase):
     def setUp(self):
         self.client = Client()
 
-    @patch("smllr.shorturls.views.save_shorturl_click")
-    def test_redirect_success(self, mock_task):
+    def tearDown(self):
+        for short_code in ShortURL.objects.values_list("short_code", flat=True):
+            ShortURLRedirectView.cache.invalidate(short_code)
+        code_filter = ShortURLRedirectView.cache.code_filter
+        code_filter.connection.delete(code_filter._missing_key("nonexistent"))
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_redirect_success(self, mock_buffer):
         """Test successful redirect to destination URL."""
         shorturl = self.create_shorturl(short_code="test123")
 
@@ -376,8 +1084,31 @@ class ShortURLRedirectViewTestCase(TestDataMixin, TestCase):
         response = self.client.get("/nonexistent")
         self.assertEqual(response.status_code, 404)
 
-    @patch("smllr.shorturls.views.save_shorturl_click")
-    def test_redirect_expired_url(self, mock_task):
+    def test_redirect_unknown_code_skips_database(self):
+        """Test codes rejected by the filter 404 without a ShortURL query."""
+        code_filter = ShortURLRedirectView.cache.code_filter
+        code_filter.rebuild([])
+        self.addCleanup(code_filter.connection.delete, code_filter.key)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/nonexistent")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(any("shorturls_shorturl" in query["sql"] for query in queries))
+
+    def test_redirect_unknown_code_is_negatively_cached(self):
+        """Test repeated lookups for a missing code only query once."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/nonexistent")
+            response = self.client.get("/nonexistent")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            len([q for q in queries if "shorturls_shorturl" in q["sql"]]), 1
+        )
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_redirect_expired_url(self, mock_buffer):
         """Test 404 for expired URLs."""
         user = self.create_user(anonymous=True)
         shorturl = self.create_shorturl(user=user, short_code="expired")
@@ -391,15 +1122,196 @@ class ShortURLRedirectViewTestCase(TestDataMixin, TestCase):
         response = self.client.get(f"/{shorturl.short_code}")
         self.assertEqual(response.status_code, 404)
 
-    @patch("smllr.shorturls.views.save_shorturl_click")
-    def test_redirect_increments_clicks_async(self, mock_task):
-        """Test Celery task is queued for click recording."""
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_redirect_increments_clicks_async(self, mock_buffer):
+        """Test the click is buffered for recording."""
         shorturl = self.create_shorturl(short_code="test123")
 
         self.client.get(f"/{shorturl.short_code}")
 
-        # Verify task was called
-        mock_task.delay.assert_called_once()
+        # Verify the click was buffered
+        mock_buffer.push.assert_called_once()
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_redirect_cache_hit_runs_no_queries(self, mock_buffer):
+        """Test cached redirects are resolved without database queries."""
+        shorturl = self.create_shorturl(short_code="test123")
+        ShortURLRedirectView.cache.set(shorturl)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/{shorturl.short_code}")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, shorturl.destination_url)
+        mock_buffer.push.assert_called_once()
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_redirect_served_from_database_when_redis_is_down(self, mock_buffer):
+        """Test redirects keep working while Redis is unreachable."""
+        shorturl = self.create_shorturl(short_code="test123")
+        unreachable = Redis(port=1, socket_connect_timeout=0.05)
+        cache = TieredShortURLCache(
+            LocalShortURLCache(max_entries=10, max_bytes=1024 * 1024, ttl=60),
+            ShortURLCache(unreachable),
+            ShortCodeFilter(
+                unreachable, capacity=100, error_rate=0.01, negative_ttl=30
+            ),
+            CircuitBreaker(
+                unreachable.ping,
+                failure_threshold=2,
+                latency_budget=0.05,
+                recovery_interval=60,
+            ),
+        )
+
+        with patch.object(ShortURLRedirectView, "cache", cache):
+            for _ in range(3):
+                response = self.client.get(f"/{shorturl.short_code}")
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(response.url, shorturl.destination_url)
+
+        self.assertEqual(cache.breaker.state, CircuitBreaker.OPEN)
+        # The circuit opened on the first cache lookup, so no click waited on
+        # Redis either
+        mock_buffer.push.assert_not_called()
+
+
+class AsyncShortURLRedirectViewTestCase(TestDataMixin, TestCase):
+    """Test the async redirect view behaves like the sync one."""
+
+    def tearDown(self):
+        for short_code in ShortURL.objects.values_list("short_code", flat=True):
+            ShortURLRedirectView.cache.invalidate(short_code)
+        code_filter = ShortURLRedirectView.cache.code_filter
+        code_filter.connection.delete(code_filter._missing_key("nonexistent"))
+
+    async def get(self, short_code):
+        request = AsyncRequestFactory().get(f"/{short_code}")
+        request.user = AnonymousUser()
+        request.fingerprint = get_request_fingerprint(request)
+        return await AsyncShortURLRedirectView.as_view()(request, short_code=short_code)
+
+    @patch("smllr.shorturls.views.click_buffer", new_callable=AsyncMock)
+    async def test_redirect_success(self, mock_buffer):
+        """Test successful redirect to destination URL."""
+        shorturl = await sync_to_async(self.create_shorturl)(short_code="test123")
+
+        response = await self.get(shorturl.short_code)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, shorturl.destination_url)
+        mock_buffer.apush.assert_awaited_once()
+
+    async def test_redirect_nonexistent_code(self):
+        """Test 404 for invalid short codes."""
+        response = await self.get("nonexistent")
+        self.assertEqual(response.status_code, 404)
+
+    @patch("smllr.shorturls.views.click_buffer", new_callable=AsyncMock)
+    async def test_redirect_expired_url(self, mock_buffer):
+        """Test 404 for expired URLs."""
+        user = await sync_to_async(self.create_user)(anonymous=True)
+        shorturl = await sync_to_async(self.create_shorturl)(
+            user=user, short_code="expired"
+        )
+        shorturl.created_at = now() - timedelta(
+            days=settings.SHORTURL_EXPIRATION_TIME_DAYS + 1
+        )
+        await shorturl.asave()
+
+        response = await self.get(shorturl.short_code)
+
+        self.assertEqual(response.status_code, 404)
+        mock_buffer.apush.assert_not_awaited()
+
+    @patch("smllr.shorturls.views.click_buffer", new_callable=AsyncMock)
+    async def test_click_dropped_while_circuit_is_open(self, mock_buffer):
+        """Test clicks skip Redis while its circuit breaker is open."""
+        shorturl = await sync_to_async(self.create_shorturl)(short_code="test123")
+
+        with patch.object(CircuitBreaker, "_check_open", side_effect=CircuitOpenError):
+            response = await self.get(shorturl.short_code)
+
+        self.assertEqual(response.status_code, 302)
+        mock_buffer.apush.assert_not_called()
+
+    async def test_listener_started_off_event_loop(self):
+        """Test a process not yet listening subscribes from another thread."""
+        threads = []
+
+        with (
+            patch.object(TieredShortURLCache, "listening", False),
+            patch.object(
+                TieredShortURLCache,
+                "start_listener",
+                side_effect=lambda: threads.append(threading.get_ident()),
+            ),
+        ):
+            await AsyncShortURLRedirectView.cache.get("nonexistent")
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    @patch("smllr.shorturls.views.click_buffer", new_callable=AsyncMock)
+    async def test_redirect_cache_hit(self, mock_buffer):
+        """Test cached redirects are served and recorded."""
+        shorturl = await sync_to_async(self.create_shorturl)(short_code="test123")
+        await AsyncShortURLRedirectView.cache.set(shorturl)
+        ShortURLRedirectView.cache.local.clear()
+
+        response = await self.get(shorturl.short_code)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, shorturl.destination_url)
+        mock_buffer.apush.assert_awaited_once()
+
+
+@override_settings(SHORTURL_FAST_REDIRECT=True)
+class ShortURLFastRedirectMiddlewareTestCase(TestDataMixin, TestCase):
+    """Test cached redirects served ahead of the middleware stack."""
+
+    def setUp(self):
+        self.client = Client()
+
+    def tearDown(self):
+        ShortURLRedirectView.cache.invalidate("fast123")
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_cached_redirect_skips_view(self, mock_buffer):
+        """Test cache hits are redirected without reaching the view."""
+        shorturl = self.create_shorturl(short_code="fast123")
+        ShortURLRedirectView.cache.set(shorturl)
+
+        with patch.object(ShortURLRedirectView, "get") as mock_get:
+            response = self.client.get("/fast123")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, shorturl.destination_url)
+        mock_get.assert_not_called()
+        mock_buffer.push.assert_called_once()
+
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_cache_miss_falls_through_to_view(self, mock_buffer):
+        """Test uncached codes are handled by the redirect view."""
+        shorturl = self.create_shorturl(short_code="fast123")
+
+        response = self.client.get("/fast123")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, shorturl.destination_url)
+        mock_buffer.push.assert_called_once()
+
+    @override_settings(SHORTURL_FAST_REDIRECT=False)
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_disabled_by_default(self, mock_buffer):
+        """Test cached redirects go through the view unless enabled."""
+        shorturl = self.create_shorturl(short_code="fast123")
+        ShortURLRedirectView.cache.set(shorturl)
+
+        response = self.client.get("/fast123")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNotNone(response.wsgi_request.resolver_match)
 
 
 class ShortURLFormViewTestCase(TestDataMixin, TestCase):
@@ -599,6 +1511,43 @@ class AnalyticsServiceTestCase(TestDataMixin, TestCase):
 
         self.assertEqual(len(analytics["latest_clicks"]), 50)
 
+    def test_platform_analytics_detects_android(self):
+        """Test Linux on a phone or tablet is counted as Android."""
+        shorturl = self.create_shorturl()
+
+        self.create_click(
+            shorturl, self.create_fingerprint(os="Linux", device_type="Mobile")
+        )
+        self.create_click(shorturl, self.create_fingerprint(os="Linux"))
+
+        platform = AnalyticsService(shorturl).get_comprehensive_analytics()[
+            "clicks_by_platform"
+        ]
+        self.assertEqual(platform["android"], 1)
+        self.assertEqual(platform["linux"], 1)
+
+    def test_source_analytics_lists_other_referrers(self):
+        """Test referrers that aren't a known source are listed by domain."""
+        shorturl = self.create_shorturl()
+
+        self.create_click(
+            shorturl, self.create_fingerprint(referrer="https://www.example.com/a")
+        )
+        self.create_click(
+            shorturl, self.create_fingerprint(referrer="https://example.com/b")
+        )
+        self.create_click(
+            shorturl, self.create_fingerprint(referrer="https://www.google.com/")
+        )
+
+        source = AnalyticsService(shorturl).get_comprehensive_analytics()[
+            "clicks_by_source"
+        ]
+        self.assertEqual(source["search_engines"]["google"], 1)
+        self.assertEqual(
+            source["other_referrers"], [{"referrer": "example.com", "clicks": 2}]
+        )
+
     def test_analytics_with_no_clicks(self):
         """Test analytics with zero clicks returns valid structure."""
         shorturl = self.create_shorturl()
@@ -811,6 +1760,30 @@ class ShortURLClickModelTestCase(TestDataMixin, TestCase):
         self.assertEqual(click.short_url, shorturl)
         self.assertEqual(click.fingerprint, fingerprint)
 
+    def test_backfill_click_categories(self):
+        """Test the backfill command classifies clicks saved without categories."""
+        shorturl = self.create_shorturl()
+        click = ShortURLClick.objects.create(
+            short_url=shorturl,
+            fingerprint=self.create_fingerprint(
+                os="Macintosh", referrer="https://www.facebook.com/"
+            ),
+        )
+        unclassified = ShortURLClick.objects.create(short_url=shorturl)
+
+        stdout = StringIO()
+        call_command("backfill_click_categories", stdout=stdout)
+
+        click.refresh_from_db()
+        self.assertEqual(click.platform, Platform.MACOS)
+        self.assertEqual(click.device, Device.DESKTOP)
+        self.assertEqual(click.source, Source.FACEBOOK)
+        self.assertIn("Updated 1 of 1 clicks", stdout.getvalue())
+
+        unclassified.refresh_from_db()
+        self.assertEqual(unclassified.platform, Platform.UNKNOWN)
+        self.assertEqual(unclassified.source, Source.DIRECT)
+
     def test_click_cascade_delete(self):
         """Test clicks are deleted when ShortURL is deleted."""
         shorturl = self.create_shorturl()
@@ -827,6 +1800,493 @@ class ShortURLClickModelTestCase(TestDataMixin, TestCase):
         self.assertFalse(ShortURLClick.objects.filter(pk=click.pk).exists())
 
 
+class ClickCounterTestCase(TestDataMixin, TestCase):
+    """Test click counts kept in Redis and flushed to the database."""
+
+    def setUp(self):
+        self.counter = ClickCounter.from_settings()
+        self.user = self.create_user()
+
+    def tearDown(self):
+        self.counter.connection.delete(
+            self.counter.key, self.counter.flushing_key, self.counter.lock_key
+        )
+
+    def test_concurrent_clicks_are_counted_exactly(self):
+        """Test clicks counted while flushes run are neither lost nor doubled."""
+        shorturl = self.create_shorturl(user=self.user, short_code="count1")
+        workers, clicks = 10, 200
+
+        def click(_):
+            for _ in range(clicks):
+                self.counter.incr("count1")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(click, worker) for worker in range(workers)]
+            flushed = 0
+            while not all(future.done() for future in futures):
+                flushed += self.counter.flush()
+        flushed += self.counter.flush()
+
+        shorturl.refresh_from_db()
+        self.assertEqual(flushed, workers * clicks)
+        self.assertEqual(shorturl.clicks, workers * clicks)
+
+    def test_flush_applies_counts_in_batches(self):
+        """Test every link gets its own count when flushed in several batches."""
+        self.counter.batch_size = 2
+        shorturls = [
+            self.create_shorturl(user=self.user, short_code=f"count{i}")
+            for i in range(5)
+        ]
+        self.counter.incr_many({f"count{i}": i + 1 for i in range(5)})
+
+        with self.assertNumQueries(3):
+            self.assertEqual(self.counter.flush(), 15)
+
+        for i, shorturl in enumerate(shorturls):
+            shorturl.refresh_from_db()
+            self.assertEqual(shorturl.clicks, i + 1)
+
+    def test_flush_resumes_interrupted_flush(self):
+        """Test counts left behind by a failed flush are applied first."""
+        shorturl = self.create_shorturl(user=self.user, short_code="count1")
+        self.counter.incr("count1", 3)
+
+        with (
+            patch.object(ClickCounter, "_apply", side_effect=DatabaseError("DB down")),
+            self.assertRaises(DatabaseError),
+        ):
+            self.counter.flush()
+
+        self.counter.incr("count1", 2)
+        self.assertEqual(self.counter.flush(), 3)
+        self.assertEqual(self.counter.flush(), 2)
+
+        shorturl.refresh_from_db()
+        self.assertEqual(shorturl.clicks, 5)
+
+    def test_counts_are_taken_before_they_are_applied(self):
+        """Test a flush that dies after its UPDATE can't apply counts twice."""
+        self.create_shorturl(user=self.user, short_code="count1")
+        self.counter.incr("count1", 3)
+
+        def apply(batch):
+            self.assertEqual(batch, [("count1", 3)])
+            self.assertIsNone(
+                self.counter.connection.hget(self.counter.flushing_key, "count1")
+            )
+
+        with patch.object(ClickCounter, "_apply", side_effect=apply):
+            self.assertEqual(self.counter.flush(), 3)
+
+    def test_flush_keeps_lock_taken_over_by_another_flush(self):
+        """Test a flush that outlived its lock doesn't release the next one's."""
+        self.create_shorturl(user=self.user, short_code="count1")
+        self.counter.incr("count1")
+
+        def apply(batch):
+            # The lock expired and another flush took it
+            self.counter.connection.set(self.counter.lock_key, "other")
+
+        with (
+            patch.object(ClickCounter, "_apply", side_effect=apply),
+            self.assertLogs("smllr.shorturls.clicks", "WARNING"),
+        ):
+            self.counter.flush()
+
+        self.assertEqual(self.counter.connection.get(self.counter.lock_key), b"other")
+
+    def test_save_click_task_counts_in_redis(self):
+        """Test the click task counts the click without updating the row."""
+        shorturl = self.create_shorturl(user=self.user, short_code="count1")
+
+        save_shorturl_click("count1", self.create_fingerprint().pk)
+
+        shorturl.refresh_from_db()
+        self.assertEqual(shorturl.clicks, 0)
+        self.assertEqual(
+            int(self.counter.connection.hget(self.counter.key, "count1")), 1
+        )
+
+
+CLICK_HEADERS = (
+    "203.0.113.7",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15",
+    "https://google.com",
+)
+
+
+class ClickBufferTestCase(TestDataMixin, TestCase):
+    """Test clicks buffered in Redis and saved in batches."""
+
+    def setUp(self):
+        self.buffer = ClickBuffer.from_settings()
+        self.buffer.batch_size = 3
+        self.shorturl = self.create_shorturl(short_code="buffer1")
+
+    def tearDown(self):
+        counter = self.buffer.counter
+        self.buffer.connection.delete(
+            self.buffer.key,
+            self.buffer.processing_key,
+            self.buffer.dead_letter_key,
+            self.buffer.lock_key,
+            counter.key,
+        )
+
+    def test_drain_saves_clicks_in_batches(self):
+        """Test buffered clicks are bulk inserted and counted."""
+        for _ in range(5):
+            self.buffer.push("buffer1", CLICK_HEADERS)
+
+        # The first batch inserts the fingerprint along with its user agent and
+        # referrer domain, the second only looks it up. Each batch is saved in
+        # a savepoint.
+        with self.assertNumQueries(20):
+            self.assertEqual(self.buffer.drain(), 5)
+
+        self.assertEqual(
+            ShortURLClick.objects.filter(short_url=self.shorturl).count(), 5
+        )
+        self.assertEqual(
+            int(self.buffer.connection.hget(self.buffer.counter.key, "buffer1")), 5
+        )
+
+    def test_drain_keeps_click_time(self):
+        """Test clicks keep the time they were buffered at."""
+        clicked_at = time.time() - 60
+        with patch("smllr.shorturls.clicks.time.time", return_value=clicked_at):
+            self.buffer.push("buffer1", CLICK_HEADERS)
+
+        self.buffer.drain()
+
+        click = ShortURLClick.objects.get(short_url=self.shorturl)
+        self.assertAlmostEqual(click.clicked_at.timestamp(), clicked_at, places=3)
+
+    def test_drain_saves_parsed_fingerprint(self):
+        """Test the worker parses and saves the fingerprint of each click."""
+        self.buffer.push("buffer1", CLICK_HEADERS)
+
+        self.buffer.drain()
+
+        fingerprint = ShortURLClick.objects.get(short_url=self.shorturl).fingerprint
+        self.assertEqual(fingerprint.ip_address, "203.0.113.7")
+        self.assertEqual(fingerprint.device_type, DeviceType.MOBILE)
+        self.assertEqual(fingerprint.referrer_domain.domain, "google.com")
+
+    def test_drain_categorises_clicks(self):
+        """Test the worker stores the platform, device and source of clicks."""
+        self.buffer.push("buffer1", CLICK_HEADERS)
+
+        self.buffer.drain()
+
+        click = ShortURLClick.objects.get(short_url=self.shorturl)
+        self.assertEqual(click.platform, Platform.IOS)
+        self.assertEqual(click.device, Device.MOBILE)
+        self.assertEqual(click.source, Source.GOOGLE)
+
+    def test_drain_caches_dimension_ids(self):
+        """Test new fingerprints reuse user agent and referrer ids seen before."""
+        user_agent_ids.clear()
+        referrer_domain_ids.clear()
+        self.addCleanup(user_agent_ids.clear)
+        self.addCleanup(referrer_domain_ids.clear)
+
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.drain()
+        self.buffer.push("buffer1", ("203.0.113.8", *CLICK_HEADERS[1:]))
+
+        # No user agent or referrer domain queries this time
+        with self.assertNumQueries(8):
+            self.assertEqual(self.buffer.drain(), 1)
+
+        self.assertEqual(UserAgent.objects.count(), 1)
+        self.assertEqual(user_agent_ids.stats()["hits"], 1)
+        self.assertEqual(
+            Fingerprint.objects.filter(user_agent__isnull=False).count(), 2
+        )
+
+    def test_drain_saves_overlong_headers(self):
+        """Test headers longer than their columns are cut rather than failing."""
+        user_agent = "Mozilla/5.0 (X11; Linux x86_64) Firefox/" + "9" * 300
+        referrer = "https://" + "a" * 600 + ".com/"
+        self.buffer.push("buffer1", ("203.0.113.7", user_agent, referrer))
+
+        self.assertEqual(self.buffer.drain(), 1)
+
+        fingerprint = ShortURLClick.objects.get(short_url=self.shorturl).fingerprint
+        self.assertEqual(fingerprint.browser, Browser.FIREFOX)
+        self.assertEqual(fingerprint.user_agent.browser_version, "9" * 100)
+        self.assertEqual(len(fingerprint.referrer_domain.domain), 253)
+        self.assertEqual(self.buffer.connection.llen(self.buffer.key), 0)
+
+    def test_drain_reuses_fingerprints(self):
+        """Test repeated clicks from one visitor share a single fingerprint."""
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        self.buffer.push("buffer1", (" 203.0.113.7", *CLICK_HEADERS[1:]))
+        self.buffer.push("buffer1", ("198.51.100.1", *CLICK_HEADERS[1:]))
+        self.buffer.drain()
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        self.buffer.drain()
+
+        self.assertEqual(Fingerprint.objects.count(), 2)
+        self.assertEqual(
+            ShortURLClick.objects.filter(fingerprint__ip_address="203.0.113.7").count(),
+            3,
+        )
+
+    def test_drain_saves_legacy_clicks(self):
+        """Test clicks queued with a saved fingerprint's id reuse it."""
+        fingerprint = self.create_fingerprint()
+        self.buffer.connection.rpush(
+            self.buffer.key,
+            json.dumps(
+                {"code": "buffer1", "fingerprint_id": fingerprint.pk, "at": time.time()}
+            ),
+        )
+        self.buffer.push("buffer1", CLICK_HEADERS)
+
+        self.assertEqual(self.buffer.drain(), 2)
+        self.assertEqual(
+            ShortURLClick.objects.filter(fingerprint=fingerprint).count(), 1
+        )
+
+    def test_drain_skips_deleted_links(self):
+        """Test clicks on links deleted since are dropped."""
+        self.buffer.push("deleted", CLICK_HEADERS)
+        self.buffer.push("buffer1", CLICK_HEADERS)
+
+        self.assertEqual(self.buffer.drain(), 1)
+
+    def test_failed_batch_stays_processing(self):
+        """Test a batch that can't be saved is saved first by the next drain."""
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        self.buffer.push("deleted", CLICK_HEADERS)
+        entries = self.buffer.connection.lrange(self.buffer.key, 0, -1)
+
+        with (
+            patch.object(ClickBuffer, "save", side_effect=OperationalError("DB down")),
+            self.assertRaises(OperationalError),
+        ):
+            self.buffer.drain()
+
+        connection = self.buffer.connection
+        self.assertEqual(connection.lrange(self.buffer.processing_key, 0, -1), entries)
+        self.buffer.push("buffer1", ("198.51.100.1", *CLICK_HEADERS[1:]))
+
+        self.assertEqual(self.buffer.drain(), 2)
+        self.assertEqual(
+            list(
+                ShortURLClick.objects.order_by("pk").values_list(
+                    "fingerprint__ip_address", flat=True
+                )
+            ),
+            ["203.0.113.7", "198.51.100.1"],
+        )
+        self.assertFalse(connection.exists(self.buffer.processing_key))
+
+    def test_batch_survives_redis_outage(self):
+        """Test clicks taken before Redis went down aren't lost."""
+        for _ in range(2):
+            self.buffer.push("buffer1", CLICK_HEADERS)
+
+        connection = self.buffer.connection
+        with (
+            patch.object(ClickBuffer, "save", side_effect=RedisError("Redis down")),
+            patch.object(connection, "lpush", side_effect=RedisError("Redis down")),
+            patch.object(connection, "ltrim", side_effect=RedisError("Redis down")),
+            self.assertRaises(RedisError),
+        ):
+            self.buffer.drain()
+
+        self.assertEqual(self.buffer.drain(), 2)
+        self.assertEqual(
+            ShortURLClick.objects.filter(short_url=self.shorturl).count(), 2
+        )
+
+    def test_drain_skipped_while_another_runs(self):
+        """Test only one drain at a time takes clicks."""
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        lock = self.buffer.connection.lock(self.buffer.lock_key, timeout=5)
+        lock.acquire()
+
+        with self.assertLogs("smllr.shorturls.clicks", "INFO"):
+            self.assertEqual(self.buffer.drain(), 0)
+        lock.release()
+
+        self.assertEqual(self.buffer.connection.llen(self.buffer.key), 1)
+        self.assertEqual(self.buffer.drain(), 1)
+
+    def test_rejected_click_is_dead_lettered(self):
+        """Test a click that can't be saved doesn't hold up the others."""
+        rejected = json.dumps(
+            {
+                "code": "buffer1",
+                "ip": "203.0.113.8",
+                "ua": CLICK_HEADERS[1],
+                "referrer": "",
+                "at": "yesterday",
+            }
+        ).encode()
+        self.buffer.push("buffer1", CLICK_HEADERS)
+        self.buffer.connection.rpush(self.buffer.key, rejected)
+        for _ in range(3):
+            self.buffer.push("buffer1", CLICK_HEADERS)
+
+        with self.assertLogs("smllr.shorturls.clicks", "ERROR"):
+            self.assertEqual(self.buffer.drain(), 4)
+        self.assertEqual(self.buffer.drain(), 0)
+
+        self.assertEqual(
+            ShortURLClick.objects.filter(short_url=self.shorturl).count(), 4
+        )
+        self.assertEqual(
+            self.buffer.connection.lrange(self.buffer.dead_letter_key, 0, -1),
+            [rejected],
+        )
+        self.assertEqual(
+            int(self.buffer.connection.hget(self.buffer.counter.key, "buffer1")), 4
+        )
+
+    @patch("smllr.shorturls.views.drain_shorturl_clicks")
+    def test_full_batch_queues_drain(self, mock_drain):
+        """Test a drain is queued as soon as a batch is full."""
+        with patch("smllr.shorturls.views.click_buffer", self.buffer):
+            for _ in range(self.buffer.batch_size):
+                Client().get("/buffer1")
+
+        mock_drain.delay.assert_called_once()
+
+
+class ClickStreamTestCase(TestDataMixin, TestCase):
+    """Test clicks ingested from the Redis stream through a consumer group."""
+
+    def setUp(self):
+        self.stream = ClickStream.from_settings()
+        self.stream.block = 0.01
+        self.stream.create_group()
+        self.shorturl = self.create_shorturl(short_code="stream1")
+
+    def tearDown(self):
+        self.stream.connection.delete(
+            self.stream.key, self.stream.dead_letter_key, self.stream.counter.key
+        )
+
+    def pending(self):
+        return self.stream.connection.xpending(self.stream.key, self.stream.group)[
+            "pending"
+        ]
+
+    def test_read_saves_and_acknowledges_clicks(self):
+        """Test new clicks are saved in bulk and acknowledged."""
+        for _ in range(3):
+            self.stream.push("stream1", CLICK_HEADERS)
+
+        self.assertEqual(self.stream.read("worker1"), 3)
+
+        self.assertEqual(
+            ShortURLClick.objects.filter(short_url=self.shorturl).count(), 3
+        )
+        self.assertEqual(self.pending(), 0)
+        self.assertEqual(self.stream.read("worker1"), 0)
+
+    def test_failed_batch_stays_pending(self):
+        """Test clicks aren't acknowledged when saving them fails."""
+        self.stream.push("stream1", CLICK_HEADERS)
+
+        with (
+            patch("smllr.shorturls.clicks.save_clicks", side_effect=OperationalError),
+            self.assertRaises(OperationalError),
+        ):
+            self.stream.read("worker1")
+
+        self.assertEqual(self.pending(), 1)
+
+    def test_rejected_click_is_dead_lettered(self):
+        """Test a click that can't be saved is acknowledged and set aside."""
+        self.stream.push("stream1", CLICK_HEADERS)
+        self.stream.connection.xadd(self.stream.key, {"code": "stream1", "at": "now"})
+        self.stream.push("stream1", CLICK_HEADERS)
+
+        with self.assertLogs("smllr.shorturls.clicks", "ERROR"):
+            self.assertEqual(self.stream.read("worker1"), 2)
+
+        self.assertEqual(self.pending(), 0)
+        [(_, fields)] = self.stream.connection.xrange(self.stream.dead_letter_key)
+        self.assertEqual(fields, {b"code": b"stream1", b"at": b"now"})
+
+    @override_settings(
+        SHORTURL_CLICK_STREAM={
+            **settings.SHORTURL_CLICK_STREAM,
+            "block": settings.REDIS["socket_timeout"] + 0.2,
+        },
+    )
+    def test_idle_read_outlasts_read_timeout(self):
+        """Test waiting on an idle stream longer than the read timeout."""
+        stream = ClickStream.from_settings()
+
+        self.assertEqual(stream.read("worker1"), 0)
+
+    def test_ingest_clicks_survives_errors(self):
+        """Test the worker logs failures, backs off and carries on."""
+        command = IngestClicksCommand(stdout=StringIO())
+        command.backoff = 0.01
+        errors = [RedisError("Redis down"), OperationalError("DB down")]
+
+        def read(consumer):
+            if errors:
+                raise errors.pop(0)
+            command.stop()
+            return 0
+
+        with (
+            patch.object(signal, "signal"),
+            patch.object(ClickStream, "reclaim", return_value=0),
+            patch.object(ClickStream, "read", side_effect=read),
+            self.assertLogs(
+                "smllr.shorturls.management.commands.ingest_clicks", "ERROR"
+            ) as logs,
+        ):
+            command.handle(consumer="worker1", verbosity=1)
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("Stopped worker1", command.stdout.getvalue())
+
+    def test_reclaim_takes_over_dead_consumer_clicks(self):
+        """Test clicks read by a consumer that died are saved by another."""
+        self.stream.push("stream1", CLICK_HEADERS)
+        self.stream.connection.xreadgroup(
+            self.stream.group, "dead", {self.stream.key: ">"}, count=10
+        )
+        self.stream.claim_idle = 0
+
+        self.assertEqual(self.stream.reclaim("worker1"), 1)
+
+        self.assertEqual(
+            ShortURLClick.objects.filter(short_url=self.shorturl).count(), 1
+        )
+        self.assertEqual(self.pending(), 0)
+
+    @override_settings(SHORTURL_CLICK_INGESTION="stream")
+    def test_redirect_adds_click_to_stream(self):
+        """Test redirects add clicks to the stream when it's enabled."""
+        with self.assertNumQueries(1):
+            Client().get("/stream1", HTTP_USER_AGENT=CLICK_HEADERS[1])
+
+        # Only the lookup of the link; the fingerprint is saved by the worker
+        self.assertFalse(Fingerprint.objects.exists())
+        self.assertEqual(self.stream.read("worker1"), 1)
+        self.assertEqual(
+            ShortURLClick.objects.get(
+                short_url=self.shorturl
+            ).fingerprint.user_agent.user_agent,
+            CLICK_HEADERS[1],
+        )
+        ShortURLRedirectView.cache.invalidate("stream1")
+
+
 # =============================================================================
 # P2 MEDIUM: Integration Tests
 # =============================================================================
@@ -838,8 +2298,8 @@ class EndToEndTestCase(TestDataMixin, TestCase):
     def setUp(self):
         self.client = Client()
 
-    @patch("smllr.shorturls.views.save_shorturl_click")
-    def test_e2e_create_and_use_url(self, mock_task):
+    @patch("smllr.shorturls.views.click_buffer")
+    def test_e2e_create_and_use_url(self, mock_buffer):
         """Test complete flow: create URL and use it."""
         # Create URL
         user = self.create_user()
@@ -852,5 +2312,5 @@ class EndToEndTestCase(TestDataMixin, TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, shorturl.destination_url)
 
-        # Verify task was queued
-        mock_task.delay.assert_called_once()
+        # Verify the click was buffered
+        mock_buffer.push.assert_called_once()
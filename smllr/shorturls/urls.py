@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from smllr.shorturls import views
@@ -7,7 +8,11 @@ from smllr.shorturls import api
 urlpatterns = [
     path(
         "<str:short_code>",
-        views.ShortURLRedirectView.as_view(),
+        (
+            views.AsyncShortURLRedirectView
+            if settings.SHORTURL_ASYNC_REDIRECT
+            else views.ShortURLRedirectView
+        ).as_view(),
         name="shorturls_redirect",
     ),
     path(
@@ -1,56 +1,167 @@
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import transaction
 from django.core.paginator import Paginator
 from django.http import HttpRequest
 from django.shortcuts import redirect, render
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import FormView, View
 
-from smllr.cache import RedisConnectionFactory, ShortURLCache
+from smllr.cache import AsyncShortURLCache, CircuitOpenError, TieredShortURLCache
 from smllr.core.response import forbidden, not_found
-from smllr.shorturls.tasks import save_shorturl_click
+from smllr.fingerprint.parser import HttpRequestFingerprintParser
+from smllr.shorturls.clicks import ClickBuffer, ClickStream
+from smllr.shorturls.tasks import drain_shorturl_clicks
 from smllr.shorturls.forms import ShortURLForm
 from smllr.shorturls.models import ShortURL, User
 from smllr.subscriptions.mixins import ProSubscriptionRequiredMixin
 from smllr.users.mixins import NonAnonymousUserRequiredMixin
 
 
+click_buffer = SimpleLazyObject(ClickBuffer.from_settings)
+click_stream = SimpleLazyObject(ClickStream.from_settings)
+
+
+def enqueue_click(request: HttpRequest, short_code: str):
+    """
+    Hands the click over to be recorded, either to the click stream or to the
+    buffer, depending on SHORTURL_CLICK_INGESTION. Only the raw headers go
+    with it; the fingerprint is parsed and saved by whoever saves the click,
+    so the redirect doesn't write to the database.
+
+    A full batch of buffered clicks queues a drain straight away.
+
+    Clicks go through the circuit breaker of the redirect cache, so while Redis
+    is down they're dropped straight away instead of holding up the redirect.
+    """
+
+    headers = HttpRequestFingerprintParser(request).get_headers()
+    breaker = ShortURLRedirectView.cache.breaker
+
+    try:
+        if settings.SHORTURL_CLICK_INGESTION == "stream":
+            breaker.call(click_stream.push, short_code, headers)
+        elif (
+            breaker.call(click_buffer.push, short_code, headers)
+            == click_buffer.batch_size
+        ):
+            drain_shorturl_clicks.delay()
+    except CircuitOpenError:
+        logging.getLogger(__name__).debug(
+            f"Redis unavailable, dropped click on {short_code}"
+        )
+    except Exception:
+        logging.getLogger(__name__).error(
+            f"Error recording click on {short_code}", exc_info=True
+        )
+
+
 class ShortURLRedirectView(View):
-    cache = ShortURLCache(RedisConnectionFactory.get())
+    # Built on first use so importing the URLconf doesn't need Redis
+    cache = SimpleLazyObject(TieredShortURLCache.from_settings)
 
-    @transaction.atomic
     def get(self, request: HttpRequest, short_code: str):
         """
         Redirects to the original URL based on the short code provided in the request.
+        Cache hits are resolved without touching the database, and without an
+        expiry check since cache entries don't outlive their link.
         """
 
         logger = logging.getLogger(self.__class__.__name__)
         short_url = self.cache.get(short_code)
 
         if short_url is None:
-            short_url = ShortURL.objects.filter(short_code=short_code).first()
+            logger.debug(f"Cache miss for {short_code}")
+
+            if self.cache.is_missing(short_code):
+                return not_found(request, "Short URL not found or has expired.")
+
+            short_url = self.cache.load(short_code, self.load_shorturl)
+
+            if short_url is None or short_url.is_expired():
+                return not_found(request, "Short URL not found or has expired.")
+
+        enqueue_click(request, short_code)
+
+        return redirect(short_url.destination_url)
+
+    @staticmethod
+    def load_shorturl(short_code: str) -> ShortURL | None:
+        return (
+            ShortURL.objects.select_related("user")
+            .filter(short_code=short_code)
+            .first()
+        )
 
+
+async def aenqueue_click(request: HttpRequest, short_code: str):
+    """
+    Async version of `enqueue_click`.
+    """
+
+    headers = HttpRequestFingerprintParser(request).get_headers()
+    breaker = ShortURLRedirectView.cache.breaker
+
+    try:
+        if settings.SHORTURL_CLICK_INGESTION == "stream":
+            await breaker.acall(click_stream.apush, short_code, headers)
+        elif (
+            await breaker.acall(click_buffer.apush, short_code, headers)
+            == click_buffer.batch_size
+        ):
+            await sync_to_async(drain_shorturl_clicks.delay)()
+    except CircuitOpenError:
+        logging.getLogger(__name__).debug(
+            f"Redis unavailable, dropped click on {short_code}"
+        )
+    except Exception:
+        logging.getLogger(__name__).error(
+            f"Error recording click on {short_code}", exc_info=True
+        )
+
+
+class AsyncShortURLRedirectView(View):
+    """
+    Async ShortURLRedirectView for ASGI deployments, enabled with
+    SHORTURL_ASYNC_REDIRECT. Redis and database I/O don't block the event loop,
+    so a single process can hold many redirects in flight.
+    """
+
+    cache = AsyncShortURLCache(ShortURLRedirectView.cache)
+
+    async def get(self, request: HttpRequest, short_code: str):
+        logger = logging.getLogger(self.__class__.__name__)
+        short_url = await self.cache.get(short_code)
+
+        if short_url is None:
             logger.debug(f"Cache miss for {short_code}")
 
-            if short_url is not None and not short_url.is_expired():
-                self.cache.set(
-                    code=short_url.short_code,
-                    url=short_url.destination_url,
-                    created_at=short_url.created_at,
-                    user_id=short_url.user.pk,
+            if await self.cache.is_missing(short_code):
+                return await sync_to_async(not_found)(
+                    request, "Short URL not found or has expired."
                 )
 
-        if short_url is None or short_url.is_expired():
-            return not_found(request, "Short URL not found or has expired.")
+            short_url = await self.cache.load(short_code, self.load_shorturl)
 
-        try:
-            request.fingerprint.save()
-            save_shorturl_click.delay(short_code, request.fingerprint.pk)
-        except Exception as err:
-            logger.error("Error saving request fingerprint", err, exc_info=True)
+            if short_url is None or short_url.is_expired():
+                return await sync_to_async(not_found)(
+                    request, "Short URL not found or has expired."
+                )
+
+        await aenqueue_click(request, short_code)
 
         return redirect(short_url.destination_url)
 
+    @staticmethod
+    async def load_shorturl(short_code: str) -> ShortURL | None:
+        return (
+            await ShortURL.objects.select_related("user")
+            .filter(short_code=short_code)
+            .afirst()
+        )
+
 
 class ShortURLFormView(FormView):
     """